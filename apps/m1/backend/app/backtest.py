@@ -0,0 +1,279 @@
+# backtest.py
+"""
+SIGMA A 프로젝트 - 벡터화 백테스트 (step6_data.npz X_test 전체)
+
+    cd apps/m1/backend
+    python -m app.backtest [--chunk 512] [--cost 0.0005] [--out backtest.npz | backtest.parquet]
+
+- registry 의 서빙 모델 전체 (회귀 7개 + champion_model, model_handler 앙상블과 같은 구성) 로
+  X_test 전체를 chunk 단위 배치 예측 (model_runner.run_models 처럼 샘플 1개씩 × 모델마다 predict 하지 않음)
+- scaled → signal → confidence → 앙상블 score → regime 을 NumPy 로 한 번에 계산
+- 모델별 / 앙상블 포지션, PnL, hit rate, turnover 산출
+
+가정:
+- X_test 는 1 step 간격 연속 시퀀스, actual_prices[t] 는 샘플 t 의 예측 대상 시점 실제 가격
+  → 샘플 t 에서 잡은 포지션의 수익률 = actual_prices[t] / actual_prices[t-1] - 1
+    (t=0 은 직전 가격이 없어 수익률 0)
+- 모델 포지션 = sign(signal), 앙상블 포지션 = bull +1 / bear -1 / neutral 0
+- 거래비용 cost 는 포지션 변화량 |Δpos| 에 비례
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .config import (
+    STEP6_PATH,
+    BULL_THRESHOLD,
+    BEAR_THRESHOLD,
+)
+
+ENSEMBLE = "ensemble"
+
+
+# ======================================================================
+# 1. 벡터화 signal / confidence / regime
+#    (model_runner._scaled_to_signal / _signal_to_confidence 와 같은 규칙)
+# ======================================================================
+
+def scaled_to_signal(y_scaled: np.ndarray) -> np.ndarray:
+    return np.clip((y_scaled - 0.5) * 2.0, -1.0, 1.0)
+
+
+def signal_to_confidence(signal: np.ndarray) -> np.ndarray:
+    return np.clip(0.6 + 0.4 * np.abs(signal), 0.6, 0.98)
+
+
+def ensemble_score(signals: np.ndarray, conf: np.ndarray) -> np.ndarray:
+    """(n, n_models) → (n,) confidence 가중 평균"""
+    total = conf.sum(axis=1)
+    score = np.divide(
+        (signals * conf).sum(axis=1), total, out=np.zeros_like(total), where=total > 0
+    )
+    return np.clip(score, -1.0, 1.0)
+
+
+def classify_regime(
+    score: np.ndarray,
+    bull: float = BULL_THRESHOLD,
+    bear: float = BEAR_THRESHOLD,
+) -> np.ndarray:
+    """+1 bull / -1 bear / 0 neutral (int8)"""
+    regime = np.zeros(score.shape, dtype=np.int8)
+    regime[score >= bull] = 1
+    regime[score <= bear] = -1
+    return regime
+
+
+REGIME_NAMES = {1: "bull", -1: "bear", 0: "neutral"}
+
+
+# ======================================================================
+# 2. 데이터 / 모델
+# ======================================================================
+
+def load_test_set(path: Path = STEP6_PATH) -> Dict[str, np.ndarray]:
+    data = np.load(path)
+    return {
+        "X_test": data["X_test"].astype(np.float32),
+        "y_test": data["y_test"].reshape(-1),
+        "actual_prices": data["actual_prices"].reshape(-1).astype(np.float64),
+    }
+
+
+def build_models(input_shape) -> Dict[str, object]:
+    """registry 에서 학습 가중치가 로드된 모델 (champion 포함, 아티팩트 없는 모델은 제외)"""
+    from .model_registry import registry
+
+    return registry.load(input_shape=tuple(input_shape))
+
+
+def batch_predict(models: Dict[str, object], X: np.ndarray, chunk: int = 512) -> np.ndarray:
+    """모든 모델로 X 전체를 chunk 단위 예측 → (n, n_models) scaled 예측"""
+    out = np.empty((len(X), len(models)), dtype=np.float32)
+    for j, model in enumerate(models.values()):
+        pred = model.predict(X, batch_size=chunk, verbose=0)
+        out[:, j] = np.asarray(pred).reshape(len(X), -1)[:, 0]
+    return out
+
+
+# ======================================================================
+# 3. 성과 계산
+# ======================================================================
+
+@dataclass
+class BacktestResult:
+    names: List[str]                 # 모델 이름 + "ensemble"
+    preds: np.ndarray                # (n, n_models) scaled 예측
+    signals: np.ndarray              # (n, n_models)
+    confidence: np.ndarray           # (n, n_models)
+    score: np.ndarray                # (n,) 앙상블 score
+    regime: np.ndarray               # (n,) +1/0/-1
+    returns: np.ndarray              # (n,) 실현 수익률
+    positions: np.ndarray            # (n, n_models + 1)
+    pnl: np.ndarray                  # (n, n_models + 1) 비용 차감 후
+    summary: Dict[str, Dict[str, float]] = field(default_factory=dict)
+
+    def save(self, path: Path) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if path.suffix == ".parquet":
+            self.to_frame().to_parquet(path)
+        else:
+            np.savez_compressed(
+                path,
+                names=np.array(self.names),
+                preds=self.preds,
+                signals=self.signals,
+                confidence=self.confidence,
+                score=self.score,
+                regime=self.regime,
+                returns=self.returns,
+                positions=self.positions,
+                pnl=self.pnl,
+            )
+
+    def to_frame(self):
+        import pandas as pd
+
+        cols = {
+            "score": self.score,
+            "regime": pd.Series(self.regime).map(REGIME_NAMES),
+            "return": self.returns,
+        }
+        for j, name in enumerate(self.names):
+            if j < self.signals.shape[1]:
+                cols[f"{name}_signal"] = self.signals[:, j]
+            cols[f"{name}_position"] = self.positions[:, j]
+            cols[f"{name}_pnl"] = self.pnl[:, j]
+        return pd.DataFrame(cols)
+
+
+def realized_returns(actual_prices: np.ndarray) -> np.ndarray:
+    r = np.zeros(len(actual_prices), dtype=np.float64)
+    prev = actual_prices[:-1]
+    valid = prev != 0
+    r[1:][valid] = actual_prices[1:][valid] / prev[valid] - 1.0
+    return r
+
+
+def evaluate(
+    positions: np.ndarray, returns: np.ndarray, cost: float = 0.0
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    positions (n, k), returns (n,) → (pnl (n, k), hit (k,), turnover (k,))
+    """
+    prev = np.vstack([np.zeros((1, positions.shape[1])), positions[:-1]])
+    trades = np.abs(positions - prev)
+    pnl = positions * returns[:, None] - cost * trades
+
+    active = (positions != 0) & (returns[:, None] != 0)
+    hits = (np.sign(positions) == np.sign(returns)[:, None]) & active
+    n_active = active.sum(axis=0)
+    hit_rate = np.divide(
+        hits.sum(axis=0), n_active, out=np.full(positions.shape[1], np.nan), where=n_active > 0
+    )
+    turnover = trades.mean(axis=0)
+    return pnl, hit_rate, turnover
+
+
+def run_backtest(
+    preds: np.ndarray,
+    names: List[str],
+    actual_prices: np.ndarray,
+    cost: float = 0.0,
+    bull: float = BULL_THRESHOLD,
+    bear: float = BEAR_THRESHOLD,
+) -> BacktestResult:
+    """이미 계산된 (n, n_models) 예측으로 백테스트 (가중치 비교 시 예측만 바꿔서 재사용)"""
+    signals = scaled_to_signal(preds.astype(np.float64))
+    conf = signal_to_confidence(signals)
+    score = ensemble_score(signals, conf)
+    regime = classify_regime(score, bull, bear)
+
+    returns = realized_returns(actual_prices)
+    positions = np.column_stack([np.sign(signals), regime.astype(np.float64)])
+    pnl, hit_rate, turnover = evaluate(positions, returns, cost)
+
+    all_names = list(names) + [ENSEMBLE]
+    cum = pnl.sum(axis=0)
+    std = pnl.std(axis=0)
+    sharpe = np.divide(
+        pnl.mean(axis=0), std, out=np.zeros_like(std), where=std > 0
+    ) * np.sqrt(252.0)
+    summary = {
+        name: {
+            "total_pnl": float(cum[j]),
+            "hit_rate": float(hit_rate[j]),
+            "turnover": float(turnover[j]),
+            "sharpe": float(sharpe[j]),
+        }
+        for j, name in enumerate(all_names)
+    }
+    return BacktestResult(
+        names=all_names,
+        preds=preds,
+        signals=signals,
+        confidence=conf,
+        score=score,
+        regime=regime,
+        returns=returns,
+        positions=positions,
+        pnl=pnl,
+        summary=summary,
+    )
+
+
+# ======================================================================
+# 4. CLI
+# ======================================================================
+
+def main(argv: Optional[List[str]] = None) -> BacktestResult:
+    parser = argparse.ArgumentParser(description="X_test 전체 벡터화 백테스트")
+    parser.add_argument("--chunk", type=int, default=512, help="예측 배치 크기")
+    parser.add_argument("--cost", type=float, default=0.0, help="|Δposition| 당 거래비용")
+    parser.add_argument("--bull", type=float, default=BULL_THRESHOLD)
+    parser.add_argument("--bear", type=float, default=BEAR_THRESHOLD)
+    parser.add_argument("--out", type=Path, default=None, help=".npz 또는 .parquet 저장 경로")
+    args = parser.parse_args(argv)
+
+    data = load_test_set()
+    X = data["X_test"]
+
+    t0 = time.perf_counter()
+    models = build_models(X.shape[1:])
+    t_build = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    preds = batch_predict(models, X, args.chunk)
+    t_pred = time.perf_counter() - t0
+
+    result = run_backtest(
+        preds, list(models), data["actual_prices"], args.cost, args.bull, args.bear
+    )
+
+    print(
+        f"[backtest] samples={len(X)} models={len(models)} "
+        f"build={t_build:.1f}s predict={t_pred:.2f}s"
+    )
+    print(f"{'name':<22}{'total_pnl':>12}{'hit_rate':>10}{'turnover':>10}{'sharpe':>9}")
+    for name, s in result.summary.items():
+        print(
+            f"{name:<22}{s['total_pnl']:>12.4f}{s['hit_rate']:>10.3f}"
+            f"{s['turnover']:>10.3f}{s['sharpe']:>9.2f}"
+        )
+
+    if args.out is not None:
+        result.save(args.out)
+        print(f"[backtest] 저장: {args.out}")
+    return result
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,333 @@
+# benchmark.py
+"""
+SIGMA A 프로젝트 - tick 경로 replay 부하/지연 벤치마크
+
+    cd apps/m1/backend
+    python -m app.benchmark --ticks 600 --symbols 1 --clients 20 --out bench.json
+
+녹화된 가격 시계열(기본: step6_data.npz actual_prices, --prices 로 CSV 지정)을
+stub 가격 소스로 실제 파이프라인에 흘려 보내고 stage 별 지연을 잰다.
+
+    price(stub) → features(LiveDataProcessor, feature 스레드)
+      → inference(inference_executor → run_inference_batch)
+      → build_signal(ConfidenceManager.compute 포함) → store(append_signal)
+      → broadcast(ConnectionManager) → N 개 가짜 WebSocket 클라이언트 수신
+
+출력 JSON: stage 별 p50/p99/mean/max (ms), 처리량(tick/s), RSS 변화, 클라이언트 전달 지연.
+커밋 간 비교용으로 git commit 해시를 함께 기록한다.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+STAGES = ["price", "features", "inference", "build_signal", "store", "broadcast", "total"]
+
+
+# ======================================================================
+# 측정 도구
+# ======================================================================
+
+def rss_mb() -> float:
+    """현재 RSS (MB). Linux 는 /proc, 그 외는 최대 RSS 로 대체"""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, AttributeError):
+        import resource
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+def summarize(samples_sec: List[float]) -> Dict[str, float]:
+    if not samples_sec:
+        return {"count": 0}
+    a = np.asarray(samples_sec) * 1000.0
+    return {
+        "count": int(a.size),
+        "p50_ms": float(np.percentile(a, 50)),
+        "p99_ms": float(np.percentile(a, 99)),
+        "mean_ms": float(a.mean()),
+        "max_ms": float(a.max()),
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "HEAD"], cwd=Path(__file__).parent, text=True,
+            stderr=subprocess.DEVNULL,
+        ).strip()
+    except Exception:
+        return None
+
+
+# ======================================================================
+# stub 가격 소스 / 가짜 WebSocket 클라이언트
+# ======================================================================
+
+class ReplayPriceSource:
+    """녹화된 가격을 심볼별로 조금씩 어긋나게 순환 재생"""
+
+    def __init__(self, prices: np.ndarray, symbols: List[str]):
+        self.prices = np.asarray(prices, dtype=np.float64)
+        self.symbols = symbols
+        self.pos = 0
+
+    async def get_realtime_prices(self, symbols: List[str]) -> Dict[str, float]:
+        n = len(self.prices)
+        out = {sym: float(self.prices[(self.pos + 7 * k) % n]) for k, sym in enumerate(symbols)}
+        self.pos += 1
+        return out
+
+
+class FakeWebSocket:
+    """ConnectionManager 가 쓰는 최소 인터페이스. 수신 시각만 기록"""
+
+    def __init__(self, send_delay: float = 0.0):
+        self.send_delay = send_delay
+        self.received: List[tuple] = []
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text: str):
+        if self.send_delay > 0:
+            await asyncio.sleep(self.send_delay)
+        self.received.append((time.perf_counter(), text))
+
+    async def close(self):
+        pass
+
+
+def load_prices(path: Optional[Path]) -> np.ndarray:
+    if path is not None:
+        from .kis_api_client import _load_replay_csv
+
+        return np.asarray(_load_replay_csv(path))
+    from .config import STEP6_PATH
+
+    return np.load(STEP6_PATH)["actual_prices"].reshape(-1)
+
+
+# ======================================================================
+# 실행
+# ======================================================================
+
+async def run(args) -> Dict[str, Any]:
+    # 환경변수(SIGNAL_DB_PATH 등)를 먼저 정한 뒤 import 해야 하므로 여기서 import
+    from . import signal_generator as sg
+    from .config import SEQ_LEN
+    from .inference_executor import inference_executor
+    from .model_handler import run_inference_batch
+    from .signal_store import append_signal, close_store
+    from .ws_broadcast import ConnectionManager
+
+    symbols = ["KOSPI200"] + [f"BENCH{i}" for i in range(1, args.symbols)]
+    source = ReplayPriceSource(load_prices(args.prices), symbols)
+
+    manager = ConnectionManager()
+    clients = []
+    for i in range(args.clients):
+        delay = args.slow_delay if i < args.slow_clients else 0.0
+        ws = FakeWebSocket(delay)
+        await manager.connect(ws, "delta" if i < args.delta_clients else "full")
+        clients.append(ws)
+
+    inference_executor.start()
+    loop = asyncio.get_running_loop()
+
+    # window 가 찰 때까지 가격만 채움 (측정 제외)
+    for _ in range(SEQ_LEN):
+        prices = await source.get_realtime_prices(symbols)
+        await loop.run_in_executor(sg._feature_pool, sg._update_windows, symbols, prices)
+
+    timings: Dict[str, List[float]] = {s: [] for s in STAGES}
+    sent_at: Dict[tuple, float] = {}
+    rss_samples = [(0, rss_mb())]
+    errors = 0
+    total_ticks = args.warmup + args.ticks
+    t_start = None
+
+    for tick in range(total_ticks):
+        measured = tick >= args.warmup
+        if tick == args.warmup:
+            t_start = time.perf_counter()
+        t0 = time.perf_counter()
+        stamp = {"start": t0}
+
+        prices = await source.get_realtime_prices(symbols)
+        stamp["price"] = time.perf_counter()
+
+        results, ready, batch, stream_keys = await loop.run_in_executor(
+            sg._feature_pool, sg._update_windows, symbols, prices
+        )
+        stamp["features"] = time.perf_counter()
+
+        infers = (
+            await inference_executor.submit(run_inference_batch, batch, None, None, stream_keys)
+            if ready else []
+        )
+        stamp["inference"] = time.perf_counter()
+
+        for sym, infer in zip(ready, infers):
+            results[sym] = sg._build_signal(sym, prices[sym], infer)
+        sigs = [results[sym] for sym in symbols]
+        stamp["build_signal"] = time.perf_counter()
+
+        for sig in sigs:
+            append_signal(sig)
+        stamp["store"] = time.perf_counter()
+
+        for sig in sigs:
+            if measured:
+                sent_at[(sig.get("symbol"), sig.get("timestamp"))] = time.perf_counter()
+            await manager.broadcast(sig)
+        stamp["broadcast"] = time.perf_counter()
+
+        errors += sum(1 for s in sigs if s.get("regime") == "error")
+
+        if measured:
+            prev = t0
+            for stage in STAGES[:-1]:
+                timings[stage].append(stamp[stage] - prev)
+                prev = stamp[stage]
+            timings["total"].append(stamp["broadcast"] - t0)
+            done = tick - args.warmup + 1
+            if done % args.rss_every == 0:
+                rss_samples.append((done, rss_mb()))
+
+        if args.interval > 0:
+            await asyncio.sleep(max(0.0, args.interval - (time.perf_counter() - t0)))
+        else:
+            # sender task 들이 돌 수 있게 양보
+            await asyncio.sleep(0)
+
+    elapsed = time.perf_counter() - t_start if t_start is not None else 0.0
+
+    # 남은 frame 전달 대기
+    await asyncio.sleep(max(0.5, args.slow_delay * 2))
+
+    delivery: List[float] = []
+    delivered = 0
+    for ws in clients:
+        for t_recv, text in ws.received:
+            try:
+                msg = json.loads(text)
+            except ValueError:
+                continue
+            key = (msg.get("symbol"), msg.get("timestamp"))
+            if key in sent_at:
+                delivery.append(t_recv - sent_at[key])
+                delivered += 1
+
+    ws_stats = manager.stats()
+    for ws in list(manager.active):
+        manager.disconnect(ws)
+    await inference_executor.shutdown()
+    close_store()
+
+    from .config import INFERENCE_EXECUTOR_MODE, INFERENCE_PRECISION, STREAMING_INFERENCE
+
+    import tensorflow as tf
+
+    return {
+        "meta": {
+            "git_commit": git_commit(),
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "tensorflow": tf.__version__,
+            "platform": platform.platform(),
+            "executor_mode": INFERENCE_EXECUTOR_MODE,
+            "precision": INFERENCE_PRECISION,
+            "streaming": STREAMING_INFERENCE,
+        },
+        "config": {
+            "ticks": args.ticks,
+            "warmup": args.warmup,
+            "symbols": args.symbols,
+            "clients": args.clients,
+            "slow_clients": args.slow_clients,
+            "delta_clients": args.delta_clients,
+            "interval": args.interval,
+        },
+        "stages": {stage: summarize(timings[stage]) for stage in STAGES},
+        "throughput": {
+            "ticks_per_sec": args.ticks / elapsed if elapsed > 0 else None,
+            "signals_per_sec": args.ticks * len(symbols) / elapsed if elapsed > 0 else None,
+            "error_signals": errors,
+        },
+        "rss_mb": {
+            "start": rss_samples[0][1],
+            "end": rss_samples[-1][1],
+            "growth": rss_samples[-1][1] - rss_samples[0][1],
+            "samples": rss_samples,
+        },
+        "websocket": {
+            "delivered": delivered,
+            "expected": args.ticks * len(symbols) * args.clients,
+            "dropped": ws_stats.get("dropped", 0),
+            "delivery": summarize(delivery),
+        },
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> Dict[str, Any]:
+    parser = argparse.ArgumentParser(description="tick 경로 replay 벤치마크")
+    parser.add_argument("--ticks", type=int, default=300, help="측정 tick 수")
+    parser.add_argument("--warmup", type=int, default=5, help="측정 제외 tick 수 (모델 로드 포함)")
+    parser.add_argument("--symbols", type=int, default=1, help="심볼 수")
+    parser.add_argument("--clients", type=int, default=10, help="가짜 WebSocket 클라이언트 수")
+    parser.add_argument("--slow-clients", type=int, default=0, help="느린 클라이언트 수")
+    parser.add_argument("--slow-delay", type=float, default=0.05, help="느린 클라이언트 전송 지연(초)")
+    parser.add_argument("--delta-clients", type=int, default=0, help="delta 모드 클라이언트 수")
+    parser.add_argument("--interval", type=float, default=0.0, help="tick 간격(초), 0 이면 최대 속도")
+    parser.add_argument("--rss-every", type=int, default=50, help="RSS 샘플링 간격(tick)")
+    parser.add_argument("--prices", type=Path, default=None, help="녹화된 가격 CSV (close 컬럼)")
+    parser.add_argument("--db", action="store_true", help="실제 SIGNAL_DB_PATH 사용 (기본: 임시 DB)")
+    parser.add_argument("--out", type=Path, default=None, help="결과 JSON 경로")
+    args = parser.parse_args(argv)
+
+    if not args.db:
+        os.environ["SIGNAL_DB_PATH"] = str(Path(tempfile.mkdtemp()) / "bench_signals.db")
+
+    result = asyncio.run(run(args))
+
+    print(f"{'stage':<14}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for stage, s in result["stages"].items():
+        if s.get("count"):
+            print(f"{stage:<14}{s['p50_ms']:>10.2f}{s['p99_ms']:>10.2f}{s['max_ms']:>10.2f}")
+    tp = result["throughput"]["ticks_per_sec"]
+    print(f"throughput: {tp:.1f} ticks/s" if tp else "throughput: -")
+    print(f"rss: {result['rss_mb']['start']:.0f} → {result['rss_mb']['end']:.0f} MB")
+    d = result["websocket"]["delivery"]
+    if d.get("count"):
+        print(
+            f"ws delivery: {result['websocket']['delivered']}/{result['websocket']['expected']} "
+            f"p50={d['p50_ms']:.2f}ms p99={d['p99_ms']:.2f}ms"
+        )
+
+    if args.out is not None:
+        args.out.parent.mkdir(parents=True, exist_ok=True)
+        args.out.write_text(json.dumps(result, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"[benchmark] 저장: {args.out}")
+    return result
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+# compiled_artifacts.py
+"""
+SIGMA A 프로젝트 - 사전 컴파일(AOT) 모델 아티팩트
+
+빌드 (컨테이너 밖 또는 배포 전 1회):
+    cd apps/m1/backend && python -m app.compiled_artifacts
+
+- model_handler 의 fused ensemble 그래프를 SavedModel 하나로 export
+    artifacts_golden/compiled/ensemble_savedmodel/
+  (모델별 head 함수도 함께 저장 → pruning 때 남은 모델만 묶은 그래프 / 모델별 지연 측정)
+- manifest.json 에 입력 shape / head 순서 / 원본 가중치 checksum / 아티팩트 checksum 기록
+
+서버는 첫 추론 요청 시 load_compiled_ensemble() 로 SavedModel 만 로드한다.
+(모델 구조 재생성 + .weights.h5 로드 + tf.function trace 를 건너뜀)
+원본 가중치 checksum 이 manifest 와 다르면 오래된 아티팩트로, SavedModel 디렉터리 checksum 이
+다르면 손상된 아티팩트로 보고 None 을 반환 → 호출 측은 기존 Keras 빌드 경로로 fallback.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import shutil
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import tensorflow as tf
+
+from .config import (
+    MODEL_WEIGHTS,
+    SEQ_LEN,
+    N_FEATURES,
+    COMPILED_ENSEMBLE_PATH,
+    COMPILED_MANIFEST_PATH,
+)
+
+MANIFEST_VERSION = 3   # 2: model_registry 학습 구조 + 가중치로 export, 3: 모델별 head 함수 포함
+# v2 아티팩트도 로드는 하지만 모델별 함수가 없어 pruning 은 집계에서만 제외 (연산은 그대로)
+_LOADABLE_VERSIONS = (2, 3)
+
+
+# ======================================================================
+# checksum
+# ======================================================================
+
+def file_sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def dir_sha256(path: Path) -> str:
+    """디렉터리 안 모든 파일 (상대경로 + 내용) 기준 checksum"""
+    h = hashlib.sha256()
+    for p in sorted(q for q in Path(path).rglob("*") if q.is_file()):
+        h.update(str(p.relative_to(path)).encode())
+        h.update(file_sha256(p).encode())
+    return h.hexdigest()
+
+
+def source_checksums() -> Dict[str, Optional[str]]:
+    """원본 가중치 파일 checksum (파일이 없으면 None)"""
+    return {
+        name: file_sha256(Path(path)) if Path(path).exists() else None
+        for name, path in MODEL_WEIGHTS.items()
+    }
+
+
+def read_manifest() -> Optional[Dict[str, Any]]:
+    if not COMPILED_MANIFEST_PATH.exists():
+        return None
+    try:
+        return json.loads(COMPILED_MANIFEST_PATH.read_text(encoding="utf-8"))
+    except Exception as e:
+        print(f"[compiled_artifacts] ⚠️ manifest 읽기 실패: {e}")
+        return None
+
+
+# ======================================================================
+# export
+# ======================================================================
+
+def export_ensemble(
+    ensemble_fn: Callable,
+    models: List[Any],
+    heads: List[str],
+    input_shape,
+    head_fns: Dict[str, Callable],
+) -> Dict[str, Any]:
+    """
+    fused ensemble tf.function 과 모델별 head tf.function (x → (batch, 1)) 을
+    SavedModel 로 저장하고 manifest 를 기록.
+    """
+    input_shape = [int(d) for d in input_shape]
+
+    module = tf.Module()
+    module.models = list(models)
+    # Keras 버전에 따라 모델 속성만으로 추적되지 않는 변수(seed 상태 등)가 있어 명시적으로 추적
+    module.model_variables = [v for m in models for v in m.variables]
+    module.serve = ensemble_fn
+    module.heads = {name: head_fns[name] for name in heads}
+
+    if COMPILED_ENSEMBLE_PATH.exists():
+        shutil.rmtree(COMPILED_ENSEMBLE_PATH)
+    COMPILED_ENSEMBLE_PATH.parent.mkdir(parents=True, exist_ok=True)
+
+    tf.saved_model.save(
+        module,
+        str(COMPILED_ENSEMBLE_PATH),
+        signatures={"serving_default": ensemble_fn.get_concrete_function()},
+    )
+
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "format": "saved_model",
+        "path": COMPILED_ENSEMBLE_PATH.name,
+        "input_shape": [None, *input_shape],
+        "dtype": "float32",
+        "heads": list(heads),
+        "head_functions": True,
+        "sources": source_checksums(),
+        "artifact_sha256": dir_sha256(COMPILED_ENSEMBLE_PATH),
+        "tensorflow": tf.__version__,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+    }
+    COMPILED_MANIFEST_PATH.write_text(
+        json.dumps(manifest, indent=2, ensure_ascii=False), encoding="utf-8"
+    )
+    return manifest
+
+
+# ======================================================================
+# load
+# ======================================================================
+
+class CompiledEnsemble:
+    """
+    로드한 SavedModel. (batch, T, F) float32 → (batch, n_heads)
+    모델별 head 함수가 있는 아티팩트(v3)면 subset(names) 로 names 모델만 묶은 그래프를 만들고
+    (조합별 1회 trace 후 캐시) head_fn(name) 으로 모델 하나만 실행할 수 있다.
+    """
+
+    def __init__(self, loaded, heads: List[str], input_shape):
+        self._loaded = loaded   # 참조를 잡고 있어야 변수가 해제되지 않는다
+        self.heads = list(heads)
+        self.input_shape = tuple(int(d) for d in input_shape)
+        head_fns = getattr(loaded, "heads", None)
+        self._head_fns = {n: head_fns[n] for n in self.heads} if head_fns is not None else {}
+        self._subsets: Dict[Tuple[str, ...], Callable] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def per_model(self) -> bool:
+        return bool(self._head_fns)
+
+    def __call__(self, x):
+        return self._loaded.serve(x)
+
+    def head_fn(self, name: str) -> Optional[Callable]:
+        return self._head_fns.get(name)
+
+    def subset(self, names) -> Optional[Callable]:
+        """pruning 용: names 모델만 실행하는 그래프 (모델별 함수가 없는 v2 아티팩트면 None)"""
+        if not self.per_model:
+            return None
+        names = tuple(names)
+        with self._lock:
+            fn = self._subsets.get(names)
+            if fn is None:
+                fns = [self._head_fns[n] for n in names]
+
+                @tf.function(
+                    input_signature=[tf.TensorSpec(shape=(None, *self.input_shape), dtype=tf.float32)]
+                )
+                def fn(x):
+                    return tf.concat([f(x) for f in fns], axis=1)
+
+                self._subsets[names] = fn
+        return fn
+
+
+def load_compiled_ensemble(
+    input_shape, report: Optional[Dict[str, float]] = None
+) -> Optional[Tuple[CompiledEnsemble, List[str]]]:
+    """
+    manifest 검증 (원본 가중치 / SavedModel checksum) 후 SavedModel 로드.
+    반환: (CompiledEnsemble, head 이름 리스트)
+    사용할 수 없으면 None.
+    """
+    t0 = time.perf_counter()
+    manifest = read_manifest()
+    if manifest is None:
+        return None
+
+    if manifest.get("version") not in _LOADABLE_VERSIONS or manifest.get("format") != "saved_model":
+        print("[compiled_artifacts] ⚠️ 지원하지 않는 manifest → Keras 빌드 사용")
+        return None
+
+    expected = [None, *[int(d) for d in input_shape]]
+    if manifest.get("input_shape") != expected:
+        print(
+            f"[compiled_artifacts] ⚠️ input_shape 불일치 "
+            f"({manifest.get('input_shape')} != {expected}) → Keras 빌드 사용"
+        )
+        return None
+
+    if manifest.get("sources") != source_checksums():
+        print("[compiled_artifacts] ⚠️ 가중치가 빌드 이후 변경됨 → Keras 빌드 사용")
+        return None
+
+    path = COMPILED_MANIFEST_PATH.parent / manifest["path"]
+    if not path.exists():
+        print(f"[compiled_artifacts] ⚠️ 아티팩트 없음: {path}")
+        return None
+    if manifest.get("artifact_sha256") != dir_sha256(path):
+        print("[compiled_artifacts] ⚠️ SavedModel 이 export 이후 변경/손상됨 → Keras 빌드 사용")
+        return None
+    if report is not None:
+        report["verify_manifest"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    try:
+        loaded = tf.saved_model.load(str(path))
+    except Exception as e:
+        print(f"[compiled_artifacts] ⚠️ SavedModel 로드 실패: {e}")
+        return None
+    if report is not None:
+        report["load_saved_model"] = time.perf_counter() - t0
+
+    ensemble = CompiledEnsemble(loaded, manifest["heads"], input_shape)
+    print(
+        f"[compiled_artifacts] SavedModel 로드 완료 ({len(ensemble.heads)} heads"
+        + (", 모델별 함수 포함)" if ensemble.per_model else ")")
+    )
+    return ensemble, ensemble.heads
+
+
+# ======================================================================
+# CLI
+# ======================================================================
+
+def main() -> None:
+    from . import model_handler
+
+    t0 = time.perf_counter()
+    input_shape = (SEQ_LEN, N_FEATURES)
+    model_handler.load_models(input_shape)
+
+    fn, models, heads = model_handler.get_fused_ensemble()
+    if fn is None:
+        raise SystemExit("[compiled_artifacts] fused ensemble 생성 실패 → export 중단")
+
+    manifest = export_ensemble(fn, models, heads, input_shape, model_handler.get_head_fns())
+    print(
+        f"[compiled_artifacts] export 완료: {COMPILED_ENSEMBLE_PATH} "
+        f"({len(heads)} heads, {time.perf_counter() - t0:.1f}s)"
+    )
+    print(json.dumps(manifest, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
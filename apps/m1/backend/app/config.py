@@ -10,7 +10,7 @@ SIGMA A 프로젝트 공통 설정 모듈
 
 from pathlib import Path
 import os
-from datetime import datetime, time
+from datetime import date, datetime
 from zoneinfo import ZoneInfo
 
 
@@ -32,12 +32,30 @@ MODEL_WEIGHTS = {
     "patchtst_like_reg":      ARTIFACTS_DIR / "tmp_patchtst_like_reg.weights.h5",
     "tft_lite_reg":           ARTIFACTS_DIR / "tmp_tft_lite_reg.weights.h5",
     "attn_lstm_cnn_reg":      ARTIFACTS_DIR / "tmp_attn_lstm_cnn_reg.weights.h5",
-    "champion_model": "app/artifacts_golden/CHAMPION_MODEL.keras",
-
+    "champion_model":         ARTIFACTS_DIR / "CHAMPION_MODEL.keras",
 }
 
 CHAMPION_DL_MODEL_PATH = ARTIFACTS_DIR / "CHAMPION_MODEL.keras"
 
+# 사전 컴파일된 fused ensemble (python -m app.compiled_artifacts 로 생성)
+COMPILED_DIR = ARTIFACTS_DIR / "compiled"
+COMPILED_ENSEMBLE_PATH = COMPILED_DIR / "ensemble_savedmodel"
+COMPILED_MANIFEST_PATH = COMPILED_DIR / "manifest.json"
+USE_COMPILED_ARTIFACTS: bool = os.getenv("USE_COMPILED_ARTIFACTS", "true").lower() == "true"
+
+# 양자화 TFLite 모델 (python -m app.quantize --precision int8|float16 로 생성)
+#   float32 : Keras / compiled SavedModel (기본)
+#   float16 : TFLite float16 가중치 (drift 거의 없음)
+#   int8    : TFLite int8 (representative dataset 보정, drift 큰 모델은 float16 으로 대체)
+INFERENCE_PRECISION: str = os.getenv("INFERENCE_PRECISION", "float32").lower()
+QUANTIZED_DIR = COMPILED_DIR / "tflite"
+QUANTIZED_MANIFEST_PATH = QUANTIZED_DIR / "manifest.json"
+# 보정용 샘플 수 (step6 X_train 에서 균등 추출)
+QUANTIZE_CALIBRATION_SAMPLES: int = int(os.getenv("QUANTIZE_CALIBRATION_SAMPLES", "200"))
+# X_test 기준 float32 대비 평균 절대 오차(scaled) 허용치
+QUANTIZE_MAX_MAE: float = float(os.getenv("QUANTIZE_MAX_MAE", "0.02"))
+TFLITE_NUM_THREADS: int = int(os.getenv("TFLITE_NUM_THREADS", "1"))
+
 
 # === 시계열 / 심볼 관련 설정 ============================================
 
@@ -47,6 +65,26 @@ N_FEATURES: int = 16
 
 INTERNAL_SYMBOL: str = "KOSPI200"
 YFINANCE_SYMBOL: str = "^KS200"
+KIS_SYMBOL_CODE: str = "101600"
+
+# 내부 심볼 → KIS 종목코드 / yfinance 티커
+# (여기 없는 심볼은 6자리 KRX 종목코드로 간주: KIS = 코드, yfinance = 코드.KS)
+SYMBOL_MAP: dict[str, dict[str, str]] = {
+    INTERNAL_SYMBOL: {"kis": KIS_SYMBOL_CODE, "yfinance": YFINANCE_SYMBOL},
+}
+
+# 신호를 생성할 심볼 목록 (쉼표 구분, 예: "KOSPI200,005930,000660")
+SIGNAL_SYMBOLS: list[str] = [
+    s.strip() for s in os.getenv("SIGNAL_SYMBOLS", INTERNAL_SYMBOL).split(",") if s.strip()
+]
+
+
+def kis_code_for(symbol: str) -> str:
+    return SYMBOL_MAP.get(symbol, {}).get("kis", symbol)
+
+
+def yfinance_ticker_for(symbol: str) -> str:
+    return SYMBOL_MAP.get(symbol, {}).get("yfinance", f"{symbol}.KS")
 
 
 # === KIS API / 데모 모드 설정 ===========================================
@@ -60,6 +98,38 @@ KIS_ACCOUNT_NO: str | None = os.getenv("KIS_ACCOUNT_NO", "")
 KIS_BASE_URL: str = os.getenv("KIS_BASE_URL", "https://openapi.koreainvestment.com:9443")
 KIS_WS_URL: str   = os.getenv("KIS_WS_URL",   "wss://openapi.koreainvestment.com:9443")
 
+# REST connection pool / 호출 제한 (실전 계좌 초당 20건, 모의투자는 더 낮음)
+KIS_POOL_LIMIT: int = int(os.getenv("KIS_POOL_LIMIT", "10"))
+KIS_KEEPALIVE_SEC: float = float(os.getenv("KIS_KEEPALIVE_SEC", "30"))
+KIS_TIMEOUT_SEC: float = float(os.getenv("KIS_TIMEOUT_SEC", "3.0"))
+KIS_RATE_LIMIT_PER_SEC: float = float(os.getenv("KIS_RATE_LIMIT_PER_SEC", "15"))
+
+# 실시간 체결 WebSocket 수집 (USE_KIS_API=true 일 때만 사용, 끄면 REST 1초 polling)
+KIS_USE_WEBSOCKET: bool = os.getenv("KIS_USE_WEBSOCKET", "false").lower() == "true"
+KIS_WS_TR_ID: str = os.getenv("KIS_WS_TR_ID", "H0STCNT0")
+# 체결 tick 을 묶는 bar 길이(초) / bar 마감 후 늦은 tick 대기 시간(초)
+KIS_WS_BAR_SEC: float = float(os.getenv("KIS_WS_BAR_SEC", "1.0"))
+KIS_WS_BAR_GRACE_SEC: float = float(os.getenv("KIS_WS_BAR_GRACE_SEC", "0.2"))
+KIS_WS_QUEUE_SIZE: int = int(os.getenv("KIS_WS_QUEUE_SIZE", "1000"))
+
+# access_token 캐시 (유효기간 24시간, 만료 전 미리 갱신)
+KIS_TOKEN_CACHE_PATH = Path(os.getenv("KIS_TOKEN_CACHE_PATH", str(BASE_DIR / "data" / "kis_token.json")))
+KIS_TOKEN_REFRESH_MARGIN_SEC: float = float(os.getenv("KIS_TOKEN_REFRESH_MARGIN_SEC", "600"))
+
+
+# === yfinance 데모 모드 설정 ============================================
+
+# 백그라운드 갱신 주기(초). 마지막으로 받은 1분봉 이후만 다운로드한다.
+YF_REFRESH_SEC: float = float(os.getenv("YF_REFRESH_SEC", "5.0"))
+YF_BAR_CACHE_SIZE: int = int(os.getenv("YF_BAR_CACHE_SIZE", "1000"))
+YF_FIRST_FETCH_TIMEOUT_SEC: float = float(os.getenv("YF_FIRST_FETCH_TIMEOUT_SEC", "10.0"))
+
+# 오프라인 데모: 녹화된 bar CSV 를 재생 ("{symbol}" 은 내부 심볼로 치환)
+YF_REPLAY_CSV: str = os.getenv("YF_REPLAY_CSV", "")
+YF_REPLAY_INTERVAL_SEC: float = float(os.getenv("YF_REPLAY_INTERVAL_SEC", "1.0"))
+# 받은 1분봉을 CSV 로 저장 (replay 용 녹화, "{symbol}" 치환)
+YF_RECORD_CSV: str = os.getenv("YF_RECORD_CSV", "")
+
 
 # === 신호/신뢰도 관련 설정 ==============================================
 
@@ -73,6 +143,82 @@ BASE_CONFIDENCE_MIN: float = 0.55
 BASE_CONFIDENCE_MAX: float = 0.98
 
 
+# === 모델 성적표 (동적 가중치 / pruning) ===============================
+
+SCOREBOARD_ENABLED: bool = os.getenv("SCOREBOARD_ENABLED", "true").lower() == "true"
+# 몇 tick 뒤 가격으로 방향 적중을 채점할지
+SCOREBOARD_HORIZON_TICKS: int = int(os.getenv("SCOREBOARD_HORIZON_TICKS", "30"))
+# 적중률 지수 감쇠 반감기 (채점 횟수)
+SCOREBOARD_HALF_LIFE: float = float(os.getenv("SCOREBOARD_HALF_LIFE", "300"))
+# pruning 판단에 필요한 최소 (감쇠된) 관측 수
+SCOREBOARD_MIN_OBS: float = float(os.getenv("SCOREBOARD_MIN_OBS", "100"))
+# weight(=2×적중률) 가 이 값보다 낮으면 추론에서 제외 (0.9 → 적중률 45% 미만)
+SCOREBOARD_PRUNE_BELOW: float = float(os.getenv("SCOREBOARD_PRUNE_BELOW", "0.9"))
+SCOREBOARD_MIN_ACTIVE: int = int(os.getenv("SCOREBOARD_MIN_ACTIVE", "5"))
+# 제외된 모델도 N tick 마다 다시 실행해 채점
+SCOREBOARD_REPROBE_EVERY: int = int(os.getenv("SCOREBOARD_REPROBE_EVERY", "60"))
+
+
+# === 모델 레지스트리 설정 ===============================================
+
+# 모델 로딩 스레드 수 (가중치 파일을 병렬로 읽고 빌드)
+REGISTRY_LOAD_WORKERS: int = int(os.getenv("REGISTRY_LOAD_WORKERS", "4"))
+# 가중치/아티팩트 변경 감시 주기(초). 바뀌면 백그라운드에서 다시 로드 후 교체 (0 이면 감시 안 함)
+MODEL_WATCH_INTERVAL_SEC: float = float(os.getenv("MODEL_WATCH_INTERVAL_SEC", "5.0"))
+
+
+# === 추론 실행기 설정 ===================================================
+
+# thread: 전용 스레드 풀 / process: 별도 프로세스 (워커마다 모델 로드)
+INFERENCE_EXECUTOR_MODE: str = os.getenv("INFERENCE_EXECUTOR_MODE", "thread").lower()
+INFERENCE_WORKERS: int = int(os.getenv("INFERENCE_WORKERS", "1"))
+# 대기 가능한 tick 수. 가득 차면 가장 오래된 tick 을 버린다.
+INFERENCE_QUEUE_SIZE: int = int(os.getenv("INFERENCE_QUEUE_SIZE", "1"))
+# 이 시간(초) 이상 대기한 tick 은 추론하지 않고 버린다.
+INFERENCE_MAX_AGE_SEC: float = float(os.getenv("INFERENCE_MAX_AGE_SEC", "2.0"))
+
+# 증분(streaming) 추론: LSTM/GRU/attn_lstm_cnn 을 심볼별 상태로 새 step 만 계산 (근사, 기본 off)
+STREAMING_INFERENCE: bool = os.getenv("STREAMING_INFERENCE", "false").lower() == "true"
+# tcn_reg 도 지원하지만 full window 대비 오차가 출력 변동폭보다 커서 기본 제외 (streaming_inference 참고)
+STREAMING_MODELS: tuple = tuple(
+    m.strip()
+    for m in os.getenv(
+        "STREAMING_MODELS", "lstm_attention_reg,gru_attention_reg,attn_lstm_cnn_reg"
+    ).split(",")
+    if m.strip()
+)
+# 증분 step 이 이만큼 쌓이면 window 전체로 상태 재계산 (drift 상한, 0 이면 재계산 안 함)
+STREAMING_RESYNC_EVERY: int = int(os.getenv("STREAMING_RESYNC_EVERY", "60"))
+# 한 번에 이보다 많은 새 step 이 들어오면 증분 대신 재계산
+STREAMING_MAX_STEPS: int = int(os.getenv("STREAMING_MAX_STEPS", "10"))
+
+
+# === 신호 저장소 설정 ===================================================
+
+# append-only SQLite (WAL) 신호 이력. 꺼두면 메모리 버퍼(최근 500개)만 사용.
+SIGNAL_DB_ENABLED: bool = os.getenv("SIGNAL_DB_ENABLED", "true").lower() == "true"
+SIGNAL_DB_PATH = Path(os.getenv("SIGNAL_DB_PATH", str(BASE_DIR / "data" / "signals.db")))
+# /signals 한 번에 돌려주는 최대 행 수 (limit<=0 "전체" 요청 포함).
+# 기본값은 1초 신호 기준 한 심볼의 정규장 하루 (6.5h × 3600 = 23400) 보다 조금 크게.
+SIGNALS_MAX_LIMIT: int = int(os.getenv("SIGNALS_MAX_LIMIT", "25000"))
+
+
+# === WebSocket broadcast 설정 ===========================================
+
+# 클라이언트별 대기 frame 수. 넘치면 가장 오래된 frame 을 버린다.
+WS_CLIENT_QUEUE_SIZE: int = int(os.getenv("WS_CLIENT_QUEUE_SIZE", "8"))
+# 한 frame 전송이 이 시간(초)을 넘기면 연결을 끊는다.
+WS_SEND_TIMEOUT_SEC: float = float(os.getenv("WS_SEND_TIMEOUT_SEC", "5.0"))
+
+
+# === 지연 측정 / 로그 설정 =============================================
+
+# fused 추론 N 번에 1번 모델별 추론 시간을 따로 측정 (0 이면 끔)
+METRICS_MODEL_PROFILE_EVERY: int = int(os.getenv("METRICS_MODEL_PROFILE_EVERY", "60"))
+# 같은 로그 이벤트 최소 출력 간격(초)
+LOG_RATE_LIMIT_SEC: float = float(os.getenv("LOG_RATE_LIMIT_SEC", "10.0"))
+
+
 # === 기타 ===============================================================
 
 def ensure_artifacts_exist() -> None:
@@ -102,20 +248,21 @@ def ensure_artifacts_exist() -> None:
 
 KST = ZoneInfo("Asia/Seoul")
 
+# 달력 표(market_calendar.KRX_HOLIDAYS)에 없는 휴장일 추가 (YYYY-MM-DD 쉼표 구분, 임시공휴일 등)
+MARKET_HOLIDAYS = frozenset(
+    date.fromisoformat(d.strip())
+    for d in os.getenv("MARKET_HOLIDAYS", "").split(",")
+    if d.strip()
+)
+# 장이 닫혀 있을 때 다음 개장까지 잠드는 최대 시간(초) — 이 간격으로 달력/시계를 다시 확인
+MARKET_CLOSED_MAX_SLEEP_SEC: float = float(os.getenv("MARKET_CLOSED_MAX_SLEEP_SEC", "3600"))
+
+
 def is_kospi_open(dt: datetime | None = None) -> bool:
-    """KOSPI 정규장: 평일 09:00 ~ 15:30"""
-    if dt is None:
-        dt = datetime.now(KST)
-    else:
-        dt = dt.astimezone(KST)
-
-    # 주말
-    if dt.weekday() >= 5:
-        return False
-
-    open_t = time(9, 0)
-    close_t = time(15, 30)
-    return open_t <= dt.time() <= close_t
+    """KOSPI 정규장 여부 (휴장일 / 특수 운영시간은 market_calendar 참고)"""
+    from .market_calendar import market_calendar
+
+    return market_calendar.is_open(dt)
 
 
 def get_market_status(dt: datetime | None = None) -> str:
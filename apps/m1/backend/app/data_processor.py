@@ -8,9 +8,8 @@ SIGMA A 프로젝트 - 실시간 데이터 전처리 모듈
 
 from __future__ import annotations
 
+import math
 import os
-from collections import deque
-from typing import Deque
 
 import numpy as np
 import pandas as pd
@@ -66,53 +65,244 @@ def make_features(df: pd.DataFrame) -> pd.DataFrame:
 
 
 # ------------------------------------------------------------
-# 실시간 데이터 누적 & 전처리기
+# 스트리밍 피처 엔진 (tick 당 O(1))
 # ------------------------------------------------------------
-class LiveDataProcessor:
+FEATURE_COLUMNS = [
+    "close", "open", "high", "low", "volume",
+    "change", "volatility", "return_5", "return_10",
+    "ma_5", "ma_10", "ma_20", "std_5", "std_10",
+    "rsi_14", "vix_scaled",
+]
+_COL = {name: i for i, name in enumerate(FEATURE_COLUMNS)}
+
+_RSI_WINDOW = 14
+_RAW_HISTORY = 21          # pct_change(10), ma_20 제거값, RSI 제거 delta 에 필요한 close 개수
+_RESYNC_EVERY = 1024       # 누적 부동소수 오차 방지를 위한 주기적 재계산
+
+
+class _RollingMoments:
     """
-    실시간 가격 시계열을 받아서 (1, SEQ_LEN, 16) 형태의 모델 입력 생성
+    길이 n 고정 window 의 평균 / 분산 (sliding Welford).
     """
 
-    def __init__(self):
-        # (필요하면 나중에 활용할 수 있는 buffer, 지금은 df가 메인)
-        self.buffer: Deque[float] = deque(maxlen=SEQ_LEN)
-        self.df = pd.DataFrame(columns=["open", "high", "low", "close", "volume"])
+    __slots__ = ("n", "count", "mean", "m2")
 
-    def update(self, price: float) -> np.ndarray:
+    def __init__(self, n: int):
+        self.n = n
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def push(self, x: float, old: float | None) -> None:
+        # old: window 에서 빠지는 값 (window 가 아직 덜 찼으면 None)
+        if old is None:
+            self.count += 1
+            d = x - self.mean
+            self.mean += d / self.count
+            self.m2 += d * (x - self.mean)
+        else:
+            prev_mean = self.mean
+            self.mean += (x - old) / self.n
+            self.m2 += (x - old) * (x - self.mean + old - prev_mean)
+
+    def reset(self, values: np.ndarray) -> None:
+        self.count = len(values)
+        self.mean = float(values.mean())
+        self.m2 = float(((values - self.mean) ** 2).sum())
+
+    def std(self) -> float:
+        return math.sqrt(max(self.m2, 0.0) / (self.n - 1))
+
+
+def _pct(cur: float, prev: float) -> float:
+    # pandas pct_change(...).fillna(0) 과 동일 (0/0 → 0, x/0 → inf)
+    if prev == 0.0:
+        return 0.0 if cur == 0.0 else math.copysign(math.inf, cur)
+    return cur / prev - 1.0
+
+
+class StreamingFeatureEngine:
+    """
+    make_features(df.tail(seq_len)) 와 동일한 16개 feature window 를
+    tick 마다 O(1) 로 갱신하는 엔진.
+
+    - 이동평균/표준편차: sliding Welford (_RollingMoments)
+    - RSI 14: 최근 14개 delta 의 상승/하락 합 (make_features 와 같은 단순평균 RSI)
+    - close 원시값은 고정 크기 ring buffer 에만 유지
+    - feature 는 (2 * seq_len, 16) 버퍼에 두 번씩 기록 → window 는 복사 없는 slice view
+    - window 앞부분(rolling 워밍업 구간)은 tail 기준 make_features 와 같도록 매번 보정
+    """
+
+    def __init__(self, seq_len: int = SEQ_LEN):
+        if seq_len < 20:
+            raise ValueError(f"seq_len 은 20 이상이어야 합니다: {seq_len}")
+
+        self.seq_len = seq_len
+        self.count = 0
+
+        self._close = np.zeros(_RAW_HISTORY, dtype=float)
+        self._buf = np.zeros((2 * seq_len, len(FEATURE_COLUMNS)), dtype=float)
+
+        self._moments = {n: _RollingMoments(n) for n in (5, 10, 20)}
+        self._gain = 0.0
+        self._loss = 0.0
+        self._n_gain = 0   # window 안의 양수 delta 개수 (0 이면 합을 정확히 0 으로 취급)
+        self._n_loss = 0
+        self._same_run = 0  # 같은 close 가 연속된 길이
+
+    def _close_at(self, lag: int) -> float:
+        return float(self._close[(self.count - lag) % _RAW_HISTORY])
+
+    def push(self, open_: float, high: float, low: float, close: float, volume: float) -> None:
+        """
+        bar 1개 반영. (count 는 push 전 기준 = 이번 bar 의 index)
+        """
+        t = self.count
+        close = float(close)
+        prev = self._close_at(1) if t >= 1 else None
+
+        # --- 이동 moments ---
+        for n, mom in self._moments.items():
+            mom.push(close, self._close_at(n) if t >= n else None)
+
+        # --- RSI 상승/하락 합 ---
+        if prev is not None:
+            delta = close - prev
+            if delta > 0:
+                self._gain += delta
+                self._n_gain += 1
+            elif delta < 0:
+                self._loss -= delta
+                self._n_loss += 1
+        if t > _RSI_WINDOW:
+            old = self._close_at(_RSI_WINDOW) - self._close_at(_RSI_WINDOW + 1)
+            if old > 0:
+                self._gain -= old
+                self._n_gain -= 1
+            elif old < 0:
+                self._loss += old
+                self._n_loss -= 1
+
+        self._same_run = self._same_run + 1 if prev is not None and close == prev else 1
+
+        self._close[t % _RAW_HISTORY] = close
+
+        # --- feature row ---
+        row = np.empty(len(FEATURE_COLUMNS), dtype=float)
+        row[_COL["close"]] = close
+        row[_COL["open"]] = open_
+        row[_COL["high"]] = high
+        row[_COL["low"]] = low
+        row[_COL["volume"]] = volume
+
+        row[_COL["change"]] = _pct(close, prev) if prev is not None else 0.0
+        row[_COL["volatility"]] = high - low
+        row[_COL["return_5"]] = _pct(close, self._close_at(5)) if t >= 5 else 0.0
+        row[_COL["return_10"]] = _pct(close, self._close_at(10)) if t >= 10 else 0.0
+
+        for n in (5, 10, 20):
+            mom = self._moments[n]
+            flat = self._same_run >= n
+            row[_COL[f"ma_{n}"]] = close if flat else mom.mean
+            if n != 20:
+                row[_COL[f"std_{n}"]] = 0.0 if flat else mom.std()
+
+        if t >= _RSI_WINDOW:
+            gain = self._gain if self._n_gain else 0.0
+            loss = self._loss if self._n_loss else 0.0
+            rs = gain / loss if gain > 0 and loss > 0 else 0.0
+            row[_COL["rsi_14"]] = 100 - 100 / (1 + rs)
+        else:
+            row[_COL["rsi_14"]] = 0.0
+
+        row[_COL["vix_scaled"]] = 0.0
+
+        slot = t % self.seq_len
+        self._buf[slot] = row
+        self._buf[slot + self.seq_len] = row
+
+        self.count += 1
+        if self.count % _RESYNC_EVERY == 0:
+            self._resync()
+
+    def _resync(self) -> None:
+        closes = np.array([self._close_at(k) for k in range(_RAW_HISTORY, 0, -1)])
+        for n, mom in self._moments.items():
+            mom.reset(closes[-n:])
+
+        deltas = np.diff(closes)[-_RSI_WINDOW:]
+        self._gain = float(deltas[deltas > 0].sum())
+        self._loss = float(-deltas[deltas < 0].sum())
+        self._n_gain = int((deltas > 0).sum())
+        self._n_loss = int((deltas < 0).sum())
+
+    def window(self) -> np.ndarray:
         """
-        실시간 가격 1개 받아서 → 피처 16개 생성 → window → (1, SEQ_LEN, 16) 반환
+        최근 seq_len 개 bar 의 feature → (1, seq_len, 16) view.
+        다음 push 때 내용이 바뀌므로 보관하려면 호출 측에서 복사해야 한다.
         """
+        if self.count < self.seq_len:
+            raise RuntimeError(f"데이터 부족: {self.count} / {self.seq_len}")
 
-        new_row = {
-            "open": price,
-            "high": price,
-            "low": price,
-            "close": price,
-            "volume": 0.0,   # 실시간에선 volume 사용 어려움 → 0 처리
-        }
-        self.df.loc[len(self.df)] = new_row
+        start = self.count % self.seq_len
+        w = self._buf[start:start + self.seq_len]
 
-        # 최소 window 확보
-        if len(self.df) < SEQ_LEN:
-            raise RuntimeError(f"데이터 부족: {len(self.df)} / {SEQ_LEN}")
+        # make_features 를 tail 에 적용했을 때의 워밍업 구간과 동일하게 보정
+        w[0, _COL["change"]] = 0.0
+        w[:5, _COL["return_5"]] = 0.0
+        w[:10, _COL["return_10"]] = 0.0
+        w[:4, _COL["ma_5"]] = w[4, _COL["ma_5"]]
+        w[:9, _COL["ma_10"]] = w[9, _COL["ma_10"]]
+        w[:19, _COL["ma_20"]] = w[19, _COL["ma_20"]]
+        w[:4, _COL["std_5"]] = 0.0
+        w[:9, _COL["std_10"]] = 0.0
+        w[:_RSI_WINDOW, _COL["rsi_14"]] = 0.0
 
-        # 최근 SEQ_LEN 구간만 유지
-        df_tail = self.df.tail(SEQ_LEN)
+        return w[np.newaxis]
 
-        # feature 16개 생성
-        feat_df = make_features(df_tail)
 
-        # 결측치 보완
-        feat_df = feat_df.ffill().bfill()
+# ------------------------------------------------------------
+# 실시간 데이터 누적 & 전처리기
+# ------------------------------------------------------------
+class LiveDataProcessor:
+    """
+    실시간 가격 시계열을 받아서 (1, SEQ_LEN, 16) 형태의 모델 입력 생성
+    """
 
-        # ndarray 변환
-        X = feat_df.values.astype(float)
+    def __init__(self):
+        self.engine = StreamingFeatureEngine(SEQ_LEN)
 
+    def update(self, price: float) -> np.ndarray:
+        """
+        실시간 가격 1개 받아서 → 피처 16개 갱신 → (1, SEQ_LEN, 16) window 반환
+        """
+        # 실시간에선 volume 사용 어려움 → 0 처리
+        self.engine.push(price, price, price, price, 0.0)
+
+        # 최소 window 확보 전이면 RuntimeError
         # 🔥 scaler 전혀 사용 안 함 (원시 값 그대로)
-        X_scaled = X
+        return self.engine.window()
+
+    def update_bar(
+        self, open_: float, high: float, low: float, close: float, volume: float
+    ) -> np.ndarray:
+        """
+        실제 OHLCV bar 1개 (KIS WebSocket 체결 집계) → (1, SEQ_LEN, 16) window 반환
+        """
+        self.engine.push(open_, high, low, close, volume)
+        return self.engine.window()
+
+    def update_bars(self, bars) -> np.ndarray:
+        """
+        (open, high, low, close, volume) bar 여러 개를 시간 순서대로 반영 → window 반환
+        """
+        for bar in bars:
+            self.engine.push(*bar)
+        return self.engine.window()
 
-        # (SEQ_LEN, 16) → (1, SEQ_LEN, 16)
-        return np.expand_dims(X_scaled, axis=0)
+    def current(self) -> np.ndarray:
+        """새 데이터 없이 현재 window 반환"""
+        return self.engine.window()
 
 
 # ------------------------------------------------------------
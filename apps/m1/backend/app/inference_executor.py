@@ -0,0 +1,180 @@
+# inference_executor.py
+"""
+SIGMA A 프로젝트 - 추론 전용 실행기
+
+CPU 를 많이 쓰는 TensorFlow 추론을 asyncio event loop 밖에서 실행한다.
+(event loop 는 시세 조회 / 저장 / broadcast 같은 orchestration 만 담당)
+
+- mode="thread"  : 전용 ThreadPoolExecutor (TF 연산은 GIL 을 놓으므로 기본값)
+- mode="process" : ProcessPoolExecutor (워커 프로세스마다 모델을 따로 로드)
+- 대기열은 최대 queue_size 개. 가득 찬 상태에서 새 tick 이 들어오면
+  가장 오래된 tick 을 버린다 (drop stale tick)
+- 대기 시간이 max_age_sec 을 넘긴 tick 도 실행하지 않고 버린다
+- 버려진 tick 의 submit() 은 StaleTickDropped 를 발생시킨다
+"""
+
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+from .config import (
+    INFERENCE_EXECUTOR_MODE,
+    INFERENCE_WORKERS,
+    INFERENCE_QUEUE_SIZE,
+    INFERENCE_MAX_AGE_SEC,
+)
+
+
+class StaleTickDropped(Exception):
+    """대기열에서 밀려나거나 너무 오래 기다린 tick"""
+
+
+@dataclass
+class _Job:
+    fn: Callable[..., Any]
+    args: tuple
+    future: asyncio.Future
+    enqueued_at: float
+
+
+class InferenceExecutor:
+    def __init__(
+        self,
+        mode: str = INFERENCE_EXECUTOR_MODE,
+        max_workers: int = INFERENCE_WORKERS,
+        queue_size: int = INFERENCE_QUEUE_SIZE,
+        max_age_sec: float = INFERENCE_MAX_AGE_SEC,
+    ):
+        if mode not in ("thread", "process"):
+            raise ValueError(f"알 수 없는 INFERENCE_EXECUTOR_MODE: {mode}")
+
+        self.mode = mode
+        self.max_workers = max(1, int(max_workers))
+        self.queue_size = max(1, int(queue_size))
+        self.max_age_sec = float(max_age_sec)
+
+        self._pool: Optional[Executor] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+
+        self.submitted = 0
+        self.completed = 0
+        self.dropped = 0
+
+    # ------------------------------------------------------------
+    # lifecycle
+    # ------------------------------------------------------------
+
+    @property
+    def started(self) -> bool:
+        return self._pool is not None
+
+    def start(self) -> None:
+        if self.started:
+            return
+
+        if self.mode == "process":
+            # TF 가 import 된 부모를 fork 하지 않도록 spawn 사용
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        else:
+            self._pool = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="inference"
+            )
+
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._workers = [
+            asyncio.create_task(self._worker()) for _ in range(self.max_workers)
+        ]
+        print(
+            f"[inference_executor] 시작 (mode={self.mode}, workers={self.max_workers}, "
+            f"queue={self.queue_size}, max_age={self.max_age_sec}s)"
+        )
+
+    async def shutdown(self) -> None:
+        for task in self._workers:
+            task.cancel()
+        self._workers = []
+
+        if self._queue is not None:
+            while not self._queue.empty():
+                self._drop(self._queue.get_nowait(), "executor_shutdown")
+            self._queue = None
+
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    # ------------------------------------------------------------
+    # submit / worker
+    # ------------------------------------------------------------
+
+    async def submit(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """
+        fn(*args) 를 실행기에서 실행하고 결과를 반환.
+        process 모드에서는 fn / args / 결과가 pickle 가능해야 한다.
+        """
+        if not self.started:
+            self.start()
+
+        loop = asyncio.get_running_loop()
+        job = _Job(fn, args, loop.create_future(), loop.time())
+
+        # backpressure: 대기열이 가득 차면 가장 오래된 tick 을 버림
+        if self._queue.full():
+            self._drop(self._queue.get_nowait(), "queue_full")
+
+        self._queue.put_nowait(job)
+        self.submitted += 1
+        return await job.future
+
+    def _drop(self, job: _Job, reason: str) -> None:
+        self.dropped += 1
+        if not job.future.done():
+            job.future.set_exception(StaleTickDropped(reason))
+
+    async def _worker(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            job = await self._queue.get()
+
+            if job.future.done():
+                continue
+
+            if loop.time() - job.enqueued_at > self.max_age_sec:
+                self._drop(job, "stale")
+                continue
+
+            try:
+                result = await loop.run_in_executor(self._pool, job.fn, *job.args)
+            except asyncio.CancelledError:
+                self._drop(job, "executor_shutdown")
+                raise
+            except Exception as e:
+                if not job.future.done():
+                    job.future.set_exception(e)
+            else:
+                self.completed += 1
+                if not job.future.done():
+                    job.future.set_result(result)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "workers": self.max_workers,
+            "queue_size": self.queue_size,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "dropped": self.dropped,
+        }
+
+
+# 서버 전체에서 공유하는 실행기
+inference_executor = InferenceExecutor()
@@ -9,9 +9,13 @@ import asyncio
 import aiohttp
 import json
 import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone, timedelta
-from typing import Optional
+from pathlib import Path
+from typing import Dict, List, Optional
 
+import pandas as pd
 import yfinance as yf
 
 from .config import (
@@ -20,13 +24,33 @@ from .config import (
     KIS_APP_SECRET,
     KIS_ACCOUNT_NO,
     KIS_BASE_URL,
+    KIS_SYMBOL_CODE,
+    KIS_POOL_LIMIT,
+    KIS_KEEPALIVE_SEC,
+    KIS_TIMEOUT_SEC,
+    KIS_RATE_LIMIT_PER_SEC,
+    KIS_TOKEN_REFRESH_MARGIN_SEC,
+    KIS_TOKEN_CACHE_PATH,
     YFINANCE_SYMBOL,
+    INTERNAL_SYMBOL,
+    kis_code_for,
+    yfinance_ticker_for,
+    YF_REFRESH_SEC,
+    YF_BAR_CACHE_SIZE,
+    YF_FIRST_FETCH_TIMEOUT_SEC,
+    YF_REPLAY_CSV,
+    YF_REPLAY_INTERVAL_SEC,
+    YF_RECORD_CSV,
 )
+from .metrics import get_logger
 
 # ======================================================================
 # 0. 공통
 # ======================================================================
 
+yf_log = get_logger("YFinanceStreamer")
+kis_log = get_logger("KISRestClient")
+
 KST = timezone(timedelta(hours=9))
 
 def now_kst_str() -> str:
@@ -37,42 +61,241 @@ def now_kst_str() -> str:
 # 1. 데모 모드(yfinance)
 # ======================================================================
 
+# yfinance 다운로드(blocking HTTP)는 이 스레드들에서만 실행
+_yf_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="yfinance")
+
+
+def _load_replay_csv(path: Path) -> List[float]:
+    """녹화된 bar CSV → 종가 리스트 (close / Close 컬럼)"""
+    df = pd.read_csv(path)
+    cols = {c.lower(): c for c in df.columns}
+    if "close" not in cols:
+        raise ValueError(f"close 컬럼 없음: {path}")
+    return [float(v) for v in df[cols["close"]].dropna()]
+
+
 class YFinanceStreamer:
-    def __init__(self, symbol: str = YFINANCE_SYMBOL):
+    """
+    데모 모드 시세.
+
+    - 백그라운드 task 가 YF_REFRESH_SEC 마다 마지막으로 본 bar 이후만 다운로드 (executor)
+    - get_price() 는 메모리 bar cache 의 마지막 종가를 바로 반환 (event loop 를 막지 않음)
+    - YF_REPLAY_CSV 가 있으면 네트워크 없이 CSV 종가를 YF_REPLAY_INTERVAL_SEC 마다 1개씩 재생
+    - YF_RECORD_CSV 가 있으면 받은 bar 를 CSV 로 저장 (나중에 replay 용)
+    """
+
+    def __init__(self, symbol: str = YFINANCE_SYMBOL, internal_symbol: str = INTERNAL_SYMBOL):
         self.symbol = symbol
-        self._cache_price = None
-        self._last_ts = 0
+        self.internal_symbol = internal_symbol
+        self._bars: Optional[pd.DataFrame] = None
+        self._cache_price: Optional[float] = None
+        self._last_ts = 0.0
+        self._task: Optional[asyncio.Task] = None
+        self._ready: Optional[asyncio.Event] = None
+
+        self._replay: Optional[List[float]] = None
+        self._replay_pos = 0
+        if YF_REPLAY_CSV:
+            path = Path(YF_REPLAY_CSV.format(symbol=internal_symbol))
+            try:
+                self._replay = _load_replay_csv(path)
+                print(f"[YFinanceStreamer] replay 모드: {path} ({len(self._replay)} bars)")
+            except Exception as e:
+                print(f"[YFinanceStreamer] ⚠️ replay CSV 로드 실패 → yfinance 사용: {e}")
+
+    # ------------------------------------------------------------
+    # 다운로드 (executor 스레드)
+    # ------------------------------------------------------------
+
+    def _fetch(self) -> int:
+        """마지막 bar 이후만 받아서 cache 에 병합. 반환: 받은 bar 수"""
+        ticker = yf.Ticker(self.symbol)
+        if self._bars is None or self._bars.empty:
+            df = ticker.history(period="1d", interval="1m")
+        else:
+            # 마지막 bar 는 아직 진행 중일 수 있어 그 bar 부터 다시 받음
+            df = ticker.history(start=self._bars.index[-1], interval="1m")
 
-    async def get_price(self) -> float:
-        now = time.time()
-        if self._cache_price is not None and now - self._last_ts < 1:
-            return self._cache_price
+        if df.empty:
+            return 0
+
+        if self._bars is None or self._bars.empty:
+            bars = df
+        else:
+            bars = pd.concat([self._bars[self._bars.index < df.index[0]], df])
+        self._bars = bars.tail(YF_BAR_CACHE_SIZE)
 
+        if YF_RECORD_CSV:
+            path = Path(YF_RECORD_CSV.format(symbol=self.internal_symbol))
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._bars.to_csv(path)
+        return len(df)
+
+    async def _refresh_once(self) -> None:
+        loop = asyncio.get_running_loop()
         try:
-            df = yf.Ticker(self.symbol).history(period="1d", interval="1m")
-            if df.empty:
-                raise ValueError("yfinance empty")
-            price = float(df["Close"].iloc[-1])
-            self._cache_price = price
-            self._last_ts = now
-            return price
-        except:
-            return self._cache_price if self._cache_price else 0.0
+            await loop.run_in_executor(_yf_pool, self._fetch)
+            if self._bars is not None and not self._bars.empty:
+                self._cache_price = float(self._bars["Close"].iloc[-1])
+                self._last_ts = time.time()
+        except Exception as e:
+            yf_log.warning("갱신 실패", symbol=self.symbol, error=e)
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            if self._replay:
+                self._cache_price = self._replay[self._replay_pos % len(self._replay)]
+                self._replay_pos += 1
+                self._last_ts = time.time()
+                self._ready.set()
+                await asyncio.sleep(YF_REPLAY_INTERVAL_SEC)
+            else:
+                await self._refresh_once()
+                self._ready.set()
+                await asyncio.sleep(YF_REFRESH_SEC)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._ready = asyncio.Event()
+            self._task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    # ------------------------------------------------------------
+    # 조회
+    # ------------------------------------------------------------
+
+    async def get_price(self) -> float:
+        self.start()
+        if self._cache_price is None:
+            # 첫 다운로드만 기다림 (event loop 는 다른 작업 계속 처리)
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout=YF_FIRST_FETCH_TIMEOUT_SEC)
+            except asyncio.TimeoutError:
+                pass
+        return self._cache_price if self._cache_price else 0.0
 
 
-_yf = YFinanceStreamer()
+_yf_streamers: Dict[str, YFinanceStreamer] = {}
+
+
+def _yf_for(symbol: str) -> YFinanceStreamer:
+    if symbol not in _yf_streamers:
+        _yf_streamers[symbol] = YFinanceStreamer(yfinance_ticker_for(symbol), symbol)
+    return _yf_streamers[symbol]
 
 
 # ======================================================================
 # 2. 실제 KIS REST
 # ======================================================================
 
+class _RateLimiter:
+    """최근 1초 동안 호출 수 제한 (sliding window). KIS 초당 거래건수 제한 대응"""
+
+    def __init__(self, rate_per_sec: float):
+        self.rate = max(1, int(rate_per_sec))
+        self._calls: deque = deque()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                while self._calls and now - self._calls[0] >= 1.0:
+                    self._calls.popleft()
+                if len(self._calls) < self.rate:
+                    self._calls.append(now)
+                    return
+                await asyncio.sleep(1.0 - (now - self._calls[0]) + 0.001)
+
+
 class KISRestClient:
+    """
+    - aiohttp 세션은 첫 요청 시 생성 (import 시점에는 event loop 가 없을 수 있음)
+    - connection pool / keep-alive / DNS 캐시
+    - access_token 은 파일에 캐시하고 만료 KIS_TOKEN_REFRESH_MARGIN_SEC 전에 미리 갱신
+    - 초당 호출 수 제한 + 여러 종목 동시 조회 (get_prices)
+    """
+
     def __init__(self):
         self.app_key = KIS_APP_KEY
         self.app_secret = KIS_APP_SECRET
         self.access_token: Optional[str] = None
-        self.session = aiohttp.ClientSession()
+        self.token_expires_at: float = 0.0
+        self.session: Optional[aiohttp.ClientSession] = None
+        self._token_lock: Optional[asyncio.Lock] = None
+        self._limiter: Optional[_RateLimiter] = None
+        self._load_cached_token()
+
+    # ------------------------------------------------------------
+    # session
+    # ------------------------------------------------------------
+
+    def _session(self) -> aiohttp.ClientSession:
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=KIS_POOL_LIMIT,
+                limit_per_host=KIS_POOL_LIMIT,
+                keepalive_timeout=KIS_KEEPALIVE_SEC,
+                use_dns_cache=True,
+                ttl_dns_cache=300,
+            )
+            self.session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=KIS_TIMEOUT_SEC),
+            )
+            self._token_lock = asyncio.Lock()
+            self._limiter = _RateLimiter(KIS_RATE_LIMIT_PER_SEC)
+        return self.session
+
+    async def close(self):
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+        self.session = None
+
+    # ------------------------------------------------------------
+    # token
+    # ------------------------------------------------------------
+
+    def _load_cached_token(self):
+        try:
+            data = json.loads(KIS_TOKEN_CACHE_PATH.read_text(encoding="utf-8"))
+        except Exception:
+            return
+        if data.get("app_key") != self.app_key or data.get("base_url") != KIS_BASE_URL:
+            return
+        if float(data.get("expires_at", 0)) > time.time():
+            self.access_token = data["access_token"]
+            self.token_expires_at = float(data["expires_at"])
+            print("[KISRestClient] 캐시된 access_token 사용")
+
+    def _save_cached_token(self):
+        try:
+            KIS_TOKEN_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+            KIS_TOKEN_CACHE_PATH.write_text(
+                json.dumps({
+                    "app_key": self.app_key,
+                    "base_url": KIS_BASE_URL,
+                    "access_token": self.access_token,
+                    "expires_at": self.token_expires_at,
+                }),
+                encoding="utf-8",
+            )
+        except Exception as e:
+            print(f"[KISRestClient] ⚠️ 토큰 캐시 저장 실패: {e}")
+
+    def _token_fresh(self) -> bool:
+        return (
+            self.access_token is not None
+            and time.time() < self.token_expires_at - KIS_TOKEN_REFRESH_MARGIN_SEC
+        )
 
     async def request_token(self):
         url = f"{KIS_BASE_URL}/oauth2/tokenP"
@@ -81,40 +304,88 @@ class KISRestClient:
             "appkey": self.app_key,
             "appsecret": self.app_secret,
         }
-        async with self.session.post(url, json=payload) as resp:
-            data = await resp.json()
+        async with self._session().post(url, json=payload) as resp:
+            data = await resp.json(content_type=None)
             if "access_token" in data:
                 self.access_token = data["access_token"]
+                self.token_expires_at = time.time() + float(data.get("expires_in", 86400))
+                self._save_cached_token()
                 print("[KISRestClient] access_token 발급 완료")
             else:
                 raise RuntimeError(f"토큰 실패: {data}")
 
+    async def _ensure_token(self):
+        if self._token_fresh():
+            return
+        self._session()
+        async with self._token_lock:
+            # 다른 요청이 기다리는 동안 이미 갱신했을 수 있음
+            if self._token_fresh():
+                return
+            try:
+                await self.request_token()
+            except Exception as e:
+                # 미리 갱신하다 실패했고 기존 토큰이 아직 유효하면 계속 사용
+                if self.access_token is not None and time.time() < self.token_expires_at:
+                    print(f"[KISRestClient] ⚠️ 토큰 사전 갱신 실패 (기존 토큰 사용): {e}")
+                    return
+                raise
+
     async def _headers(self):
-        if not self.access_token:
-            await self.request_token()
+        await self._ensure_token()
 
         return {
             "content-type": "application/json; charset=UTF-8",
             "authorization": f"Bearer {self.access_token}",
             "appkey": self.app_key,
             "appsecret": self.app_secret,
+            "tr_id": "FHKST01010100",
         }
 
-    async def get_price(self, symbol="101600"):
+    # ------------------------------------------------------------
+    # quotations
+    # ------------------------------------------------------------
+
+    async def get_price(self, symbol=KIS_SYMBOL_CODE):
         url = f"{KIS_BASE_URL}/uapi/domestic-stock/v1/quotations/price"
         params = {
             "FID_COND_MRKT_DIV_CODE": "J",
             "FID_INPUT_ISCD": symbol,
         }
-        headers = await self._headers()
 
-        async with self.session.get(url, headers=headers, params=params) as resp:
-            data = await resp.json()
+        session = self._session()
+        for attempt in range(2):
+            headers = await self._headers()
+            await self._limiter.acquire()
+
+            async with session.get(url, headers=headers, params=params) as resp:
+                data = await resp.json(content_type=None)
+
+            msg_cd = data.get("msg_cd")
+            if attempt == 0 and (resp.status == 401 or msg_cd == "EGW00123"):
+                # 토큰 만료 → 재발급 후 1회 재시도
+                self.token_expires_at = 0.0
+                continue
+            if attempt == 0 and msg_cd == "EGW00201":
+                # 초당 거래건수 초과 → 잠시 쉬고 1회 재시도
+                await asyncio.sleep(1.0 / self._limiter.rate)
+                continue
+
             try:
                 return float(data["output"]["stck_prpr"])
             except:
-                print("[KISRestClient] get_price 실패:", data)
+                kis_log.warning("get_price 실패", symbol=symbol, msg_cd=data.get("msg_cd"), msg=data.get("msg1"))
                 return None
+        return None
+
+    async def get_prices(self, symbols: List[str]) -> List[object]:
+        """
+        여러 종목을 동시에 조회 (rate limiter 가 초당 호출 수를 맞춤).
+        반환: symbols 순서의 가격 또는 Exception
+        """
+        return await asyncio.gather(
+            *(self.get_price(sym) for sym in symbols), return_exceptions=True
+        )
 
 
 _kis = KISRestClient()
@@ -132,12 +403,30 @@ class KISApiClient:
     - USE_KIS_API = False → yfinance 데모 스트림
     """
 
-    async def get_realtime_price(self) -> float:
+    async def get_realtime_price(self, symbol: str = INTERNAL_SYMBOL) -> float:
         if USE_KIS_API:
-            price = await _kis.get_price("101600")
+            price = await _kis.get_price(kis_code_for(symbol))
             return float(price) if price else 0.0
         else:
-            return await _yf.get_price()
+            return await _yf_for(symbol).get_price()
+
+    async def get_realtime_prices(self, symbols: List[str]) -> Dict[str, object]:
+        """
+        여러 심볼 시세를 동시에 조회.
+        반환: {symbol: price 또는 조회 중 발생한 Exception}
+        """
+        if USE_KIS_API:
+            results = await _kis.get_prices([kis_code_for(sym) for sym in symbols])
+            results = [
+                r if isinstance(r, BaseException) else (float(r) if r else 0.0)
+                for r in results
+            ]
+        else:
+            results = await asyncio.gather(
+                *(self.get_realtime_price(sym) for sym in symbols),
+                return_exceptions=True,
+            )
+        return dict(zip(symbols, results))
 
 
 # ======================================================================
@@ -145,7 +434,9 @@ class KISApiClient:
 # ======================================================================
 
 async def close_clients():
+    for streamer in _yf_streamers.values():
+        await streamer.stop()
     try:
-        await _kis.session.close()
+        await _kis.close()
     except:
         pass
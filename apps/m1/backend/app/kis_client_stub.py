@@ -1,9 +1,203 @@
-# KIS API 실제 연동을 위한 모듈 자리 (샘플 스텁)
-# 실제로는 Secrets Manager에서 키를 불러오고 REST/WS로 시세를 가져와야 함.
-
-def fetch_latest_price():
-    # 샘플: 실제 구현에서는 한국투자증권 Open API 호출
-    return {
-        "symbol": "KOSPI200",
-        "price": 305.2
+# kis_client_stub.py
+"""
+SIGMA A 프로젝트 - 로컬 KIS REST 스텁 서버 (테스트/개발용)
+
+실제 KIS 대신 띄워 두고 KIS_BASE_URL 을 이 서버로 향하게 한다.
+
+    cd apps/m1/backend
+    python -m app.kis_client_stub --port 9999 --rate 20
+    KIS_BASE_URL=http://127.0.0.1:9999 USE_KIS_API=true uvicorn app.main:app
+    (WebSocket 체결 수집: KIS_WS_URL=ws://127.0.0.1:9999 KIS_USE_WEBSOCKET=true 추가)
+
+- POST /oauth2/tokenP                              → access_token (expires_in 설정 가능)
+- GET  /uapi/domestic-stock/v1/quotations/price    → 종목별 random-walk 현재가
+- 초당 호출 수 초과 시 KIS 와 같은 EGW00201, 만료/잘못된 토큰은 EGW00123 응답
+  (만료 응답 HTTP status 는 expired_status, 기본 500 / 게이트웨이처럼 401 도 가능)
+- POST /oauth2/Approval                             → WebSocket approval_key
+- WS   /tryitout/H0STCNT0                          → 구독한 종목의 가짜 체결 frame
+                                                     ("0|H0STCNT0|001|..." + 주기적 PINGPONG)
+- GET  /_stats                                     → 토큰 발급 / 시세 / 거절 횟수
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import secrets
+import time
+from collections import deque
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from aiohttp import WSMsgType, web
+
+KST = ZoneInfo("Asia/Seoul")
+
+
+_H0STCNT0_WIDTH = 46
+
+
+def _tick_frame(code: str, price: float, volume: int) -> str:
+    """H0STCNT0 체결 frame 1건 (사용하는 필드 외에는 0)"""
+    fields = ["0"] * _H0STCNT0_WIDTH
+    fields[0] = code
+    fields[1] = datetime.now(tz=KST).strftime("%H%M%S")
+    fields[2] = f"{price:.2f}"
+    fields[12] = str(volume)
+    return "0|H0STCNT0|001|" + "^".join(fields)
+
+
+def create_app(
+    rate_per_sec: float = 20.0,
+    token_ttl_sec: int = 86400,
+    latency_sec: float = 0.0,
+    base_price: float = 350.0,
+    ticks_per_sec: float = 5.0,
+    ping_sec: float = 10.0,
+    expired_status: int = 500,
+) -> web.Application:
+    state = {
+        "tokens": {},            # token → 만료 epoch
+        "prices": {},            # 종목코드 → 현재가
+        "calls": deque(),        # 최근 1초 시세 호출 시각
+        "token_requests": 0,
+        "quote_requests": 0,
+        "rejected": 0,
+        "ws_clients": 0,
+        "ticks_sent": 0,
+        "sockets": set(),        # 열린 WebSocket (테스트에서 서버 측 끊김 재현용)
     }
+
+    def _walk(code: str) -> float:
+        p = state["prices"].get(code, base_price)
+        p = round(max(0.01, p * (1.0 + random.gauss(0.0, 0.0005))), 2)
+        state["prices"][code] = p
+        return p
+
+    async def token(request: web.Request) -> web.Response:
+        body = await request.json()
+        if not body.get("appkey") or not body.get("appsecret"):
+            return web.json_response({"error_description": "appkey/appsecret 누락"}, status=403)
+
+        state["token_requests"] += 1
+        tok = secrets.token_hex(16)
+        state["tokens"][tok] = time.time() + token_ttl_sec
+        return web.json_response({
+            "access_token": tok,
+            "token_type": "Bearer",
+            "expires_in": token_ttl_sec,
+        })
+
+    async def price(request: web.Request) -> web.Response:
+        auth = request.headers.get("authorization", "")
+        tok = auth[len("Bearer "):] if auth.startswith("Bearer ") else ""
+        if state["tokens"].get(tok, 0) < time.time():
+            state["rejected"] += 1
+            return web.json_response(
+                {"rt_cd": "1", "msg_cd": "EGW00123", "msg1": "기간이 만료된 token 입니다."},
+                status=expired_status,
+            )
+
+        now = time.monotonic()
+        calls = state["calls"]
+        while calls and now - calls[0] > 1.0:
+            calls.popleft()
+        if len(calls) >= rate_per_sec:
+            state["rejected"] += 1
+            return web.json_response(
+                {"rt_cd": "1", "msg_cd": "EGW00201", "msg1": "초당 거래건수를 초과하였습니다."},
+                status=500,
+            )
+        calls.append(now)
+        state["quote_requests"] += 1
+
+        if latency_sec > 0:
+            await asyncio.sleep(latency_sec)
+
+        code = request.query.get("FID_INPUT_ISCD", "")
+        p = _walk(code)
+        return web.json_response({
+            "rt_cd": "0",
+            "msg_cd": "MCA00000",
+            "output": {"stck_prpr": f"{p:.2f}", "stck_shrn_iscd": code},
+        })
+
+    async def approval(request: web.Request) -> web.Response:
+        body = await request.json()
+        if not body.get("appkey") or not body.get("secretkey"):
+            return web.json_response({"error_description": "appkey/secretkey 누락"}, status=403)
+        return web.json_response({"approval_key": secrets.token_hex(16)})
+
+    async def ws_ticks(request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        state["ws_clients"] += 1
+        state["sockets"].add(ws)
+        codes: set = set()
+
+        async def push():
+            last_ping = time.monotonic()
+            while not ws.closed:
+                await asyncio.sleep(1.0 / ticks_per_sec)
+                for code in list(codes):
+                    await ws.send_str(_tick_frame(code, _walk(code), random.randint(1, 50)))
+                    state["ticks_sent"] += 1
+                if time.monotonic() - last_ping >= ping_sec:
+                    last_ping = time.monotonic()
+                    await ws.send_str(json.dumps({"header": {"tr_id": "PINGPONG"}}))
+
+        pusher = asyncio.create_task(push())
+        try:
+            async for msg in ws:
+                if msg.type != WSMsgType.TEXT:
+                    continue
+                data = json.loads(msg.data)
+                if data.get("header", {}).get("tr_id") == "PINGPONG":
+                    continue
+                inp = data.get("body", {}).get("input", {})
+                codes.add(inp.get("tr_key", ""))
+                await ws.send_str(json.dumps({
+                    "header": {"tr_id": inp.get("tr_id"), "tr_key": inp.get("tr_key")},
+                    "body": {"rt_cd": "0", "msg_cd": "OPSP0000", "msg1": "SUBSCRIBE SUCCESS"},
+                }))
+        finally:
+            pusher.cancel()
+            state["ws_clients"] -= 1
+            state["sockets"].discard(ws)
+        return ws
+
+    async def stats(request: web.Request) -> web.Response:
+        keys = ("token_requests", "quote_requests", "rejected", "ws_clients", "ticks_sent")
+        return web.json_response({k: state[k] for k in keys})
+
+    app = web.Application()
+    app["state"] = state
+    app.router.add_post("/oauth2/tokenP", token)
+    app.router.add_get("/uapi/domestic-stock/v1/quotations/price", price)
+    app.router.add_post("/oauth2/Approval", approval)
+    app.router.add_get("/tryitout/H0STCNT0", ws_ticks)
+    app.router.add_get("/_stats", stats)
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="로컬 KIS REST 스텁 서버")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9999)
+    parser.add_argument("--rate", type=float, default=20.0, help="초당 허용 시세 호출 수")
+    parser.add_argument("--token-ttl", type=int, default=86400, help="토큰 유효기간(초)")
+    parser.add_argument("--latency", type=float, default=0.0, help="시세 응답 지연(초)")
+    parser.add_argument("--ticks", type=float, default=5.0, help="종목별 초당 가짜 체결 수")
+    args = parser.parse_args()
+
+    web.run_app(
+        create_app(args.rate, args.token_ttl, args.latency, ticks_per_sec=args.ticks),
+        host=args.host,
+        port=args.port,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,402 @@
+# kis_ws_client.py
+"""
+SIGMA A 프로젝트 - KIS 실시간 체결(WebSocket) 수집기
+
+REST 1초 polling (현재가 1개) 대신 KIS WebSocket 실시간 체결가(H0STCNT0)를 구독하고
+체결 tick 을 interval 단위 OHLCV bar 로 묶어 asyncio.Queue 에 넣는다.
+signal_generator 는 tick 마다 drain() 으로 새 bar 를 꺼내 LiveDataProcessor.update_bar 에 넣는다.
+
+- 접속키: POST {KIS_BASE_URL}/oauth2/Approval → approval_key
+- 접속  : {KIS_WS_URL}/tryitout/{tr_id}, 종목별 구독 메시지 전송
+- 수신  : "0|H0STCNT0|<건수>|필드^필드^..." (체결 데이터) / JSON (구독 응답, PINGPONG)
+- tick 이 없는 구간은 직전 종가로 채운 flat bar (volume 0) 를 만들어 시간 격자를 유지
+- 장 운영시간 (market_calendar) 밖에서는 bar 를 만들지 않음: 마감 후 마지막 구간까지만 내보내고,
+  다음 개장 때 격자를 새로 시작 (전날 종가부터 밤새 flat bar 를 채우지 않음)
+- 연결이 끊기면 backoff 후 재접속
+
+테스트: python -m app.kis_client_stub 의 /tryitout/H0STCNT0 (fake WS) 사용
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import math
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import aiohttp
+
+from .config import (
+    KST,
+    KIS_APP_KEY,
+    KIS_APP_SECRET,
+    KIS_BASE_URL,
+    KIS_WS_URL,
+    KIS_WS_TR_ID,
+    KIS_WS_BAR_SEC,
+    KIS_WS_BAR_GRACE_SEC,
+    KIS_WS_QUEUE_SIZE,
+    SIGNAL_SYMBOLS,
+    kis_code_for,
+)
+from .market_calendar import MarketCalendar, market_calendar
+from .metrics import get_logger
+
+log = get_logger("kis_ws")
+
+# H0STCNT0 필드 위치 (유가증권단축종목코드, 주식체결시간, 주식현재가, ..., 체결거래량)
+_TICK_FIELDS = {
+    "H0STCNT0": {"width": 46, "code": 0, "time": 1, "price": 2, "volume": 12},
+}
+
+# 긴 공백(점심/장중 단절 등) 뒤 flat bar 로 채우는 최대 개수
+_MAX_GAP_FILL = 120
+
+
+@dataclass
+class Tick:
+    code: str
+    ts: float
+    price: float
+    volume: float
+
+
+@dataclass
+class Bar:
+    symbol: str
+    start: float
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: float
+    ticks: int = 0
+
+    def ohlcv(self):
+        return self.open, self.high, self.low, self.close, self.volume
+
+
+# ======================================================================
+# 1. 수신 frame 파싱
+# ======================================================================
+
+def _tick_epoch(hhmmss: str, now: Optional[datetime] = None) -> float:
+    now = now or datetime.now(tz=KST)
+    t = now.replace(
+        hour=int(hhmmss[0:2]), minute=int(hhmmss[2:4]), second=int(hhmmss[4:6]), microsecond=0
+    )
+    return t.timestamp()
+
+
+def parse_tick_frame(raw: str, now: Optional[datetime] = None) -> List[Tick]:
+    """
+    체결 데이터 frame → Tick 리스트 (한 frame 에 여러 건이 묶여 올 수 있음)
+    지원하지 않는 tr_id / 암호화 frame / 건수 필드가 깨진 frame 은 빈 리스트.
+    """
+    parts = raw.split("|", 3)
+    if len(parts) != 4 or parts[0] != "0":
+        return []
+
+    spec = _TICK_FIELDS.get(parts[1])
+    if spec is None:
+        return []
+
+    try:
+        count = max(1, int(parts[2]))
+    except ValueError:
+        # 건수 필드가 깨진 frame 은 버림 (예외로 수신 루프가 끊겨 재접속하지 않도록)
+        log.warning("잘못된 체결 frame", count=parts[2][:16])
+        return []
+    fields = parts[3].split("^")
+    width = len(fields) // count if len(fields) % count == 0 else spec["width"]
+
+    ticks = []
+    for i in range(count):
+        rec = fields[i * width:(i + 1) * width]
+        if len(rec) <= spec["volume"]:
+            break
+        try:
+            ticks.append(Tick(
+                code=rec[spec["code"]],
+                ts=_tick_epoch(rec[spec["time"]], now),
+                price=float(rec[spec["price"]]),
+                volume=float(rec[spec["volume"]] or 0.0),
+            ))
+        except (ValueError, IndexError):
+            continue
+    return ticks
+
+
+# ======================================================================
+# 2. tick → OHLCV bar
+# ======================================================================
+
+class BarAggregator:
+    """
+    심볼별로 interval_sec 구간 bar 를 만들고, 완성된 bar 를 시간 순서대로 queue 에 넣는다.
+    장 운영시간 밖의 tick / flush 는 무시 (calendar 기준, 세션이 바뀌면 격자를 새로 시작).
+    """
+
+    def __init__(
+        self,
+        queue: asyncio.Queue,
+        interval_sec: float = KIS_WS_BAR_SEC,
+        grace_sec: float = KIS_WS_BAR_GRACE_SEC,
+        calendar: Optional[MarketCalendar] = None,
+    ):
+        self.queue = queue
+        self.interval = float(interval_sec)
+        self.grace = float(grace_sec)
+        self.calendar = calendar or market_calendar
+        self._open: Dict[str, Bar] = {}
+        self._next: Dict[str, float] = {}       # 다음에 내보낼 bar 시작 시각
+        self._last_close: Dict[str, float] = {}
+        self._session: Optional[Tuple[float, float]] = None   # 현재 세션 (개장, 마감) epoch 초
+        self.dropped = 0
+
+    def _bucket(self, ts: float) -> float:
+        return math.floor(ts / self.interval) * self.interval
+
+    def _emit(self, bar: Bar) -> None:
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(bar)
+        self._next[bar.symbol] = bar.start + self.interval
+        self._last_close[bar.symbol] = bar.close
+
+    def _advance(self, symbol: str, until: float) -> None:
+        """until 이전 구간의 bar 를 모두 내보냄 (열린 bar → 빈 구간 flat bar)"""
+        bar = self._open.get(symbol)
+        if bar is not None and bar.start < until:
+            self._emit(self._open.pop(symbol))
+
+        start = self._next.get(symbol)
+        if start is None or symbol in self._open:
+            return
+        if (until - start) / self.interval > _MAX_GAP_FILL:
+            start = until - _MAX_GAP_FILL * self.interval
+        close = self._last_close[symbol]
+        while start < until:
+            self._emit(Bar(symbol, start, close, close, close, close, 0.0, 0))
+            start += self.interval
+
+    def _session_at(self, ts: float) -> Optional[Tuple[float, float]]:
+        """ts 가 속한 세션 (개장, 마감) epoch 초, 장 밖이면 None (세션 안이면 달력 조회 생략)"""
+        s = self._session
+        if s is not None and s[0] <= ts <= s[1]:
+            return s
+        dt = datetime.fromtimestamp(ts, tz=KST)
+        session = self.calendar.session(dt.date())
+        if session is None or not session[0] <= dt <= session[1]:
+            return None
+        return session[0].timestamp(), session[1].timestamp()
+
+    def _sync_session(self, ts: float) -> bool:
+        """ts 시점 세션으로 전환. 장중이면 True"""
+        session = self._session_at(ts)
+        if session == self._session:
+            return session is not None
+        if self._session is not None:
+            # 마감: 마감 시각이 속한 구간까지 내보내고 격자 중단
+            end = self._bucket(self._session[1]) + self.interval
+            for symbol in list(self._last_close):
+                self._advance(symbol, end)
+        # 새 세션은 첫 tick 부터 격자 시작 (직전 세션 종가로 gap fill 하지 않음)
+        self._open.clear()
+        self._next.clear()
+        self._last_close.clear()
+        self._session = session
+        return session is not None
+
+    def add(self, symbol: str, tick: Tick) -> None:
+        if not self._sync_session(tick.ts):
+            return
+        start = self._bucket(tick.ts)
+        # 이미 내보낸 구간의 늦은 tick 은 현재 구간에 합침
+        start = max(start, self._next.get(symbol, start))
+        self._advance(symbol, start)
+
+        bar = self._open.get(symbol)
+        if bar is None:
+            bar = Bar(symbol, start, tick.price, tick.price, tick.price, tick.price, 0.0, 0)
+            self._open[symbol] = bar
+        bar.high = max(bar.high, tick.price)
+        bar.low = min(bar.low, tick.price)
+        bar.close = tick.price
+        bar.volume += tick.volume
+        bar.ticks += 1
+        self._last_close[symbol] = tick.price
+
+    def flush(self, now: Optional[float] = None) -> None:
+        """now - grace 시점까지 끝난 구간을 모두 내보냄 (tick 없는 심볼은 flat bar)"""
+        now = time.time() if now is None else now
+        if not self._sync_session(now - self.grace):
+            return
+        cutoff = self._bucket(now - self.grace)
+        for symbol in list(self._last_close):
+            self._advance(symbol, cutoff)
+
+    def last_price(self, symbol: str) -> Optional[float]:
+        return self._last_close.get(symbol)
+
+    @property
+    def in_session(self) -> bool:
+        return self._session is not None
+
+
+# ======================================================================
+# 3. WebSocket 수집기
+# ======================================================================
+
+class KISWebSocketFeed:
+    def __init__(
+        self,
+        symbols: Optional[List[str]] = None,
+        interval_sec: float = KIS_WS_BAR_SEC,
+        tr_id: str = KIS_WS_TR_ID,
+    ):
+        self.symbols = list(symbols or SIGNAL_SYMBOLS)
+        self.tr_id = tr_id
+        self._code_to_symbol = {kis_code_for(s): s for s in self.symbols}
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=KIS_WS_QUEUE_SIZE)
+        self.aggregator = BarAggregator(self.queue, interval_sec)
+        self._tasks: List[asyncio.Task] = []
+        self.connected = False
+        self.ticks = 0
+        self.reconnects = 0
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._tasks = [
+            asyncio.create_task(self._run()),
+            asyncio.create_task(self._flush_loop()),
+        ]
+        print(f"[kis_ws] 실시간 체결 수집 시작 ({self.tr_id}, {len(self.symbols)} symbols)")
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self.connected = False
+
+    # ------------------------------------------------------------
+    # consumer API (signal_generator)
+    # ------------------------------------------------------------
+
+    def has_data(self, symbol: str) -> bool:
+        return self.aggregator.last_price(symbol) is not None
+
+    def last_price(self, symbol: str) -> Optional[float]:
+        return self.aggregator.last_price(symbol)
+
+    def drain(self) -> Dict[str, List[Bar]]:
+        """queue 에 쌓인 완성 bar 를 심볼별로 (시간 순) 꺼냄"""
+        out: Dict[str, List[Bar]] = {}
+        while not self.queue.empty():
+            bar = self.queue.get_nowait()
+            out.setdefault(bar.symbol, []).append(bar)
+        return out
+
+    # ------------------------------------------------------------
+    # 접속 / 수신
+    # ------------------------------------------------------------
+
+    async def _approval_key(self, session: aiohttp.ClientSession) -> str:
+        payload = {
+            "grant_type": "client_credentials",
+            "appkey": KIS_APP_KEY,
+            "secretkey": KIS_APP_SECRET,
+        }
+        async with session.post(f"{KIS_BASE_URL}/oauth2/Approval", json=payload) as resp:
+            data = await resp.json(content_type=None)
+        if "approval_key" not in data:
+            raise RuntimeError(f"approval_key 발급 실패: {data}")
+        return data["approval_key"]
+
+    def _subscribe_msg(self, approval_key: str, code: str) -> str:
+        return json.dumps({
+            "header": {
+                "approval_key": approval_key,
+                "custtype": "P",
+                "tr_type": "1",
+                "content-type": "utf-8",
+            },
+            "body": {"input": {"tr_id": self.tr_id, "tr_key": code}},
+        })
+
+    async def _run(self) -> None:
+        backoff = 1.0
+        while True:
+            try:
+                async with aiohttp.ClientSession() as session:
+                    key = await self._approval_key(session)
+                    url = f"{KIS_WS_URL}/tryitout/{self.tr_id}"
+                    async with session.ws_connect(url, heartbeat=30) as ws:
+                        for code in self._code_to_symbol:
+                            await ws.send_str(self._subscribe_msg(key, code))
+                        self.connected = True
+                        backoff = 1.0
+                        print(f"[kis_ws] 접속 완료: {url}")
+                        await self._receive(ws)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.warning("연결 오류", error=e, reconnects=self.reconnects)
+
+            self.connected = False
+            self.reconnects += 1
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 30.0)
+
+    async def _receive(self, ws: aiohttp.ClientWebSocketResponse) -> None:
+        async for msg in ws:
+            if msg.type != aiohttp.WSMsgType.TEXT:
+                if msg.type in (aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
+                    break
+                continue
+
+            raw = msg.data
+            if raw[:1] in ("0", "1"):
+                for tick in parse_tick_frame(raw):
+                    symbol = self._code_to_symbol.get(tick.code)
+                    if symbol is not None:
+                        self.aggregator.add(symbol, tick)
+                        self.ticks += 1
+                continue
+
+            try:
+                data = json.loads(raw)
+            except ValueError:
+                continue
+            header = data.get("header", {})
+            if header.get("tr_id") == "PINGPONG":
+                await ws.send_str(raw)
+            elif data.get("body", {}).get("rt_cd") not in (None, "0"):
+                log.warning("구독 실패", body=data.get("body"))
+
+    async def _flush_loop(self) -> None:
+        interval = self.aggregator.interval
+        while True:
+            # 다음 구간 경계 + grace 까지 대기 후 완성된 bar 내보내기
+            now = time.time()
+            wait = interval - (now % interval) + self.aggregator.grace
+            closed = self.aggregator.calendar.seconds_until_open()
+            if closed > 0 and not self.aggregator.in_session:
+                # 장 밖 (마감 처리까지 끝남): 다음 개장까지 잠듦
+                wait = max(wait, closed)
+            await asyncio.sleep(wait)
+            self.aggregator.flush()
+
+
+# 서버 전체에서 공유하는 수집기 (main.py startup 에서 start)
+kis_ws_feed = KISWebSocketFeed()
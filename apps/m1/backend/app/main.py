@@ -3,25 +3,56 @@
 SIGMA A 프로젝트 - FastAPI 엔트리 포인트
 
 Endpoints:
-  GET  /signals?limit=N   → 최근 N개 신호 조회
-  POST /predict           → 즉시 신호 1회 생성
-  WS   /ws                → 실시간 스트림(WebSocket)
+  GET  /signals?limit=N[&symbol=S]  → 최근 N개 신호 조회
+       [&format=columnar]           → 최근 N개를 열 단위 배열로 (hot tier 범위)
+       [&since=ISO&until=ISO&regime=R] → 기간/regime 조회 (SQLite 이력)
+  POST /predict[?symbol=S]          → 즉시 신호 1회 생성
+  GET  /startup                     → 모델 로딩 시간 리포트
+  GET  /models                     → 서빙 중인 모델 / hot reload 상태
+  POST /models/reload[?force=true]  → 아티팩트 다시 로드 후 교체 (백그라운드)
+  GET  /metrics                     → stage/모델별 지연 히스토그램 (Prometheus text)
+  WS   /ws[?mode=delta]             → 실시간 스트림(WebSocket)
 
 내부 로직:
-  - 시장 열림 상태: 정상 신호 생성
-  - 시장 닫힘 상태: snapshot 생성 (next-open, scenario report)
-  - 백그라운드 작업으로 1초 주기 자동 신호 생성
+  - 시장 열림 상태: 정상 신호 생성 (SIGNAL_SYMBOLS 전체를 1회 배치 추론)
+  - 시장 닫힘 상태: 닫힌 구간마다 snapshot 1번 생성 (next-open, scenario report) 후
+    다음 개장까지 대기 (KRX 휴장일 / 특수 운영시간은 market_calendar)
+  - 백그라운드 작업으로 장중 1초 주기 자동 신호 생성
+  - USE_KIS_API + KIS_USE_WEBSOCKET 이면 실시간 체결 → OHLCV bar 로 feature 갱신
+  - 전처리/추론은 event loop 밖(feature 스레드, inference_executor)에서 실행
 """
 
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from typing import List, Dict, Any
+from fastapi.responses import PlainTextResponse, Response
+from typing import Optional
 import asyncio
 
 # 내부 모듈
-from .signal_store import append_signal, get_recent_signals
+from .signal_store import (
+    append_signal,
+    get_recent_signals_encoded,
+    hot_tier_covers,
+    query_signals,
+    HOT_TIER_SIZE,
+    warm_hot_tier,
+    close_store,
+)
 from .signal_generator import generate_signal_once, signal_loop
 from .kis_api_client import close_clients
+from .inference_executor import inference_executor
+from .model_handler import (
+    get_startup_report,
+    get_streaming_stats,
+    get_reload_status,
+    get_profile_enabled,
+    request_reload,
+)
+from .ws_broadcast import ConnectionManager
+from .kis_ws_client import kis_ws_feed
+from .metrics import span, render_prometheus, register_gauge
+from .model_scoreboard import model_scoreboard
+from .config import INTERNAL_SYMBOL, USE_KIS_API, KIS_USE_WEBSOCKET, SIGNALS_MAX_LIMIT
 
 app = FastAPI(title="SIGMA A PROJECT API")
 
@@ -40,30 +71,6 @@ app.add_middleware(
 # WebSocket 연결 관리자
 # ----------------------------------------------------------------
 
-class ConnectionManager:
-    def __init__(self):
-        self.active: List[WebSocket] = []
-
-    async def connect(self, ws: WebSocket):
-        await ws.accept()
-        self.active.append(ws)
-
-    def disconnect(self, ws: WebSocket):
-        try:
-            self.active.remove(ws)
-        except:
-            pass
-
-    async def broadcast(self, message: Dict[str, Any]):
-        alive = []
-        for ws in self.active:
-            try:
-                await ws.send_json(message)
-                alive.append(ws)
-            except:
-                pass
-        self.active = alive
-
 manager = ConnectionManager()
 
 # ----------------------------------------------------------------
@@ -71,26 +78,61 @@ manager = ConnectionManager()
 # ----------------------------------------------------------------
 
 @app.get("/signals")
-async def signals(limit: int = 120):
+async def signals(
+    limit: int = 120,
+    symbol: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    regime: Optional[str] = None,
+    format: str = "json",
+):
     """
-    최근 N개의 신호 반환
-
-    FastAPI가 내부적으로 Request 객체를 함수에 넘기지 않도록
-    단일 positional 인자(limit)만 받도록 구성.
+    최근 N개의 신호 반환 (symbol 지정 시 해당 심볼만)
+    since/until/regime 지정 시, 메모리 버퍼보다 많이 요청하면,
+    또는 메모리 버퍼에 남은 해당 symbol 신호가 limit 보다 적으면 DB 에서 조회
+    (limit<=0 이면 조건에 맞는 전체, 단 어느 경우든 최근 SIGNALS_MAX_LIMIT 개까지)
+    format=columnar : {"timestamp": [...], "score": [...], ..., "models": [...], "signals": [[...]]}
+                      hot tier (최근 HOT_TIER_SIZE 개) 에서만 지원 (symbol 지정 시 hot tier 에 남은 행만)
     """
-    return get_recent_signals(limit)
+    if format not in ("json", "columnar"):
+        raise HTTPException(status_code=400, detail=f"알 수 없는 format: {format}")
+
+    # 여러 심볼 × 1초 신호라 "전체" 도 응답 크기 상한을 둔다
+    limit = SIGNALS_MAX_LIMIT if limit <= 0 else min(limit, SIGNALS_MAX_LIMIT)
+
+    recent = since is None and until is None and regime is None and 0 < limit <= HOT_TIER_SIZE
+    if recent and (format == "columnar" or hot_tier_covers(limit, symbol)):
+        # hot tier: 저장소가 만든 JSON bytes 를 그대로 응답 (응답 모델 검증/재직렬화 없음)
+        # (symbol 지정 시 hot tier 에 남은 해당 심볼 행이 limit 보다 적으면 아래 DB 조회)
+        return Response(
+            get_recent_signals_encoded(limit, symbol=symbol, fmt=format),
+            media_type="application/json",
+        )
+    if format == "columnar":
+        raise HTTPException(
+            status_code=400,
+            detail=f"format=columnar 는 since/until/regime 없이 limit 1~{HOT_TIER_SIZE} 에서만 지원",
+        )
+
+    try:
+        return await asyncio.to_thread(
+            query_signals, since, until, regime, symbol, limit
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"잘못된 시각 형식: {e}")
 
 
 @app.post("/predict")
-async def predict_once():
+async def predict_once(symbol: str = INTERNAL_SYMBOL):
     """
     강제 신호 생성
     (시장 열림/닫힘 여부와 관계 없이 generate_signal_once가 snapshot 포함 생성)
     """
-    sig = await generate_signal_once()
+    sig = await generate_signal_once(symbol)
 
     # 저장
-    append_signal(sig)
+    with span("store"):
+        append_signal(sig)
 
     # 실시간 방송
     asyncio.create_task(manager.broadcast(sig))
@@ -98,17 +140,93 @@ async def predict_once():
     return sig
 
 
+@app.get("/startup")
+async def startup_report():
+    """
+    모델 로딩 단계별 소요 시간 (첫 추론 이후 채워짐)
+    """
+    return get_startup_report()
+
+
+@app.get("/models")
+async def models_status():
+    """
+    서빙 중인 모델 source / head 목록, 마지막 reload 결과
+    """
+    return get_reload_status()
+
+
+@app.post("/models/reload")
+async def models_reload(force: bool = False):
+    """
+    artifacts_golden 의 가중치/아티팩트를 백그라운드에서 다시 로드 → warm-up → 교체
+    (신호 루프는 멈추지 않고 교체 전까지 기존 모델로 추론)
+    force=true 면 checksum 이 같은 모델도 다시 로드
+    """
+    if inference_executor.mode == "process":
+        # 모델은 워커 프로세스에 있으므로 워커별 감시 스레드가 파일 변경을 보고 교체
+        return {"status": "watcher_only", "detail": "process 실행기: 워커가 아티팩트 변경을 감지해 교체"}
+    return request_reload(force)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """
+    Prometheus text format (stage 별 / 모델별 지연 히스토그램, 신호 수, 실행기·WS 상태)
+    """
+    return PlainTextResponse(
+        render_prometheus(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+@app.get("/scoreboard")
+async def scoreboard():
+    """
+    모델별 실시간 방향 적중률 / 앙상블 가중치 / pruning 여부
+    """
+    return model_scoreboard.stats()
+
+
+register_gauge(
+    "sigma_models_pruned", "추론에서 제외된 모델 수", lambda: len(model_scoreboard.pruned())
+)
+register_gauge(
+    "sigma_streaming_primes", "증분 추론 상태 재계산 횟수",
+    lambda: (get_streaming_stats() or {}).get("primes", 0),
+)
+register_gauge(
+    "sigma_streaming_steps", "증분 추론으로 처리한 step 수",
+    lambda: (get_streaming_stats() or {}).get("steps", 0),
+)
+register_gauge(
+    "sigma_model_reloads", "hot reload 로 모델을 교체한 횟수", lambda: get_reload_status()["reloads"]
+)
+register_gauge(
+    "sigma_model_profile_enabled",
+    "모델별 추론 시간 측정 여부 (0 이면 sigma_model_inference_seconds 에 fused/streaming 만 기록)",
+    lambda: get_profile_enabled(),
+)
+register_gauge("sigma_ws_clients", "연결된 WebSocket 클라이언트 수", lambda: manager.stats()["clients"])
+register_gauge("sigma_ws_dropped_frames", "느린 클라이언트에서 버린 frame 수", lambda: manager.stats()["dropped"])
+register_gauge("sigma_inference_queued", "추론 대기 중인 tick 수", lambda: inference_executor.stats()["queued"])
+register_gauge("sigma_inference_dropped", "실행기가 버린 tick 수", lambda: inference_executor.stats()["dropped"])
+
+
 # ----------------------------------------------------------------
 # WebSocket 실시간 스트림
 # ----------------------------------------------------------------
 
 @app.websocket("/ws")
-async def ws_stream(ws: WebSocket):
-    await manager.connect(ws)
+async def ws_stream(ws: WebSocket, mode: str = "full"):
+    """
+    mode=full  : 매 신호 전체 전송 (기본)
+    mode=delta : 심볼별 직전 신호 대비 바뀐 필드만 전송 (ws_broadcast 참고)
+    """
+    await manager.connect(ws, mode)
     try:
-        # 클라이언트가 아무것도 보내지 않아도 연결 유지됨
+        # 클라이언트가 아무것도 보내지 않아도 연결 유지됨 (수신은 연결 종료 감지용)
         while True:
-            await asyncio.sleep(1.0)
+            await ws.receive_text()
     except WebSocketDisconnect:
         manager.disconnect(ws)
     except Exception:
@@ -125,19 +243,28 @@ async def auto_signal_task():
     시장이 닫혀 있으면 snapshot 자동 생성
     """
     async def on_signal(sig):
-        append_signal(sig)
-        await manager.broadcast(sig)
+        with span("store"):
+            append_signal(sig)
+        with span("broadcast"):
+            await manager.broadcast(sig)
 
     await signal_loop(on_signal, interval_sec=1.0)
 
 
 @app.on_event("startup")
 async def startup_event():
+    warm_hot_tier()
+    inference_executor.start()
+    if USE_KIS_API and KIS_USE_WEBSOCKET:
+        kis_ws_feed.start()
     asyncio.create_task(auto_signal_task())
     print("🚀 SIGMA A 프로젝트 서버 시작 (auto-signal enabled)")
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
+    await kis_ws_feed.stop()
+    await inference_executor.shutdown()
     await close_clients()
+    close_store()
     print("🛑 서버 종료 완료")
@@ -0,0 +1,116 @@
+# market_calendar.py
+"""
+SIGMA A 프로젝트 - KOSPI 거래일 / 장 운영시간 달력
+
+- 정규장: 평일 09:00 ~ 15:30 (KST)
+- 휴장일: 매년 같은 양력 휴일 (FIXED_HOLIDAYS) + 음력/대체공휴일/선거일 표 (KRX_HOLIDAYS)
+  + MARKET_HOLIDAYS 환경변수 (YYYY-MM-DD 쉼표 구분)
+  (KRX 가 매년 말 다음 해 휴장일을 공지하면 표에 추가. 임시공휴일도 환경변수로 바로 반영 가능)
+- 특수 운영일: 매년 첫 거래일 10:00 개장, 수능일 (10:00 ~ 16:30) 등 SPECIAL_SESSIONS 표
+- is_open(dt) / session(day) / next_open(dt) / seconds_until_open(dt)
+
+signal_loop 는 장이 닫혀 있으면 next_open 까지 잠들고,
+장 마감 snapshot 은 닫힌 구간(다음 개장 시각)마다 1번만 만든다.
+"""
+
+from __future__ import annotations
+
+from datetime import date, datetime, time, timedelta
+from typing import Dict, FrozenSet, Iterable, Optional, Tuple
+
+from .config import KST, MARKET_HOLIDAYS
+
+REGULAR_OPEN = time(9, 0)
+REGULAR_CLOSE = time(15, 30)
+
+# 매년 같은 날짜의 휴장일 (월, 일): 신정, 삼일절, 근로자의날, 어린이날, 현충일, 광복절,
+# 개천절, 한글날, 성탄절, 연말 휴장일
+FIXED_HOLIDAYS: FrozenSet[Tuple[int, int]] = frozenset({
+    (1, 1), (3, 1), (5, 1), (5, 5), (6, 6), (8, 15), (10, 3), (10, 9), (12, 25), (12, 31),
+})
+
+# 그 외 KRX 휴장일 (설날/추석/부처님오신날, 대체공휴일, 선거일 등 — 연도별 공지 기준)
+KRX_HOLIDAYS: FrozenSet[date] = frozenset(
+    date.fromisoformat(d)
+    for d in (
+        # 2025
+        "2025-01-27", "2025-01-28", "2025-01-29", "2025-01-30", "2025-03-03",
+        "2025-05-06", "2025-06-03", "2025-10-06", "2025-10-07", "2025-10-08",
+        # 2026
+        "2026-02-16", "2026-02-17", "2026-02-18", "2026-03-02", "2026-05-25",
+        "2026-06-03", "2026-08-17", "2026-09-24", "2026-09-25", "2026-10-05",
+    )
+)
+
+# 연초 개장일 (그 해 첫 거래일): 1시간 늦게 개장
+NEW_YEAR_OPEN = time(10, 0)
+
+# 정규장과 시간이 다른 날: {날짜: (개장, 마감)}
+SPECIAL_SESSIONS: Dict[date, Tuple[time, time]] = {
+    # 대학수학능력시험일: 1시간씩 늦춰 운영
+    date(2025, 11, 13): (time(10, 0), time(16, 30)),
+    date(2026, 11, 19): (time(10, 0), time(16, 30)),
+}
+
+
+class MarketCalendar:
+    def __init__(
+        self,
+        holidays: Iterable[date] = KRX_HOLIDAYS,
+        special_sessions: Optional[Dict[date, Tuple[time, time]]] = None,
+    ):
+        self.holidays = frozenset(holidays)
+        self.special_sessions = dict(SPECIAL_SESSIONS if special_sessions is None else special_sessions)
+
+    def is_trading_day(self, day: date) -> bool:
+        return (
+            day.weekday() < 5
+            and (day.month, day.day) not in FIXED_HOLIDAYS
+            and day not in self.holidays
+        )
+
+    def _first_trading_day(self, year: int) -> date:
+        day = date(year, 1, 1)
+        while not self.is_trading_day(day):
+            day += timedelta(days=1)
+        return day
+
+    def session(self, day: date) -> Optional[Tuple[datetime, datetime]]:
+        """해당 날짜의 (개장, 마감) 시각. 휴장일이면 None"""
+        if not self.is_trading_day(day):
+            return None
+        open_t, close_t = self.special_sessions.get(day, (REGULAR_OPEN, REGULAR_CLOSE))
+        if day == self._first_trading_day(day.year) and day not in self.special_sessions:
+            open_t = NEW_YEAR_OPEN
+        return (
+            datetime.combine(day, open_t, tzinfo=KST),
+            datetime.combine(day, close_t, tzinfo=KST),
+        )
+
+    def is_open(self, dt: Optional[datetime] = None) -> bool:
+        dt = self._now(dt)
+        s = self.session(dt.date())
+        return s is not None and s[0] <= dt <= s[1]
+
+    def next_open(self, dt: Optional[datetime] = None) -> datetime:
+        """dt 이후 (장중이면 현재 세션 다음) 가장 가까운 개장 시각"""
+        dt = self._now(dt)
+        day = dt.date()
+        for _ in range(366):
+            s = self.session(day)
+            if s is not None and s[0] > dt:
+                return s[0]
+            day += timedelta(days=1)
+        raise RuntimeError(f"1년 안에 거래일이 없습니다: {dt.date()}")
+
+    def seconds_until_open(self, dt: Optional[datetime] = None) -> float:
+        dt = self._now(dt)
+        return 0.0 if self.is_open(dt) else (self.next_open(dt) - dt).total_seconds()
+
+    @staticmethod
+    def _now(dt: Optional[datetime]) -> datetime:
+        return datetime.now(tz=KST) if dt is None else dt.astimezone(KST)
+
+
+# 서버 전체에서 공유하는 달력
+market_calendar = MarketCalendar(KRX_HOLIDAYS | MARKET_HOLIDAYS)
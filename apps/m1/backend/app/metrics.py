@@ -0,0 +1,194 @@
+# metrics.py
+"""
+SIGMA A 프로젝트 - 경량 지연 측정 / Prometheus 노출 / rate-limited 로그
+
+- span(stage, timings) : with 블록 소요 시간을 stage 히스토그램에 기록
+                         (timings dict 를 넘기면 "<stage>_ms" 로도 저장 → 신호의 timings 필드)
+- observe_model(name, sec) : 모델별 추론 시간 (model_handler 가 주기적으로 개별 측정)
+- render_prometheus()  : /metrics 용 Prometheus text format
+- get_logger(name)     : 같은 이벤트는 LOG_RATE_LIMIT_SEC 에 1번만 출력 (생략 횟수 함께 표시)
+
+주의: INFERENCE_EXECUTOR_MODE=process 에서는 워커 프로세스 안의 모델별 측정은 집계되지 않는다.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from .config import LOG_RATE_LIMIT_SEC
+
+# 초 단위 bucket (0.5ms ~ 5s)
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+# ======================================================================
+# 1. 히스토그램 / 카운터
+# ======================================================================
+
+class Histogram:
+    def __init__(self, name: str, help_: str, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._series: Dict[LabelKey, List[float]] = {}  # [bucket counts..., sum, count]
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            s = self._series.get(key)
+            if s is None:
+                s = self._series[key] = [0.0] * (len(self.buckets) + 2)
+            for i, b in enumerate(self.buckets):
+                if value <= b:
+                    s[i] += 1
+            s[-2] += value
+            s[-1] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {k: list(v) for k, v in self._series.items()}
+        for key, s in sorted(series.items()):
+            for i, b in enumerate(self.buckets):
+                lines.append(f"{self.name}_bucket{_labels(key, le=repr(b))} {s[i]:g}")
+            lines.append(f"{self.name}_bucket{_labels(key, le='+Inf')} {s[-1]:g}")
+            lines.append(f"{self.name}_sum{_labels(key)} {s[-2]:.6f}")
+            lines.append(f"{self.name}_count{_labels(key)} {s[-1]:g}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name: str, help_: str):
+        self.name = name
+        self.help = help_
+        self._lock = threading.Lock()
+        self._values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, v in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(key)} {v:g}")
+        return lines
+
+
+def _labels(key: LabelKey, **extra: str) -> str:
+    items = list(key) + list(extra.items())
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in items) + "}"
+
+
+STAGE_SECONDS = Histogram(
+    "sigma_stage_seconds", "신호 파이프라인 stage 별 소요 시간(초)"
+)
+MODEL_SECONDS = Histogram(
+    "sigma_model_inference_seconds", "모델별 추론 시간(초, fused 는 전체 그래프 1회)"
+)
+SIGNALS_TOTAL = Counter("sigma_signals_total", "생성된 신호 수 (regime 별)")
+DROPPED_TICKS = Counter("sigma_ticks_dropped_total", "추론 대기열에서 버려진 tick 수")
+
+# 외부 상태를 그대로 노출하는 gauge (이름 → (help, 값 함수))
+_gauges: Dict[str, Tuple[str, Callable[[], float]]] = {}
+
+
+def register_gauge(name: str, help_: str, fn: Callable[[], float]) -> None:
+    _gauges[name] = (help_, fn)
+
+
+# ======================================================================
+# 2. span / 측정 API
+# ======================================================================
+
+@contextmanager
+def span(stage: str, timings: Optional[Dict[str, float]] = None) -> Iterator[None]:
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - t0
+        STAGE_SECONDS.observe(elapsed, stage=stage)
+        if timings is not None:
+            timings[f"{stage}_ms"] = round(elapsed * 1000.0, 3)
+
+
+def observe_model(name: str, seconds: float) -> None:
+    MODEL_SECONDS.observe(seconds, model=name)
+
+
+def render_prometheus() -> str:
+    lines: List[str] = []
+    for metric in (STAGE_SECONDS, MODEL_SECONDS, SIGNALS_TOTAL, DROPPED_TICKS):
+        lines.extend(metric.render())
+    for name, (help_, fn) in sorted(_gauges.items()):
+        try:
+            value = float(fn())
+        except Exception:
+            continue
+        lines.extend([f"# HELP {name} {help_}", f"# TYPE {name} gauge", f"{name} {value:g}"])
+    return "\n".join(lines) + "\n"
+
+
+# ======================================================================
+# 3. rate-limited 구조화 로그
+# ======================================================================
+
+class RateLimitedLogger:
+    """
+    [name] event key=value ... 한 줄 출력.
+    같은 (level, event) 는 interval 초에 1번만 출력하고 그 사이 생략된 횟수를 붙인다.
+    """
+
+    def __init__(self, name: str, interval: float = LOG_RATE_LIMIT_SEC):
+        self.name = name
+        self.interval = float(interval)
+        self._lock = threading.Lock()
+        self._last: Dict[Tuple[str, str], float] = {}
+        self._suppressed: Dict[Tuple[str, str], int] = {}
+
+    def _emit(self, level: str, event: str, fields: Dict[str, object]) -> None:
+        key = (level, event)
+        now = time.monotonic()
+        with self._lock:
+            last = self._last.get(key)
+            if last is not None and now - last < self.interval:
+                self._suppressed[key] = self._suppressed.get(key, 0) + 1
+                return
+            self._last[key] = now
+            suppressed = self._suppressed.pop(key, 0)
+
+        mark = {"warning": "⚠️ ", "error": "❗ "}.get(level, "")
+        parts = [f"[{self.name}] {mark}{event}"]
+        parts += [f"{k}={v}" for k, v in fields.items()]
+        if suppressed:
+            parts.append(f"suppressed={suppressed}")
+        print(" ".join(parts))
+
+    def info(self, event: str, **fields: object) -> None:
+        self._emit("info", event, fields)
+
+    def warning(self, event: str, **fields: object) -> None:
+        self._emit("warning", event, fields)
+
+    def error(self, event: str, **fields: object) -> None:
+        self._emit("error", event, fields)
+
+
+_loggers: Dict[str, RateLimitedLogger] = {}
+
+
+def get_logger(name: str) -> RateLimitedLogger:
+    if name not in _loggers:
+        _loggers[name] = RateLimitedLogger(name)
+    return _loggers[name]
@@ -2,250 +2,641 @@
 SIGMA A 프로젝트 - 모델 로딩 및 실시간 예측 엔진 (CHAMPION 모델 포함)
 """
 
-import os
 import math
+import threading
+import time
 import numpy as np
+from dataclasses import dataclass, field
+from pathlib import Path
 import tensorflow as tf
-from typing import Dict, Any
+from typing import Dict, Any, FrozenSet, Iterable, List, Optional, Tuple
 
-from tensorflow.keras import Model, regularizers
-from tensorflow.keras.layers import (
-    Layer, LayerNormalization, Dropout, Dense, GlobalAveragePooling1D,
-    MultiHeadAttention, Input, LSTM, GRU, Conv1D, Add, Activation,
-    ZeroPadding1D, Reshape
-)
-
-from tensorflow.keras.models import load_model
+from tensorflow.keras import Model
 
 from .config import (
-    MODEL_WEIGHTS,
-    SEQUENCE_LENGTH,
+    USE_COMPILED_ARTIFACTS,
+    INFERENCE_PRECISION,
+    METRICS_MODEL_PROFILE_EVERY,
+    STREAMING_INFERENCE,
+    STREAMING_MODELS,
+    COMPILED_MANIFEST_PATH,
+    QUANTIZED_MANIFEST_PATH,
+    MODEL_WATCH_INTERVAL_SEC,
+)
+from .compiled_artifacts import load_compiled_ensemble
+from .quantize import load_quantized_ensemble
+from .streaming_inference import StreamingInference
+from .metrics import observe_model, get_logger
+
+# 커스텀 레이어 / 빌더 / champion 로더는 model_registry 한 곳에서 정의 (기존 import 경로 유지)
+from .model_registry import (  # noqa: F401
+    Attention,
+    PositionalEncoding,
+    TransformerEncoder,
+    CUSTOM_OBJECTS,
+    MODEL_BUILDERS,
+    build_champion_model,
+    registry,
 )
 
 # ======================================================================
-# 1) 커스텀 Attention 레이어
+# 4) 서빙 상태
+#   - 추론에 쓰는 모델 / fused 그래프 / head 순서를 _Serving 하나로 묶고
+#     run_inference_batch 는 호출 시작 시 _serving 참조를 한 번만 읽는다
+#   - hot reload 는 새 _Serving 을 백그라운드에서 다 만든 뒤 참조만 교체
+#     (진행 중인 tick 은 이전 상태로 끝까지 실행 → tick 손실 없음)
 # ======================================================================
 
-class Attention(Layer):
-    def __init__(self, **kwargs):
-        super().__init__(**kwargs)
-
-    def build(self, input_shape):
-        self.W = self.add_weight(
-            name="att_weight",
-            shape=(input_shape[-1], 1),
-            initializer="glorot_uniform"
-        )
-        self.b = self.add_weight(
-            name="att_bias",
-            shape=(input_shape[1], 1),
-            initializer="zeros"
-        )
-        super().build(input_shape)
-
-    def call(self, x):
-        et = tf.squeeze(tf.tanh(tf.matmul(x, self.W) + self.b), axis=-1)
-        at = tf.nn.softmax(et, axis=-1)
-        at = tf.expand_dims(at, axis=-1)
-        return tf.reduce_sum(x * at, axis=1)
+@dataclass
+class _Serving:
+    input_shape: Tuple[int, ...]
+    source: str                                   # keras | compiled | tflite-<precision>
+    models: Dict[str, Model] = field(default_factory=dict)
+    ensemble_fn: Any = None
+    fused_names: List[str] = field(default_factory=list)
+    fused_models: List[Model] = field(default_factory=list)
+    head_names: List[str] = field(default_factory=list)   # 최종 출력 순서
+    subset_fns: Dict[Tuple[str, ...], Any] = field(default_factory=dict)   # pruning 조합별 그래프
+    profile_fns: Dict[str, Any] = field(default_factory=dict)
+    streaming: Optional[StreamingInference] = None
+    streaming_checked: bool = False
+    fallback: Optional["_Serving"] = None                 # compiled/TFLite 호출 실패 시 Keras 상태
+
+
+_serving: Optional[_Serving] = None
+_load_lock = threading.Lock()
+
+
+def _keras_serving(
+    input_shape, report: Dict[str, Any], force: bool = False, strict: bool = False
+) -> _Serving:
+    """
+    registry 에서 학습 가중치가 로드된 모델을 가져와 fused 그래프를 만든다.
+    가중치 checksum 이 그대로인 모델은 registry 가 다시 만들지 않는다.
+    strict=True 면 로드에 실패한 모델이 있을 때 (그래프를 만들기 전에) RuntimeError.
+    """
+    input_shape = tuple(int(d) for d in input_shape)
+
+    t0 = time.perf_counter()
+    models = registry.load(input_shape=input_shape, force=force)
+    report["build_models"] = time.perf_counter() - t0
+    report["registry"] = dict(registry.last_report)
+    if strict and report["registry"].get("failed"):
+        raise RuntimeError(f"로드 실패 모델: {report['registry']['failed']}")
+
+    t0 = time.perf_counter()
+    state = _Serving(input_shape=input_shape, source="keras", models=models, head_names=list(models))
+    _build_ensemble_fn(state)
+    report["trace_ensemble"] = time.perf_counter() - t0
+    return state
+
+
+def load_models(input_shape) -> _Serving:
+    """Keras 빌드 경로로 서빙 상태를 만들어 바로 사용 (compiled_artifacts export / ModelHandler)"""
+    global _serving
+    with _load_lock:
+        _serving = _keras_serving(input_shape, _startup_report)
+        return _serving
 
 
 # ======================================================================
-# 2) PositionalEncoding / TransformerEncoder
+# 4-1) Fused ensemble 그래프
+#   - 모든 모델을 하나의 tf.function 으로 묶어 1회 호출로 전체 head 계산
+#   - 출력: (batch, n_fused) → 열 순서 = fused_names
+#   - trace 에 실패한 모델은 그래프에서 제외하고 개별 predict 로 fallback
 # ======================================================================
 
-class PositionalEncoding(Layer):
-    def __init__(self, position, d_model, **kwargs):
-        super().__init__(**kwargs)
-        self.position = int(position)
-        self.d_model = int(d_model)
-        self.pos_encoding = self._positional_encoding(self.position, self.d_model)
-
-    def get_config(self):
-        cfg = super().get_config()
-        cfg.update({"position": self.position, "d_model": self.d_model})
-        return cfg
-
-    def _get_angles(self, position, i, d_model):
-        angle_rates = 1.0 / tf.pow(
-            10000.0, (2 * (i // 2)) / tf.cast(d_model, tf.float32)
-        )
-        return tf.cast(position, tf.float32) * angle_rates
+def _first_head(out):
+    # model.predict(x)[0][0] 과 동일하게 각 샘플의 첫 번째 출력만 사용
+    out = tf.reshape(out, (tf.shape(out)[0], -1))
+    return tf.cast(out[:, :1], tf.float32)
 
-    def _positional_encoding(self, position, d_model):
-        angle_rads = self._get_angles(
-            tf.range(position, dtype=tf.float32)[:, tf.newaxis],
-            tf.range(d_model, dtype=tf.float32)[tf.newaxis, :],
-            d_model,
-        )
-        sines = tf.math.sin(angle_rads[:, 0::2])
-        cosines = tf.math.cos(angle_rads[:, 1::2])
-        return tf.concat([sines, cosines], axis=-1)[tf.newaxis, ...]
 
-    def call(self, inputs):
-        return inputs + self.pos_encoding[:, : tf.shape(inputs)[1], :]
+def _build_ensemble_fn(state: _Serving) -> None:
+    input_shape = state.input_shape
+    probe = tf.zeros((1, *input_shape), dtype=tf.float32)
+
+    fused_models, fused_names = [], []
+    for name, model in state.models.items():
+        try:
+            _first_head(model(probe, training=False))
+        except Exception as e:
+            print(f"[model_handler] ⚠️ {name} fused 그래프 제외 (개별 predict 사용): {e}")
+            continue
+        fused_models.append(model)
+        fused_names.append(name)
+
+    if not fused_models:
+        return
+
+    @tf.function(
+        input_signature=[tf.TensorSpec(shape=(None, *input_shape), dtype=tf.float32)]
+    )
+    def ensemble_fn(x):
+        return tf.concat([_first_head(m(x, training=False)) for m in fused_models], axis=1)
+
+    try:
+        ensemble_fn.get_concrete_function()
+    except Exception as e:
+        print(f"[model_handler] ⚠️ fused 그래프 생성 실패 → 모델별 predict 사용: {e}")
+        return
+
+    state.ensemble_fn = ensemble_fn
+    state.fused_models = fused_models
+    state.fused_names = fused_names
+    print(f"[model_handler] fused ensemble 그래프 생성 완료 ({len(fused_names)}개 모델)")
+
 
+def _head_fn(model: Model, input_shape):
+    """모델 1개의 첫 번째 head 만 계산하는 tf.function: (batch, T, F) → (batch, 1)"""
 
-class TransformerEncoder(Layer):
-    def __init__(self, d_model, num_heads, dff, rate=0.1, **kwargs):
-        super().__init__(**kwargs)
-        self.d_model = d_model
-        self.num_heads = num_heads
-        self.dff = dff
-        self.rate = rate
+    @tf.function(input_signature=[tf.TensorSpec(shape=(None, *input_shape), dtype=tf.float32)])
+    def head(x):
+        return _first_head(model(x, training=False))
 
-        self.mha = MultiHeadAttention(key_dim=d_model, num_heads=num_heads)
-        self.ffn = tf.keras.Sequential(
-            [Dense(dff, activation="relu"), Dense(d_model)]
+    return head
+
+
+def _subset_fn(state: _Serving, names: Tuple[str, ...]):
+    """
+    names 모델만 실행하는 그래프 (조합별 1회 만들고 캐시).
+    Keras: fused 모델 중 names 만 묶어 trace / compiled(v3)·TFLite: 아티팩트의 subset()
+    모델별로 나눠 실행할 수 없는 경로(compiled v2)면 None
+    """
+    if names in state.subset_fns:
+        return state.subset_fns[names]
+
+    if state.fused_models:
+        models = [state.fused_models[state.fused_names.index(n)] for n in names]
+
+        @tf.function(
+            input_signature=[tf.TensorSpec(shape=(None, *state.input_shape), dtype=tf.float32)]
         )
-        self.norm1 = LayerNormalization(epsilon=1e-6)
-        self.norm2 = LayerNormalization(epsilon=1e-6)
-        self.drop1 = Dropout(rate)
-        self.drop2 = Dropout(rate)
+        def fn(x):
+            return tf.concat([_first_head(m(x, training=False)) for m in models], axis=1)
+
+    else:
+        subset = getattr(state.ensemble_fn, "subset", None)
+        fn = subset(names) if subset is not None else None
+
+    state.subset_fns[names] = fn
+    if fn is not None:
+        print(f"[model_handler] pruning 그래프 생성 ({len(names)}/{len(state.fused_names)}개 모델)")
+    return fn
+
+
+def get_fused_ensemble():
+    """(ensemble tf.function, 포함된 Keras 모델들, head 이름) — compiled_artifacts export 용"""
+    state = _serving
+    if state is None:
+        return None, [], []
+    return state.ensemble_fn, list(state.fused_models), list(state.fused_names)
 
-    def call(self, x, training=False):
-        attn = self.mha(x, x, x)
-        attn = self.drop1(attn, training=training)
-        out1 = self.norm1(x + attn)
-        ffn_out = self.ffn(out1)
-        ffn_out = self.drop2(ffn_out, training=training)
-        return self.norm2(out1 + ffn_out)
+
+def get_head_fns() -> Dict[str, Any]:
+    """fused 모델별 head tf.function — compiled_artifacts export 용 (pruning / 모델별 측정)"""
+    state = _serving
+    if state is None:
+        return {}
+    return {
+        name: _head_fn(model, state.input_shape)
+        for name, model in zip(state.fused_names, state.fused_models)
+    }
 
 
 # ======================================================================
-# 3) 7개 기본 모델 + CHAMPION 모델
+# 4-2) 지연 로딩 + 기동 시간 리포트
+#   - 첫 추론 요청 때 1회: (INFERENCE_PRECISION 이 int8/float16 이면 TFLite) → compiled SavedModel
+#     → 없거나 오래됐으면 Keras 빌드
 # ======================================================================
 
-L2_REG = 1e-5
-
-def build_lstm_with_attention_reg(input_shape):
-    inp = Input(shape=input_shape)
-    x = LSTM(64, return_sequences=True, dropout=0.2,
-             kernel_regularizer=regularizers.l2(L2_REG))(inp)
-    x = Attention()(x)
-    out = Dense(1)(x)
-    return Model(inp, out, name="lstm_attention_reg")
-
-
-def build_gru_with_attention_reg(input_shape):
-    inp = Input(shape=input_shape)
-    x = GRU(64, return_sequences=True, dropout=0.2,
-            kernel_regularizer=regularizers.l2(L2_REG))(inp)
-    x = Attention()(x)
-    out = Dense(1)(x)
-    return Model(inp, out, name="gru_attention_reg")
-
-
-def build_transformer_model_reg(input_shape, d_model=64, num_heads=4, dff=128):
-    inp = Input(shape=input_shape)
-    x = Dense(d_model)(inp)
-    x = PositionalEncoding(input_shape[0], d_model)(x)
-    for _ in range(2):
-        x = TransformerEncoder(d_model, num_heads, dff)(x)
-    x = GlobalAveragePooling1D()(x)
-    out = Dense(1)(x)
-    return Model(inp, out, name="transformer_reg")
-
-
-def _tcn_block(x, filters, kernel_size=3, dilation_rate=1):
-    h = Conv1D(filters, kernel_size, padding="causal",
-               dilation_rate=dilation_rate)(x)
-    h = Activation("relu")(h)
-    h = Conv1D(filters, kernel_size, padding="causal",
-               dilation_rate=dilation_rate)(h)
-    if x.shape[-1] != filters:
-        x = Conv1D(filters, 1, padding="same")(x)
-    return Activation("relu")(Add()([x, h]))
-
-
-def build_tcn_model_reg(input_shape, filters=64, levels=4):
-    inp = Input(shape=input_shape)
-    x = inp
-    for i in range(levels):
-        x = _tcn_block(x, filters, dilation_rate=2**i)
-    x = GlobalAveragePooling1D()(x)
-    out = Dense(1)(x)
-    return Model(inp, out, name="tcn_reg")
-
-
-def build_patchtst_model_reg(input_shape, patch_len=4, d_model=64, dff=128):
-    T, F = input_shape
-    P = math.ceil(T / patch_len)
-    pad_len = P * patch_len - T
-
-    inp = Input(shape=input_shape)
-    x = inp
-    if pad_len > 0:
-        x = ZeroPadding1D((0, pad_len))(x)
-    x = Reshape((P, patch_len * F))(x)
-    x = Dense(d_model)(x)
-    for _ in range(2):
-        x = TransformerEncoder(d_model, 4, dff)(x)
-    x = GlobalAveragePooling1D()(x)
-    out = Dense(1)(x)
-    return Model(inp, out, name="patchtst_like_reg")
-
-
-def build_tft_lite_model_reg(input_shape, d_model=64, dff=128):
-    inp = Input(shape=input_shape)
-    x = LSTM(d_model, return_sequences=True)(inp)
-    attn = MultiHeadAttention(key_dim=d_model, num_heads=4)(x, x, x)
-    x = LayerNormalization(epsilon=1e-6)(x + attn)
-    ffn = Dense(dff, activation="relu")(x)
-    ffn = Dense(d_model)(ffn)
-    x = LayerNormalization(epsilon=1e-6)(x + ffn)
-    x = GlobalAveragePooling1D()(x)
-    out = Dense(1)(x)
-    return Model(inp, out, name="tft_lite_reg")
-
-
-def build_attn_lstm_cnn_model_reg(input_shape):
-    inp = Input(shape=input_shape)
-    x = Conv1D(64, 3, padding="same")(inp)
-    x = Activation("relu")(x)
-    x = Conv1D(64, 3, padding="same")(x)
-    x = Activation("relu")(x)
-    x = LSTM(64, return_sequences=True)(x)
-    x = Attention()(x)
-    out = Dense(1)(x)
-    return Model(inp, out, name="attn_lstm_cnn_reg")
-
-
-# === 🔥 CHAMPION MODEL 로딩용 빌더 ===
-def build_champion_model(input_shape):
-    return load_model("app/artifacts_golden/CHAMPION_MODEL.keras")
-
-
-MODEL_BUILDERS = {
-    "lstm_attention_reg": build_lstm_with_attention_reg,
-    "gru_attention_reg": build_gru_with_attention_reg,
-    "transformer_reg": build_transformer_model_reg,
-    "tcn_reg": build_tcn_model_reg,
-    "patchtst_like_reg": build_patchtst_model_reg,
-    "tft_lite_reg": build_tft_lite_model_reg,
-    "attn_lstm_cnn_reg": build_attn_lstm_cnn_model_reg,
-    "champion_model": build_champion_model,   # ⭐ 추가됨
-}
+_startup_report: Dict[str, Any] = {}
+
+
+def _build_serving(
+    input_shape, report: Dict[str, Any], force: bool = False, strict: bool = False
+) -> _Serving:
+    input_shape = tuple(int(d) for d in input_shape)
+    compiled = None
+    source = "compiled"
+    if INFERENCE_PRECISION != "float32":
+        compiled = load_quantized_ensemble(INFERENCE_PRECISION, input_shape, report=report)
+        source = f"tflite-{INFERENCE_PRECISION}"
+    if compiled is None and USE_COMPILED_ARTIFACTS:
+        compiled = load_compiled_ensemble(input_shape, report=report)
+        source = "compiled"
+
+    if compiled is not None:
+        fn, names = compiled
+        if source == "compiled" and not fn.per_model:
+            print(
+                "[model_handler] ⚠️ compiled 아티팩트에 모델별 함수 없음 (v2) → pruning 된 모델도 "
+                "전체 그래프에서 계산되고 집계에서만 제외됨, 모델별 지연 측정 없음 "
+                "(python -m app.compiled_artifacts 로 다시 export)"
+            )
+        return _Serving(
+            input_shape=input_shape, source=source, ensemble_fn=fn,
+            fused_names=list(names), head_names=list(names),
+        )
+    return _keras_serving(input_shape, report, force=force, strict=strict)
+
+
+def _warmup(state: _Serving, sample: Optional[np.ndarray], report: Dict[str, Any]) -> None:
+    """그래프 첫 실행 비용을 교체 전에 치름 (sample: 최근 입력 window, 없으면 0)"""
+    if state.ensemble_fn is None:
+        return
+    if sample is None or tuple(sample.shape[1:]) != state.input_shape:
+        sample = np.zeros((1, *state.input_shape), dtype=np.float32)
+    t0 = time.perf_counter()
+    try:
+        state.ensemble_fn(tf.convert_to_tensor(np.asarray(sample, dtype=np.float32)))
+    except Exception as e:
+        print(f"[model_handler] ⚠️ warm-up 실패: {e}")
+    report["warmup"] = time.perf_counter() - t0
+
+
+def _ensure_loaded(input_shape) -> _Serving:
+    global _serving
+
+    state = _serving
+    if state is not None:
+        return state
+
+    with _load_lock:
+        if _serving is not None:
+            return _serving
+
+        t_total = time.perf_counter()
+        state = _build_serving(input_shape, _startup_report)
+        _startup_report["source"] = state.source
+        _warmup(state, None, _startup_report)
+
+        _startup_report["total"] = time.perf_counter() - t_total
+        _startup_report["heads"] = list(state.head_names)
+        print(
+            "[model_handler] 모델 준비 완료 — "
+            + ", ".join(
+                f"{k}={v:.2f}s" for k, v in _startup_report.items() if isinstance(v, float)
+            )
+            + f" (source={state.source})"
+        )
+        _serving = state
+        _watcher.start()
+        return state
+
+
+def get_startup_report() -> Dict[str, Any]:
+    return dict(_startup_report)
+
 
 # ======================================================================
-# 4) 모델 로딩
+# 4-3) Hot reload
+#   - 감시 스레드가 MODEL_WATCH_INTERVAL_SEC 마다 아티팩트 mtime 을 확인
+#     (쓰기 중인 파일을 읽지 않도록 mtime 이 한 주기 동안 그대로일 때 reload)
+#   - POST /models/reload 는 request_reload() 로 감시 스레드를 바로 깨움
+#   - reload: 새 상태 빌드 (registry checksum 이 같은 모델은 재사용) → 최근 입력으로 warm-up
+#     → _serving 참조 교체. 로드 실패 모델이 있으면 교체하지 않고 기존 모델 유지
+#   - 모델은 추론하는 프로세스마다 있으므로 process 실행기에서는 워커마다 감시 스레드가 돈다
 # ======================================================================
 
-_models: Dict[str, Model] = {}
-_input_shape = None
+_reload_status: Dict[str, Any] = {"reloads": 0, "failures": 0, "last": None}
+_last_input: Optional[np.ndarray] = None
 
-def load_models(input_shape):
-    global _models, _input_shape
-    _input_shape = input_shape
 
-    for name, weight_path in MODEL_WEIGHTS.items():
-        builder = MODEL_BUILDERS[name]
+def _watched_paths() -> List[Path]:
+    paths = [Path(spec.artifact) for spec in registry.specs.values()]
+    if USE_COMPILED_ARTIFACTS:
+        paths.append(COMPILED_MANIFEST_PATH)
+    if INFERENCE_PRECISION != "float32":
+        paths.append(QUANTIZED_MANIFEST_PATH)
+    return paths
+
+
+def _mtimes() -> Dict[str, Optional[float]]:
+    out = {}
+    for p in _watched_paths():
+        try:
+            out[str(p)] = p.stat().st_mtime
+        except OSError:
+            out[str(p)] = None
+    return out
+
+
+def reload_models(force: bool = False) -> Dict[str, Any]:
+    """
+    새 아티팩트로 서빙 상태를 만들어 교체 (호출 스레드에서 실행, 추론은 계속 이전 상태 사용).
+    force=True 면 checksum 이 같아도 모든 모델을 다시 로드.
+    """
+    global _serving
+
+    current = _serving
+    if current is None:
+        return {"status": "not_loaded"}
+
+    with _load_lock:
+        if (
+            not force
+            and current.source == "keras"
+            and not USE_COMPILED_ARTIFACTS
+            and INFERENCE_PRECISION == "float32"
+            and not registry.changed(current.models)
+        ):
+            # Keras 경로만 쓰고 가중치 checksum 이 그대로면 그래프를 다시 만들 필요 없음
+            _reload_status["last"] = {"status": "unchanged", "checked_at": time.time()}
+            return dict(_reload_status["last"])
+
+        t_total = time.perf_counter()
+        report: Dict[str, Any] = {}
         try:
-            model = builder(input_shape)
-            print(f"[model_handler] {name} 모델 초기화 성공")
-            _models[name] = model
+            state = _build_serving(current.input_shape, report, force=force, strict=True)
         except Exception as e:
-            print(f"[model_handler] ⚠️ {name} 초기화 실패: {e}")
+            _reload_status["failures"] += 1
+            _reload_status["last"] = {"status": "failed", "error": str(e)}
+            print(f"[model_handler] ⚠️ reload 실패 → 기존 모델 유지: {e}")
+            return dict(_reload_status["last"])
+
+        reg = report.get("registry", {}) if state.source == "keras" else {}
+        if (
+            not force
+            and state.source == current.source == "keras"
+            and not reg.get("loaded")
+            and list(state.models) == list(current.models)
+        ):
+            _reload_status["last"] = {"status": "unchanged", "checked_at": time.time()}
+            return dict(_reload_status["last"])
+
+        _warmup(state, _last_input, report)
+        _carry_over(current, state, _last_input)
+        _serving = state
+
+        _reload_status["reloads"] += 1
+        _reload_status["last"] = {
+            "status": "reloaded",
+            "source": state.source,
+            "reloaded_models": list(reg.get("loaded", state.head_names)),
+            "unchanged_models": list(reg.get("unchanged", [])),
+            "total_sec": round(time.perf_counter() - t_total, 3),
+            "reloaded_at": time.time(),
+            **{k: round(v, 3) for k, v in report.items() if isinstance(v, float)},
+        }
+        print(
+            f"[model_handler] 🔄 모델 교체 완료 (source={state.source}, "
+            f"재로드 {len(_reload_status['last']['reloaded_models'])}개, "
+            f"{_reload_status['last']['total_sec']:.2f}s)"
+        )
+        return dict(_reload_status["last"])
+
+
+def _carry_over(old: _Serving, new: _Serving, sample: Optional[np.ndarray]) -> None:
+    """교체 직후 tick 에서 trace 하지 않도록 이전 상태가 쓰던 pruning / 측정 그래프를 미리 준비"""
+    if new.ensemble_fn is None:
+        return
+    if sample is None or tuple(sample.shape[1:]) != new.input_shape:
+        sample = np.zeros((1, *new.input_shape), dtype=np.float32)
+    x = tf.convert_to_tensor(np.asarray(sample, dtype=np.float32))
+    try:
+        for names in list(old.subset_fns):
+            if all(n in new.fused_names for n in names):
+                fn = _subset_fn(new, names)
+                if fn is not None:
+                    fn(x)
+        for name in new.fused_names:
+            if name not in old.profile_fns:
+                continue
+            model = new.models.get(name)
+            if model is not None and old.models.get(name) is model:
+                new.profile_fns[name] = old.profile_fns[name]   # 같은 모델 객체 → 그래프 재사용
+            else:
+                _profile_fn(new, name, x)
+    except Exception as e:
+        print(f"[model_handler] ⚠️ 보조 그래프 준비 실패 (첫 사용 시 trace): {e}")
+
+
+class _ArtifactWatcher:
+    def __init__(self, interval: float = MODEL_WATCH_INTERVAL_SEC):
+        self.interval = float(interval)
+        self._thread: Optional[threading.Thread] = None
+        self._wake = threading.Event()
+        self._force = False
+
+    def start(self) -> None:
+        if self._thread is not None or self.interval <= 0:
+            return
+        self._thread = threading.Thread(target=self._run, name="model-watcher", daemon=True)
+        self._thread.start()
+
+    def request(self, force: bool = False) -> None:
+        self._force = self._force or force
+        self._wake.set()
+
+    def _run(self) -> None:
+        seen = _mtimes()
+        pending: Optional[Dict[str, Optional[float]]] = None
+        while True:
+            requested = self._wake.wait(self.interval)
+            self._wake.clear()
+
+            if requested:
+                force, self._force = self._force, False
+                seen, pending = _mtimes(), None
+                reload_models(force=force)
+                continue
+
+            now = _mtimes()
+            if now == seen:
+                pending = None
+                continue
+            if now != pending:
+                # 변경 감지 → 다음 주기까지 그대로인지 확인 (복사 중인 파일 방지)
+                pending = now
+                continue
+            seen, pending = now, None
+            print("[model_handler] 아티팩트 변경 감지 → 백그라운드 reload")
+            reload_models()
+
+
+_watcher = _ArtifactWatcher()
+
+
+def request_reload(force: bool = False) -> Dict[str, Any]:
+    """reload 를 감시 스레드에 맡기고 바로 반환 (POST /models/reload)"""
+    if _serving is None:
+        return {"status": "not_loaded"}
+    if _watcher.interval <= 0:
+        threading.Thread(target=reload_models, args=(force,), name="model-reload", daemon=True).start()
+    else:
+        _watcher.request(force)
+    return {"status": "scheduled", "force": force}
+
+
+def get_reload_status() -> Dict[str, Any]:
+    state = _serving
+    return {
+        **_reload_status,
+        "source": state.source if state is not None else None,
+        "heads": list(state.head_names) if state is not None else [],
+        "watch_interval_sec": _watcher.interval,
+    }
+
+
+# ----------------------------------------------------------------------
+# 모델별 추론 시간 측정
+#   fused 그래프는 1회 호출이라 모델별 시간이 보이지 않으므로
+#   METRICS_MODEL_PROFILE_EVERY 번에 1번 각 모델을 따로 실행해 측정
+#   Keras: 모델별 head 그래프 / compiled(v3)·TFLite: 아티팩트의 모델별 함수 (subset([name]))
+#   모델별 함수가 없는 compiled v2 아티팩트는 측정 불가 → /metrics 의 sigma_model_profile_enabled=0
+# ----------------------------------------------------------------------
+
+log = get_logger("model_handler")
+_profile_calls = 0
+
+
+def _per_model(state: _Serving) -> bool:
+    """모델을 하나씩 따로 실행할 수 있는 서빙 상태인지 (pruning 연산 절감 / 모델별 측정)"""
+    return bool(state.fused_models) or bool(getattr(state.ensemble_fn, "per_model", False))
+
+
+def _profile_fn(state: _Serving, name: str, x):
+    fn = state.profile_fns.get(name)
+    if fn is None:
+        if state.fused_models:
+            fn = _head_fn(state.fused_models[state.fused_names.index(name)], state.input_shape)
+        elif _per_model(state):
+            fn = state.ensemble_fn.subset([name])
+        else:
+            return None
+        fn(x)  # trace 는 측정에서 제외
+        state.profile_fns[name] = fn
+    return fn
+
+
+def _profile_models(state: _Serving, x) -> None:
+    for name in state.fused_names:
+        fn = _profile_fn(state, name, x)
+        if fn is None:
+            return
+        t0 = time.perf_counter()
+        np.asarray(fn(x))
+        observe_model(name, time.perf_counter() - t0)
+
+
+def get_profile_enabled() -> bool:
+    """모델별 추론 시간이 sigma_model_inference_seconds 에 기록되는지 (/metrics gauge)"""
+    state = _serving
+    return (
+        state is not None
+        and METRICS_MODEL_PROFILE_EVERY > 0
+        and state.ensemble_fn is not None
+        and _per_model(state)
+    )
+
+
+def _fallback_serving(state: _Serving) -> _Serving:
+    """
+    compiled / TFLite 그래프 호출이 실패했을 때 그 호출에만 쓰는 Keras 서빙 상태.
+    서빙 상태마다 1번 (_load_lock 안에서) 빌드 + warm-up 해 두고 재사용하며,
+    _serving 은 바꾸지 않으므로 일시적 오류 뒤에도 다음 호출은 다시 compiled 그래프를 쓴다.
+    """
+    if state.fallback is None:
+        with _load_lock:
+            if state.fallback is None:
+                report: Dict[str, Any] = {}
+                fallback = _keras_serving(state.input_shape, report)
+                _warmup(fallback, _last_input, report)
+                state.fallback = fallback
+    return state.fallback
+
+
+def _predict_all(
+    state: _Serving, model_input: np.ndarray, skip: FrozenSet[str] = frozenset()
+) -> Dict[str, np.ndarray]:
+    """
+    모델의 스케일된 예측값을 {name: (batch,) 배열} 로 반환.
+    fused 그래프 1회 호출 + 그래프에 포함되지 못한 모델만 개별 predict.
+    skip 에 있는 모델은 아예 실행하지 않는다 (Keras / compiled v3 / TFLite,
+    모델별 함수가 없는 compiled v2 아티팩트만 전체 그래프를 실행하고 결과에서 제외).
+    """
+    batch = int(model_input.shape[0])
+    preds: Dict[str, np.ndarray] = {}
+
+    global _profile_calls
+
+    if state.ensemble_fn is not None:
+        fn, names = state.ensemble_fn, state.fused_names
+        if skip:
+            active = tuple(n for n in state.fused_names if n not in skip)
+            if active and len(active) < len(state.fused_names):
+                subset = _subset_fn(state, active)
+                if subset is not None:
+                    fn, names = subset, list(active)
+
+        try:
+            x = tf.convert_to_tensor(np.asarray(model_input, dtype=np.float32))
+            t0 = time.perf_counter()
+            heads = np.asarray(fn(x))
+            observe_model("fused", time.perf_counter() - t0)
+            preds = {name: heads[:, i] for i, name in enumerate(names)}
+
+            _profile_calls += 1
+            if (
+                fn is state.ensemble_fn
+                and METRICS_MODEL_PROFILE_EVERY > 0
+                and _profile_calls % METRICS_MODEL_PROFILE_EVERY == 1
+            ):
+                try:
+                    _profile_models(state, x)
+                except Exception as e:
+                    log.warning("모델별 측정 실패", error=e)
+        except Exception as e:
+            preds = {}
+            if not state.models:
+                # compiled / TFLite 그래프만 있던 경우 → 이번 호출만 Keras 모델로 (서빙 상태는 유지)
+                log.warning("compiled 추론 실패 → 이번 호출은 Keras 모델 사용", error=e)
+                return _predict_all(_fallback_serving(state), model_input, skip)
+            log.warning("fused 추론 실패 → 모델별 predict", error=e)
+
+    for name, model in state.models.items():
+        if name in preds or name in skip:
+            continue
+        try:
+            t0 = time.perf_counter()
+            out = model.predict(model_input, verbose=0)
+            observe_model(name, time.perf_counter() - t0)
+            preds[name] = np.asarray(out, dtype=float).reshape(batch, -1)[:, 0]
+        except Exception:
+            preds[name] = np.full(batch, 0.5)  # fallback
+
+    # 등록 순서 유지
+    return {name: preds[name] for name in state.head_names if name in preds}
+
+
+# ----------------------------------------------------------------------
+# 증분(streaming) 추론 (STREAMING_INFERENCE=true)
+#   Keras 모델이 있을 때만 (compiled / TFLite 경로는 가중치를 꺼낼 수 없어 사용 안 함)
+#   서빙 상태마다 따로 만들어지므로 reload 후에는 새 가중치로 상태를 다시 계산
+# ----------------------------------------------------------------------
+
+def _get_streaming(state: _Serving) -> Optional[StreamingInference]:
+    if state.streaming_checked:
+        return state.streaming
+    state.streaming_checked = True
+
+    models = {n: state.models[n] for n in STREAMING_MODELS if n in state.models}
+    if not models:
+        print("[model_handler] ⚠️ 증분 추론: Keras 모델 없음 (compiled/TFLite 경로) → 사용 안 함")
+        return None
+    engine = StreamingInference(models, int(state.input_shape[0]))
+    if engine.names:
+        state.streaming = engine
+        print(f"[model_handler] 증분 추론 사용: {', '.join(engine.names)}")
+    return state.streaming
+
+
+def get_streaming_stats() -> Optional[Dict[str, Any]]:
+    state = _serving
+    if state is None or state.streaming is None:
+        return None
+    return state.streaming.stats()
 
 
 # ======================================================================
@@ -265,46 +656,82 @@ def signal_to_confidence(sig: float) -> float:
 # 6) 예측 실행
 # ======================================================================
 
-def run_inference(model_input: np.ndarray) -> Dict[str, Any]:
-    global _models
-
-    if not _models:
-        load_models(model_input.shape[1:])
-
-    outputs = []
-    raw_preds: Dict[str, float] = {}
-
-    w_sum, w_tot = 0.0, 0.0
-
-    for name, model in _models.items():
-        try:
-            p_scaled = float(model.predict(model_input, verbose=0)[0][0])
-        except Exception:
-            p_scaled = 0.5  # fallback
-
-        sig = scaled_to_signal(p_scaled)
-        conf = signal_to_confidence(sig)
-
-        outputs.append({
-            "name": name,
-            "signal": sig,
-            "confidence": conf,
+def run_inference_batch(
+    model_input: np.ndarray,
+    weights: Optional[Dict[str, float]] = None,
+    skip: Optional[Iterable[str]] = None,
+    stream_keys: Optional[List[Tuple[str, int]]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    (batch, SEQ_LEN, 16) 입력 → 샘플(심볼)별 앙상블 결과 리스트.
+    여러 심볼의 window 를 한 번의 forward pass 로 처리한다.
+
+    weights    : 모델별 성적 가중치 (model_scoreboard), confidence 가중치에 곱함
+    skip       : 이번에 실행/집계하지 않을 모델 (pruning)
+    stream_keys: 샘플별 (심볼, 누적 bar 수) — STREAMING_INFERENCE 일 때 증분 추론 상태 키
+    """
+    global _last_input
+
+    state = _ensure_loaded(tuple(model_input.shape[1:]))
+    _last_input = model_input[:1]
+
+    skip = frozenset(skip or ())
+    streamed: Dict[str, np.ndarray] = {}
+    if STREAMING_INFERENCE and stream_keys is not None:
+        engine = _get_streaming(state)
+        if engine is not None:
+            t0 = time.perf_counter()
+            streamed = engine.predict(model_input, stream_keys, skip)
+            observe_model("streaming", time.perf_counter() - t0)
+
+    preds = _predict_all(state, model_input, skip | frozenset(streamed))
+    if streamed:
+        preds.update(streamed)
+        preds = {name: preds[name] for name in state.head_names if name in preds}
+
+    results = []
+    for b in range(int(model_input.shape[0])):
+        outputs = []
+        raw_preds: Dict[str, float] = {}
+
+        w_sum, w_tot = 0.0, 0.0
+
+        for name, p_batch in preds.items():
+            if name in skip:
+                continue
+            p_scaled = float(p_batch[b])
+            sig = scaled_to_signal(p_scaled)
+            conf = signal_to_confidence(sig)
+            weight = weights.get(name, 1.0) if weights else 1.0
+
+            outputs.append({
+                "name": name,
+                "signal": sig,
+                "confidence": conf,
+                "weight": round(weight, 4),
+            })
+
+            raw_preds[name] = p_scaled
+
+            w_sum += sig * conf * weight
+            w_tot += conf * weight
+
+        ensemble = w_sum / w_tot if w_tot > 0 else 0.0
+        meta_prob = 1.0 / (1.0 + math.exp(-ensemble * 4.0))
+
+        results.append({
+            "models": outputs,
+            "ensemble_score": ensemble,
+            "raw_preds": raw_preds,
+            "meta_probability": meta_prob,
+            "pruned": sorted(skip.intersection(state.head_names)),
         })
 
-        raw_preds[name] = p_scaled
+    return results
 
-        w_sum += sig * conf
-        w_tot += conf
 
-    ensemble = w_sum / w_tot if w_tot > 0 else 0.0
-    meta_prob = 1.0 / (1.0 + math.exp(-ensemble * 4.0))
-
-    return {
-        "models": outputs,
-        "ensemble_score": ensemble,
-        "raw_preds": raw_preds,
-        "meta_probability": meta_prob,
-    }
+def run_inference(model_input: np.ndarray) -> Dict[str, Any]:
+    return run_inference_batch(model_input)[0]
 
 
 # ======================================================================
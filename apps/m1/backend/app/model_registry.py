@@ -0,0 +1,502 @@
+# model_registry.py
+"""
+SIGMA A 프로젝트 - 모델 레지스트리 (모델 정의 단일화 + 지연 병렬 로딩)
+
+- 커스텀 레이어 / 7개 회귀 모델 빌더 (학습 구조 그대로) / champion 로더를 한 곳에 둔다
+  (model_handler, model_runner, backtest, quantize 가 모두 여기서 가져감)
+- REGISTRY 항목마다 빌더, 아티팩트 경로, 로딩 방식, 입력 signature, warm-up 정책을 선언
+- ModelRegistry.load() : 첫 사용 시 필요한 모델만 스레드 풀에서 병렬 로드
+  아티팩트 sha256 이 이전 로드와 같으면 다시 만들지 않고 기존 모델을 그대로 반환
+- 아티팩트가 없거나 로드에 실패한 모델은 랜덤 가중치로 쓰지 않고 제외
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import tensorflow as tf
+from tensorflow.keras import Model, regularizers
+from tensorflow.keras.layers import (
+    Layer,
+    LayerNormalization,
+    Dropout,
+    Dense,
+    GlobalAveragePooling1D,
+    MultiHeadAttention,
+    Input,
+    LSTM,
+    GRU,
+    Conv1D,
+    Add,
+    Activation,
+    ZeroPadding1D,
+    Reshape,
+)
+from tensorflow.keras.models import load_model
+
+from .config import (
+    MODEL_WEIGHTS,
+    SEQ_LEN,
+    N_FEATURES,
+    REGISTRY_LOAD_WORKERS,
+)
+from .compiled_artifacts import file_sha256
+
+
+# ======================================================================
+# 1. 커스텀 레이어 (Attention / PositionalEncoding / TransformerEncoder)
+# ======================================================================
+
+class Attention(Layer):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+
+    def build(self, input_shape):
+        self.W = self.add_weight(
+            name="att_weight",
+            shape=(input_shape[-1], 1),
+            initializer="glorot_uniform",
+        )
+        self.b = self.add_weight(
+            name="att_bias",
+            shape=(input_shape[1], 1),
+            initializer="zeros",
+        )
+        super().build(input_shape)
+
+    def call(self, x):
+        # x: (batch, time, features)
+        et = tf.squeeze(tf.tanh(tf.matmul(x, self.W) + self.b), axis=-1)
+        at = tf.nn.softmax(et, axis=-1)
+        at = tf.expand_dims(at, axis=-1)
+        return tf.reduce_sum(x * at, axis=1)
+
+
+class PositionalEncoding(Layer):
+    def __init__(self, position, d_model, **kwargs):
+        super().__init__(**kwargs)
+        self.position = int(position)
+        self.d_model = int(d_model)
+        self.pos_encoding = self._positional_encoding(self.position, self.d_model)
+
+    def get_config(self):
+        cfg = super().get_config()
+        cfg.update({"position": self.position, "d_model": self.d_model})
+        return cfg
+
+    def _get_angles(self, position, i, d_model):
+        angle_rates = 1.0 / tf.pow(
+            10000.0, (2 * (i // 2)) / tf.cast(d_model, tf.float32)
+        )
+        return tf.cast(position, tf.float32) * angle_rates
+
+    def _positional_encoding(self, position, d_model):
+        angle_rads = self._get_angles(
+            tf.range(position, dtype=tf.float32)[:, tf.newaxis],
+            tf.range(d_model, dtype=tf.float32)[tf.newaxis, :],
+            d_model,
+        )
+        sines = tf.math.sin(angle_rads[:, 0::2])
+        cosines = tf.math.cos(angle_rads[:, 1::2])
+        pos_encoding = tf.concat([sines, cosines], axis=-1)[tf.newaxis, ...]
+        return pos_encoding
+
+    def call(self, inputs):
+        return inputs + self.pos_encoding[:, : tf.shape(inputs)[1], :]
+
+
+class TransformerEncoder(Layer):
+    def __init__(self, d_model, num_heads, dff, rate=0.1, **kwargs):
+        super().__init__(**kwargs)
+        self.d_model = int(d_model)
+        self.num_heads = int(num_heads)
+        self.dff = int(dff)
+        self.rate = float(rate)
+
+        self.mha = MultiHeadAttention(key_dim=self.d_model, num_heads=self.num_heads)
+        self.ffn = tf.keras.Sequential(
+            [Dense(self.dff, activation="relu"), Dense(self.d_model)]
+        )
+        self.norm1 = LayerNormalization(epsilon=1e-6)
+        self.norm2 = LayerNormalization(epsilon=1e-6)
+        self.drop1 = Dropout(self.rate)
+        self.drop2 = Dropout(self.rate)
+
+    def get_config(self):
+        cfg = super().get_config()
+        cfg.update(
+            {
+                "d_model": self.d_model,
+                "num_heads": self.num_heads,
+                "dff": self.dff,
+                "rate": self.rate,
+            }
+        )
+        return cfg
+
+    def call(self, x, training=False):
+        attn = self.mha(x, x, x)
+        attn = self.drop1(attn, training=training)
+        out1 = self.norm1(x + attn)
+        ffn = self.ffn(out1)
+        ffn = self.drop2(ffn, training=training)
+        return self.norm2(out1 + ffn)
+
+
+# ======================================================================
+# 2. 모델 빌더 (학습 때 사용한 구조를 그대로 복원 — tmp_*.weights.h5 와 호환)
+# ======================================================================
+
+L2_REG = 1e-5  # 학습 코드와 동일한 정규화 강도
+
+def build_lstm_with_attention_reg(input_shape):
+    inp = Input(shape=input_shape)
+    x = LSTM(
+        64,
+        return_sequences=True,
+        dropout=0.2,
+        kernel_regularizer=regularizers.l2(L2_REG),
+    )(inp)
+    x = Attention()(x)
+    out = Dense(1)(x)
+    return Model(inp, out, name="lstm_attention_reg")
+
+
+def build_gru_with_attention_reg(input_shape):
+    inp = Input(shape=input_shape)
+    x = GRU(
+        64,
+        return_sequences=True,
+        dropout=0.2,
+        kernel_regularizer=regularizers.l2(L2_REG),
+    )(inp)
+    x = Attention()(x)
+    out = Dense(1)(x)
+    return Model(inp, out, name="gru_attention_reg")
+
+
+def build_transformer_model_reg(
+    input_shape, d_model=64, num_heads=4, dff=128, num_encoders=2, rate=0.1
+):
+    inp = Input(shape=input_shape)
+    x = Dense(d_model, kernel_regularizer=regularizers.l2(L2_REG))(inp)
+    x = PositionalEncoding(int(input_shape[0]), int(d_model))(x)
+    for _ in range(num_encoders):
+        x = TransformerEncoder(d_model, num_heads, dff, rate)(x)
+    x = GlobalAveragePooling1D()(x)
+    x = Dropout(0.2)(x)
+    out = Dense(1)(x)
+    return Model(inp, out, name="transformer_reg")
+
+
+def _tcn_block_reg(x, filters, kernel_size=3, dilation_rate=1, dropout=0.1):
+    h = Conv1D(
+        filters,
+        kernel_size,
+        padding="causal",
+        dilation_rate=dilation_rate,
+        kernel_regularizer=regularizers.l2(L2_REG),
+    )(x)
+    h = LayerNormalization(epsilon=1e-6)(h)
+    h = Activation("relu")(h)
+    h = Dropout(dropout)(h)
+    h = Conv1D(
+        filters,
+        kernel_size,
+        padding="causal",
+        dilation_rate=dilation_rate,
+        kernel_regularizer=regularizers.l2(L2_REG),
+    )(h)
+    h = LayerNormalization(epsilon=1e-6)(h)
+    if x.shape[-1] != filters:
+        x = Conv1D(filters, 1, padding="same")(x)
+    return Activation("relu")(Add()([x, h]))
+
+
+def build_tcn_model_reg(input_shape, filters=64, levels=4, kernel_size=3, dropout=0.1):
+    inp = Input(shape=input_shape)
+    x = inp
+    for i in range(levels):
+        x = _tcn_block_reg(
+            x,
+            filters=filters,
+            kernel_size=kernel_size,
+            dilation_rate=2**i,
+            dropout=dropout,
+        )
+    x = GlobalAveragePooling1D()(x)
+    x = Dropout(0.2)(x)
+    out = Dense(1)(x)
+    return Model(inp, out, name="tcn_reg")
+
+
+def build_patchtst_model_reg(
+    input_shape, patch_len=4, d_model=64, num_heads=4, dff=128, num_encoders=2, rate=0.1
+):
+    T, F = int(input_shape[0]), int(input_shape[1])
+    P = math.ceil(T / patch_len)
+    pad_len = P * patch_len - T
+
+    inp = Input(shape=input_shape)
+    x = inp
+    if pad_len > 0:
+        x = ZeroPadding1D(padding=(0, pad_len))(x)
+    x = Reshape((P, patch_len * F))(x)
+    x = Dense(d_model, kernel_regularizer=regularizers.l2(L2_REG))(x)
+    for _ in range(num_encoders):
+        x = TransformerEncoder(
+            d_model=d_model, num_heads=num_heads, dff=dff, rate=rate
+        )(x)
+    x = GlobalAveragePooling1D()(x)
+    x = Dropout(0.2)(x)
+    out = Dense(1)(x)
+    return Model(inp, out, name="patchtst_like_reg")
+
+
+def build_tft_lite_model_reg(
+    input_shape, d_model=64, num_heads=4, dff=128, rate=0.1
+):
+    inp = Input(shape=input_shape)
+    x = LSTM(
+        d_model, return_sequences=True, kernel_regularizer=regularizers.l2(L2_REG)
+    )(inp)
+    attn = MultiHeadAttention(key_dim=d_model, num_heads=num_heads)(x, x, x)
+    x1 = LayerNormalization(epsilon=1e-6)(x + attn)
+    ffn = Dense(dff, activation="relu")(x1)
+    ffn = Dropout(rate)(ffn)
+    ffn = Dense(d_model)(ffn)
+    x2 = LayerNormalization(epsilon=1e-6)(x1 + ffn)
+    x2 = GlobalAveragePooling1D()(x2)
+    x2 = Dropout(0.2)(x2)
+    out = Dense(1)(x2)
+    return Model(inp, out, name="tft_lite_reg")
+
+
+def build_attn_lstm_cnn_model_reg(
+    input_shape, filters=64, kernel_size=3, lstm_units=64, rate=0.1
+):
+    inp = Input(shape=input_shape)
+    x = Conv1D(
+        filters, kernel_size, padding="same", kernel_regularizer=regularizers.l2(L2_REG)
+    )(inp)
+    x = Activation("relu")(x)
+    x = Conv1D(
+        filters, kernel_size, padding="same", kernel_regularizer=regularizers.l2(L2_REG)
+    )(x)
+    x = Activation("relu")(x)
+    x = LSTM(
+        lstm_units,
+        return_sequences=True,
+        kernel_regularizer=regularizers.l2(L2_REG),
+    )(x)
+    x = Attention()(x)
+    x = Dropout(rate)(x)
+    out = Dense(1)(x)
+    return Model(inp, out, name="attn_lstm_cnn_reg")
+
+
+# === CHAMPION MODEL (.keras 전체 저장본) ===
+CUSTOM_OBJECTS = {
+    cls.__name__: cls for cls in (Attention, PositionalEncoding, TransformerEncoder)
+}
+# 학습 시 register 된 이름 ("Custom>...") 으로 저장된 경우도 찾을 수 있도록
+CUSTOM_OBJECTS.update({f"Custom>{k}": v for k, v in list(CUSTOM_OBJECTS.items())})
+
+
+def build_champion_model(input_shape, path: Path = MODEL_WEIGHTS["champion_model"]):
+    return load_model(path, custom_objects=CUSTOM_OBJECTS, compile=False)
+
+
+# ======================================================================
+# 3. 레지스트리 항목
+# ======================================================================
+
+@dataclass(frozen=True)
+class ModelSpec:
+    name: str
+    builder: Callable[..., Model]
+    artifact: Path
+    load: str = "weights"              # weights: builder 후 load_weights / model: 아티팩트에서 모델 전체 로드
+    input_shape: Tuple[int, int] = (SEQ_LEN, N_FEATURES)
+    warmup: str = "none"               # none: fused 그래프 trace 가 대신함 / call: 로드 직후 1회 호출
+
+
+REGISTRY: Dict[str, ModelSpec] = {
+    spec.name: spec
+    for spec in (
+        ModelSpec("gru_attention_reg", build_gru_with_attention_reg, MODEL_WEIGHTS["gru_attention_reg"]),
+        ModelSpec("lstm_attention_reg", build_lstm_with_attention_reg, MODEL_WEIGHTS["lstm_attention_reg"]),
+        ModelSpec("transformer_reg", build_transformer_model_reg, MODEL_WEIGHTS["transformer_reg"]),
+        ModelSpec("tcn_reg", build_tcn_model_reg, MODEL_WEIGHTS["tcn_reg"]),
+        ModelSpec("patchtst_like_reg", build_patchtst_model_reg, MODEL_WEIGHTS["patchtst_like_reg"]),
+        ModelSpec("tft_lite_reg", build_tft_lite_model_reg, MODEL_WEIGHTS["tft_lite_reg"]),
+        ModelSpec("attn_lstm_cnn_reg", build_attn_lstm_cnn_model_reg, MODEL_WEIGHTS["attn_lstm_cnn_reg"]),
+        # .keras 역직렬화 후 일부 커스텀 레이어가 build 되지 않은 상태라 로드 직후 1회 호출
+        ModelSpec("champion_model", build_champion_model, MODEL_WEIGHTS["champion_model"],
+                  load="model", warmup="call"),
+    )
+}
+
+# 학습 구조 빌더 (가중치 없는 모델 생성용)
+MODEL_BUILDERS = {
+    name: spec.builder for name, spec in REGISTRY.items() if spec.load == "weights"
+}
+
+
+# ======================================================================
+# 4. 지연 병렬 로딩 + checksum 캐시
+# ======================================================================
+
+@dataclass
+class LoadedModel:
+    model: Model
+    sha256: str
+    input_shape: Tuple[int, ...]
+    load_sec: float
+
+
+class ModelRegistry:
+    def __init__(self, specs: Dict[str, ModelSpec] = REGISTRY, workers: int = REGISTRY_LOAD_WORKERS):
+        self.specs = specs
+        self.workers = max(1, int(workers))
+        self._loaded: Dict[str, LoadedModel] = {}
+        # 아티팩트 경로 → (mtime_ns, size, sha256): stat 이 같으면 다시 해시하지 않음
+        self._shas: Dict[str, Tuple[int, int, str]] = {}
+        self._lock = threading.Lock()
+        self.last_report: Dict[str, Any] = {}
+
+    def _artifact_sha(self, path: Path, force: bool = False) -> str:
+        """
+        아티팩트 checksum. mtime / 크기가 그대로면 캐시된 값을 사용
+        (run_models 처럼 매 호출 load() 해도 ~10MB 가중치를 매번 해시하지 않음)
+        force=True 면 stat 과 무관하게 다시 계산.
+        """
+        st = path.stat()
+        cached = self._shas.get(str(path))
+        if not force and cached is not None and cached[:2] == (st.st_mtime_ns, st.st_size):
+            return cached[2]
+        sha = file_sha256(path)
+        self._shas[str(path)] = (st.st_mtime_ns, st.st_size, sha)
+        return sha
+
+    def _build(self, spec: ModelSpec, input_shape: Tuple[int, ...]) -> Model:
+        if spec.load == "model":
+            model = spec.builder(input_shape, spec.artifact)
+        else:
+            model = spec.builder(input_shape)
+            model.load_weights(str(spec.artifact))
+
+        got = tuple(int(d) for d in model.input_shape[1:])
+        if got != tuple(input_shape):
+            raise ValueError(f"입력 shape 불일치: {got} != {tuple(input_shape)}")
+
+        if spec.warmup == "call":
+            model(tf.zeros((1, *input_shape), dtype=tf.float32), training=False)
+        return model
+
+    def _load_one(self, spec: ModelSpec, input_shape: Tuple[int, ...], sha: str) -> LoadedModel:
+        t0 = time.perf_counter()
+        model = self._build(spec, input_shape)
+        return LoadedModel(model, sha, tuple(input_shape), time.perf_counter() - t0)
+
+    def load(
+        self,
+        names: Optional[Iterable[str]] = None,
+        input_shape: Optional[Tuple[int, ...]] = None,
+        force: bool = False,
+    ) -> Dict[str, Model]:
+        """
+        names (기본: 전체) 모델을 반환. 아직 없거나 아티팩트가 바뀐 모델만 병렬로 (다시) 로드.
+        반환 순서는 REGISTRY 순서.
+        """
+        names = [n for n in (names or self.specs) if n in self.specs]
+        t_total = time.perf_counter()
+
+        with self._lock:
+            todo: List[Tuple[ModelSpec, Tuple[int, ...], str]] = []
+            skipped, failed = [], {}
+            for name in names:
+                spec = self.specs[name]
+                shape = tuple(int(d) for d in (input_shape or spec.input_shape))
+                if not Path(spec.artifact).exists():
+                    failed[name] = f"아티팩트 없음: {spec.artifact}"
+                    continue
+                sha = self._artifact_sha(Path(spec.artifact), force=force)
+                cached = self._loaded.get(name)
+                if not force and cached is not None and cached.sha256 == sha and cached.input_shape == shape:
+                    skipped.append(name)
+                    continue
+                todo.append((spec, shape, sha))
+
+            loaded = []
+            if todo:
+                with ThreadPoolExecutor(
+                    max_workers=min(self.workers, len(todo)), thread_name_prefix="model-load"
+                ) as pool:
+                    futures = {
+                        spec.name: pool.submit(self._load_one, spec, shape, sha)
+                        for spec, shape, sha in todo
+                    }
+                for name, fut in futures.items():
+                    try:
+                        self._loaded[name] = fut.result()
+                        loaded.append(name)
+                    except Exception as e:
+                        failed[name] = str(e)
+
+            for name, err in failed.items():
+                print(f"[model_registry] ⚠️ {name} 제외: {err}")
+            if loaded:
+                print(
+                    f"[model_registry] 로드 완료 {len(loaded)}개 "
+                    f"(변경 없음 {len(skipped)}개, {time.perf_counter() - t_total:.2f}s)"
+                )
+
+            self.last_report = {
+                "loaded": loaded,
+                "unchanged": skipped,
+                "failed": failed,
+                "total_sec": time.perf_counter() - t_total,
+            }
+            return {
+                name: self._loaded[name].model
+                for name in self.specs
+                if name in names and name in self._loaded and name not in failed
+            }
+
+    def get(self, name: str, input_shape: Optional[Tuple[int, ...]] = None) -> Optional[Model]:
+        return self.load([name], input_shape).get(name)
+
+    def changed(self, names: Optional[Iterable[str]] = None) -> List[str]:
+        """로드된 모델 중 아티팩트 checksum 이 바뀐 (또는 아직 로드되지 않은) 모델"""
+        out = []
+        for name in names or self.specs:
+            spec = self.specs[name]
+            cached = self._loaded.get(name)
+            if not Path(spec.artifact).exists():
+                continue
+            if cached is None or cached.sha256 != self._artifact_sha(Path(spec.artifact)):
+                out.append(name)
+        return out
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            name: {
+                "artifact": str(spec.artifact),
+                "loaded": name in self._loaded,
+                "sha256": self._loaded[name].sha256 if name in self._loaded else None,
+                "load_sec": round(self._loaded[name].load_sec, 3) if name in self._loaded else None,
+            }
+            for name, spec in self.specs.items()
+        }
+
+
+# 서버 전체에서 공유하는 레지스트리
+registry = ModelRegistry()
@@ -0,0 +1,151 @@
+# model_scoreboard.py
+"""
+SIGMA A 프로젝트 - 실시간 모델 성적표 (동적 가중치 / pruning)
+
+- 매 tick 모델별 signal 방향을 기록하고, SCOREBOARD_HORIZON_TICKS tick 뒤 가격으로 채점
+  (가격 변화 0 인 구간은 채점하지 않음)
+- 정답/관측 수는 지수 감쇠 (반감기 SCOREBOARD_HALF_LIFE 회 채점)
+- accuracy = (hits + 1) / (obs + 2)   (Beta(1,1) prior → 초기엔 0.5)
+- weight   = 2 × accuracy             (50% 적중 = 1.0, 기존 confidence 가중치에 곱함)
+- 관측이 SCOREBOARD_MIN_OBS 이상이고 weight < SCOREBOARD_PRUNE_BELOW 인 모델은 추론에서 제외
+  (최소 SCOREBOARD_MIN_ACTIVE 개는 유지)
+- 제외된 모델도 SCOREBOARD_REPROBE_EVERY tick 마다 전체 추론에 포함해 다시 채점 → 회복 가능
+
+가중치/제외 목록은 plan() 으로 꺼내 run_inference_batch 인자로 넘긴다
+(process 실행기에서도 같은 값이 쓰이도록).
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from typing import Any, Deque, Dict, FrozenSet, Optional, Tuple
+
+from .config import (
+    SCOREBOARD_ENABLED,
+    SCOREBOARD_HORIZON_TICKS,
+    SCOREBOARD_HALF_LIFE,
+    SCOREBOARD_MIN_OBS,
+    SCOREBOARD_PRUNE_BELOW,
+    SCOREBOARD_MIN_ACTIVE,
+    SCOREBOARD_REPROBE_EVERY,
+)
+
+ENSEMBLE = "ensemble"
+
+
+class ModelScoreboard:
+    def __init__(
+        self,
+        horizon: int = SCOREBOARD_HORIZON_TICKS,
+        half_life: float = SCOREBOARD_HALF_LIFE,
+        min_obs: float = SCOREBOARD_MIN_OBS,
+        prune_below: float = SCOREBOARD_PRUNE_BELOW,
+        min_active: int = SCOREBOARD_MIN_ACTIVE,
+        reprobe_every: int = SCOREBOARD_REPROBE_EVERY,
+        enabled: bool = SCOREBOARD_ENABLED,
+    ):
+        self.horizon = max(1, int(horizon))
+        self.decay = 0.5 ** (1.0 / max(1.0, float(half_life)))
+        self.min_obs = float(min_obs)
+        self.prune_below = float(prune_below)
+        self.min_active = max(1, int(min_active))
+        self.reprobe_every = int(reprobe_every)
+        self.enabled = enabled
+
+        self._hits: Dict[str, float] = {}
+        self._obs: Dict[str, float] = {}
+        self._ticks: Dict[str, int] = {}
+        self._pending: Dict[str, Deque[Tuple[int, float, Dict[str, float]]]] = {}
+        self._plans = 0
+
+        # (weights, pruned) — 통째로 교체하므로 다른 스레드에서 읽어도 일관됨
+        self._snapshot: Tuple[Dict[str, float], FrozenSet[str]] = ({}, frozenset())
+
+    # ------------------------------------------------------------
+    # 채점
+    # ------------------------------------------------------------
+
+    def record(self, symbol: str, price: Optional[float], signals: Dict[str, float]) -> None:
+        """
+        이번 tick 의 모델별 signal 기록 + horizon 이 지난 이전 예측 채점.
+        signals: {model_name: signal(-1~1)} (ensemble 포함 가능)
+        """
+        if not self.enabled or price is None:
+            return
+
+        n = self._ticks[symbol] = self._ticks.get(symbol, 0) + 1
+        queue = self._pending.setdefault(symbol, deque())
+
+        scored = False
+        while queue and n - queue[0][0] >= self.horizon:
+            _, p0, past = queue.popleft()
+            move = price - p0
+            if move == 0:
+                continue
+            up = move > 0
+            for name, sig in past.items():
+                if sig == 0:
+                    continue
+                hit = 1.0 if (sig > 0) == up else 0.0
+                self._hits[name] = self.decay * self._hits.get(name, 0.0) + hit
+                self._obs[name] = self.decay * self._obs.get(name, 0.0) + 1.0
+            scored = True
+
+        queue.append((n, float(price), dict(signals)))
+        if scored:
+            self._publish()
+
+    def accuracy(self, name: str) -> float:
+        return (self._hits.get(name, 0.0) + 1.0) / (self._obs.get(name, 0.0) + 2.0)
+
+    def _publish(self) -> None:
+        names = [n for n in self._obs if n != ENSEMBLE]
+        weights = {n: 2.0 * self.accuracy(n) for n in names}
+
+        candidates = sorted(
+            (n for n in names if self._obs[n] >= self.min_obs and weights[n] < self.prune_below),
+            key=lambda n: weights[n],
+        )
+        max_pruned = max(0, len(names) - self.min_active)
+        self._snapshot = (weights, frozenset(candidates[:max_pruned]))
+
+    # ------------------------------------------------------------
+    # 추론 계획
+    # ------------------------------------------------------------
+
+    def plan(self) -> Tuple[Optional[Dict[str, float]], Optional[FrozenSet[str]]]:
+        """
+        반환: (모델별 가중치 또는 None, 이번 tick 에 제외할 모델 또는 None)
+        REPROBE tick 에는 제외 없이 전체 모델을 실행해 제외된 모델도 다시 채점한다.
+        """
+        if not self.enabled:
+            return None, None
+
+        weights, pruned = self._snapshot
+        self._plans += 1
+        if not pruned or (self.reprobe_every > 0 and self._plans % self.reprobe_every == 0):
+            return weights or None, None
+        return weights or None, pruned
+
+    def pruned(self) -> FrozenSet[str]:
+        return self._snapshot[1]
+
+    def stats(self) -> Dict[str, Any]:
+        weights, pruned = self._snapshot
+        return {
+            "enabled": self.enabled,
+            "horizon_ticks": self.horizon,
+            "models": {
+                name: {
+                    "accuracy": round(self.accuracy(name), 4),
+                    "observations": round(self._obs.get(name, 0.0), 1),
+                    "weight": round(weights.get(name, 1.0), 4),
+                    "pruned": name in pruned,
+                }
+                for name in sorted(self._obs)
+            },
+        }
+
+
+# 서버 전체에서 공유하는 성적표
+model_scoreboard = ModelScoreboard()
@@ -0,0 +1,399 @@
+# quantize.py
+"""
+SIGMA A 프로젝트 - 양자화(TFLite int8 / float16) 추론 모드
+
+빌드:
+    cd apps/m1/backend
+    python -m app.quantize --precision int8      # 또는 float16, 둘 다: --precision all
+
+- 7개 회귀 모델 + champion 을 모델별 TFLite 로 변환
+    artifacts_golden/compiled/tflite/<model>.<precision>.tflite
+- int8 은 step6 X_train 에서 뽑은 representative dataset 으로 activation 범위를 보정
+  (LSTM/GRU 를 포함한 모델은 보정 중 TFLite 변환기가 비정상 종료하므로
+   가중치만 int8 인 dynamic range 양자화로 변환)
+- X_test 전체로 float32 Keras 출력 대비 drift 리포트 작성
+  (scaled MAE / 최대 오차 / 방향 일치율 / 앙상블 regime 일치율 / 샘플당 지연 / batch 지연)
+- RNN 이 없는 모델은 batch 차원을 열어 두고 변환 → 여러 종목을 invoke 1회로 처리
+  (LSTM/GRU 포함 모델은 TensorList 를 정적으로 만들어야 해서 batch=1 고정 → 샘플별 invoke)
+- int8 drift 가 QUANTIZE_MAX_MAE 를 넘는 모델은 float16 변환본으로 대체
+- manifest.json 에 원본 가중치 checksum 기록 → 가중치가 바뀌면 로드하지 않음
+
+서버: INFERENCE_PRECISION=int8|float16 이면 model_handler 가 첫 추론 시
+load_quantized_ensemble() 로 로드 (실패하면 기존 float32 경로로 fallback).
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import tensorflow as tf
+
+from .config import (
+    STEP6_PATH,
+    QUANTIZED_DIR,
+    QUANTIZED_MANIFEST_PATH,
+    QUANTIZE_CALIBRATION_SAMPLES,
+    QUANTIZE_MAX_MAE,
+    TFLITE_NUM_THREADS,
+)
+from .compiled_artifacts import file_sha256, source_checksums
+
+MANIFEST_VERSION = 1
+PRECISIONS = ("float16", "int8")
+
+try:  # TF 2.20+ 는 LiteRT 인터프리터 권장 (없으면 tf.lite 사용)
+    from ai_edge_litert.interpreter import Interpreter
+except ImportError:
+    Interpreter = tf.lite.Interpreter
+
+
+# ======================================================================
+# 1. 변환
+# ======================================================================
+
+def _is_recurrent(model) -> bool:
+    return any(isinstance(layer, tf.keras.layers.RNN) for layer in model.layers)
+
+
+def _export_saved_model(model, input_shape, path: Path) -> None:
+    """
+    SavedModel 저장. LSTM/GRU 포함 모델은 batch=1 고정 signature
+    (TensorList 를 정적으로 만들어야 변환됨), 나머지는 batch 가변.
+    """
+
+    def serve(x):
+        return model(x, training=False)
+
+    batch = 1 if _is_recurrent(model) else None
+    archive = tf.keras.export.ExportArchive()
+    archive.track(model)
+    archive.add_endpoint(
+        "serve", serve, input_signature=[tf.TensorSpec((batch, *input_shape), tf.float32)]
+    )
+    archive.write_out(str(path))
+
+
+def convert_model(
+    model, input_shape, precision: str, calibration: Optional[np.ndarray] = None
+) -> Tuple[bytes, str]:
+    """
+    Keras 모델 → TFLite bytes.
+    반환: (flatbuffer, mode)  mode = float16 / int8 / int8_dynamic
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        _export_saved_model(model, input_shape, Path(tmp))
+        converter = tf.lite.TFLiteConverter.from_saved_model(tmp, signature_keys=["serve"])
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+
+        if precision == "float16":
+            converter.target_spec.supported_types = [tf.float16]
+            mode = "float16"
+        elif calibration is not None and not _is_recurrent(model):
+            def representative():
+                for i in range(len(calibration)):
+                    yield [calibration[i:i + 1]]
+
+            # 입출력은 float32 유지, 지원되지 않는 op 은 float 으로 남음
+            converter.representative_dataset = representative
+            mode = "int8"
+        else:
+            mode = "int8_dynamic"
+
+        return converter.convert(), mode
+
+
+# ======================================================================
+# 2. 실행
+# ======================================================================
+
+class QuantizedEnsemble:
+    """
+    모델별 TFLite 인터프리터 묶음.
+    (batch, T, F) float32 → (batch, n_heads)
+    batch 가변으로 변환된 모델은 입력 텐서를 batch 크기로 resize 해 invoke 1회,
+    batch=1 고정 모델(LSTM/GRU 포함)은 샘플별로 invoke → 종목 수에 비례해 느려진다.
+    인터프리터는 스레드 안전하지 않으므로 호출 전체를 lock 으로 보호.
+    """
+
+    per_model = True   # 모델별 인터프리터 → subset() 으로 일부 모델만 실행 / 측정 가능
+
+    def __init__(self, paths: Dict[str, Path], num_threads: int = TFLITE_NUM_THREADS):
+        self.heads = list(paths)
+        self._lock = threading.Lock()
+        self._interpreters = {}
+        self._batch: Dict[str, int] = {}   # batch 가변 모델 → 현재 할당된 batch 크기
+        for name, path in paths.items():
+            interp = Interpreter(model_path=str(path), num_threads=num_threads)
+            interp.allocate_tensors()
+            detail = interp.get_input_details()[0]
+            self._interpreters[name] = (
+                interp,
+                detail["index"],
+                interp.get_output_details()[0]["index"],
+            )
+            if detail["shape_signature"][0] == -1:
+                self._batch[name] = 1
+
+    def batched(self, name: str) -> bool:
+        """name 모델이 batch 를 invoke 1회로 처리하는지 (False 면 샘플별 invoke)"""
+        return name in self._batch
+
+    def __call__(self, x, names: Optional[List[str]] = None) -> np.ndarray:
+        x = np.asarray(x, dtype=np.float32)
+        names = self.heads if names is None else names
+        out = np.empty((len(x), len(names)), dtype=np.float32)
+        with self._lock:
+            for j, name in enumerate(names):
+                interp, i_in, i_out = self._interpreters[name]
+                if name in self._batch:
+                    # batch 크기가 바뀔 때만 재할당 (보통 종목 수로 고정)
+                    if self._batch[name] != len(x):
+                        interp.resize_tensor_input(i_in, x.shape)
+                        interp.allocate_tensors()
+                        self._batch[name] = len(x)
+                    interp.set_tensor(i_in, x)
+                    interp.invoke()
+                    out[:, j] = interp.get_tensor(i_out).reshape(len(x), -1)[:, 0]
+                    continue
+                for b in range(len(x)):
+                    interp.set_tensor(i_in, x[b:b + 1])
+                    interp.invoke()
+                    out[b, j] = interp.get_tensor(i_out).reshape(-1)[0]
+        return out
+
+    def subset(self, names) -> Callable:
+        """pruning 용: names 모델만 실행하는 함수"""
+        names = list(names)
+        return lambda x: self(x, names)
+
+
+def read_manifest() -> Optional[Dict[str, Any]]:
+    if not QUANTIZED_MANIFEST_PATH.exists():
+        return None
+    try:
+        return json.loads(QUANTIZED_MANIFEST_PATH.read_text(encoding="utf-8"))
+    except Exception as e:
+        print(f"[quantize] ⚠️ manifest 읽기 실패: {e}")
+        return None
+
+
+def load_quantized_ensemble(
+    precision: str, input_shape, report: Optional[Dict[str, float]] = None
+) -> Optional[Tuple[QuantizedEnsemble, List[str]]]:
+    """
+    manifest 검증 후 TFLite 모델 로드. 사용할 수 없으면 None.
+    """
+    t0 = time.perf_counter()
+    manifest = read_manifest()
+    if manifest is None or manifest.get("version") != MANIFEST_VERSION:
+        print(f"[quantize] ⚠️ {precision} 아티팩트 없음 → float32 사용 (python -m app.quantize)")
+        return None
+
+    entry = manifest.get("precisions", {}).get(precision)
+    if entry is None:
+        print(f"[quantize] ⚠️ manifest 에 {precision} 없음 → float32 사용")
+        return None
+
+    expected = [None, *[int(d) for d in input_shape]]
+    if manifest.get("input_shape") != expected:
+        print(
+            f"[quantize] ⚠️ input_shape 불일치 ({manifest.get('input_shape')} != {expected}) "
+            "→ float32 사용"
+        )
+        return None
+
+    if manifest.get("sources") != source_checksums():
+        print("[quantize] ⚠️ 가중치가 변환 이후 변경됨 → float32 사용")
+        return None
+
+    paths = {}
+    for name, info in entry["models"].items():
+        path = QUANTIZED_DIR / info["path"]
+        if not path.exists() or file_sha256(path) != info["sha256"]:
+            print(f"[quantize] ⚠️ 아티팩트 손상/없음: {path} → float32 사용")
+            return None
+        paths[name] = path
+
+    try:
+        ensemble = QuantizedEnsemble(paths)
+    except Exception as e:
+        print(f"[quantize] ⚠️ TFLite 로드 실패: {e} → float32 사용")
+        return None
+
+    if report is not None:
+        report["load_tflite"] = time.perf_counter() - t0
+    print(f"[quantize] TFLite {precision} 로드 완료 ({len(paths)} models)")
+    return ensemble, ensemble.heads
+
+
+# ======================================================================
+# 3. drift 리포트
+# ======================================================================
+
+def _latency_ms(fn: Callable, X: np.ndarray, n: int = 50, batch: int = 1) -> float:
+    """batch 개 샘플을 한 번에 넣었을 때 호출당 지연 (ms)"""
+    fn(X[:batch])
+    starts = [i * batch for i in range(min(n, len(X) // batch))]
+    t0 = time.perf_counter()
+    for i in starts:
+        fn(X[i:i + batch])
+    return (time.perf_counter() - t0) / len(starts) * 1000.0
+
+
+def drift_report(ref: np.ndarray, quant: np.ndarray, names: List[str]) -> Dict[str, Any]:
+    """float32 예측 (n, k) 대비 양자화 예측 (n, k) 비교"""
+    from .backtest import scaled_to_signal, signal_to_confidence, ensemble_score, classify_regime
+
+    err = np.abs(quant.astype(np.float64) - ref.astype(np.float64))
+    sig_ref = scaled_to_signal(ref.astype(np.float64))
+    sig_q = scaled_to_signal(quant.astype(np.float64))
+
+    score_ref = ensemble_score(sig_ref, signal_to_confidence(sig_ref))
+    score_q = ensemble_score(sig_q, signal_to_confidence(sig_q))
+
+    return {
+        "models": {
+            name: {
+                "mae": float(err[:, j].mean()),
+                "max_abs": float(err[:, j].max()),
+                "direction_agreement": float((np.sign(sig_ref[:, j]) == np.sign(sig_q[:, j])).mean()),
+            }
+            for j, name in enumerate(names)
+        },
+        "ensemble": {
+            "score_mae": float(np.abs(score_q - score_ref).mean()),
+            "regime_agreement": float((classify_regime(score_ref) == classify_regime(score_q)).mean()),
+        },
+    }
+
+
+# ======================================================================
+# 4. CLI
+# ======================================================================
+
+def build_reference_models(input_shape) -> Dict[str, Any]:
+    """float32 기준 모델 (registry 의 학습 구조 + 가중치, champion 포함)"""
+    from .model_registry import registry
+
+    return registry.load(input_shape=tuple(input_shape))
+
+
+def main(argv: Optional[List[str]] = None) -> Dict[str, Any]:
+    parser = argparse.ArgumentParser(description="TFLite int8 / float16 변환 + drift 리포트")
+    parser.add_argument("--precision", choices=[*PRECISIONS, "all"], default="all")
+    parser.add_argument("--samples", type=int, default=QUANTIZE_CALIBRATION_SAMPLES, help="보정 샘플 수")
+    parser.add_argument("--max-mae", type=float, default=QUANTIZE_MAX_MAE, help="int8 허용 MAE")
+    parser.add_argument("--latency-batch", type=int, default=32, help="batch 지연 측정 크기 (종목 수)")
+    args = parser.parse_args(argv)
+
+    data = np.load(STEP6_PATH)
+    X_train = data["X_train"].astype(np.float32)
+    X_test = data["X_test"].astype(np.float32)
+    input_shape = X_test.shape[1:]
+    idx = np.linspace(0, len(X_train) - 1, min(args.samples, len(X_train))).astype(int)
+    calibration = X_train[idx]
+
+    models = build_reference_models(input_shape)
+    names = list(models)
+    ref = np.column_stack([
+        np.asarray(m.predict(X_test, batch_size=512, verbose=0)).reshape(len(X_test), -1)[:, 0]
+        for m in models.values()
+    ])
+    ref_fns = {
+        name: tf.function(lambda x, m=m: m(x, training=False)) for name, m in models.items()
+    }
+
+    manifest = read_manifest() or {}
+    if manifest.get("version") != MANIFEST_VERSION or manifest.get("sources") != source_checksums():
+        manifest = {"precisions": {}}
+    manifest.update({
+        "version": MANIFEST_VERSION,
+        "input_shape": [None, *[int(d) for d in input_shape]],
+        "sources": source_checksums(),
+        "tensorflow": tf.__version__,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+    })
+
+    QUANTIZED_DIR.mkdir(parents=True, exist_ok=True)
+    precisions = PRECISIONS if args.precision == "all" else (args.precision,)
+    fp16_cache: Dict[str, Tuple[bytes, str]] = {}
+
+    for precision in precisions:
+        entries: Dict[str, Dict[str, Any]] = {}
+        for name, model in models.items():
+            t0 = time.perf_counter()
+            flat, mode = convert_model(model, input_shape, precision, calibration)
+            if precision == "float16":
+                fp16_cache[name] = (flat, mode)
+            path = QUANTIZED_DIR / f"{name}.{precision}.tflite"
+            path.write_bytes(flat)
+            entries[name] = {"path": path.name, "mode": mode, "convert_sec": time.perf_counter() - t0}
+
+        ens = QuantizedEnsemble({n: QUANTIZED_DIR / e["path"] for n, e in entries.items()})
+        quant = ens(X_test)
+        report = drift_report(ref, quant, names)
+
+        # int8 drift 가 큰 모델은 float16 으로 대체
+        if precision == "int8":
+            for j, name in enumerate(names):
+                mae = report["models"][name]["mae"]
+                if mae <= args.max_mae:
+                    continue
+                flat, _ = fp16_cache.get(name) or convert_model(models[name], input_shape, "float16")
+                (QUANTIZED_DIR / entries[name]["path"]).write_bytes(flat)
+                entries[name]["mode"] = "float16"
+                entries[name]["replaced"] = f"int8 mae={mae:.4f} > {args.max_mae}"
+                print(f"[quantize] ⚠️ {name}: int8 mae={mae:.4f} → float16 으로 대체")
+            ens = QuantizedEnsemble({n: QUANTIZED_DIR / e["path"] for n, e in entries.items()})
+            quant = ens(X_test)
+            report = drift_report(ref, quant, names)
+
+        for name, entry in entries.items():
+            path = QUANTIZED_DIR / entry["path"]
+            entry["sha256"] = file_sha256(path)
+            entry["size_kb"] = round(path.stat().st_size / 1024, 1)
+            report["models"][name]["float32_ms"] = _latency_ms(ref_fns[name], X_test)
+            report["models"][name]["tflite_ms"] = _latency_ms(ens.subset([name]), X_test)
+            report["models"][name]["float32_batch_ms"] = _latency_ms(
+                ref_fns[name], X_test, batch=args.latency_batch
+            )
+            report["models"][name]["tflite_batch_ms"] = _latency_ms(
+                ens.subset([name]), X_test, batch=args.latency_batch
+            )
+            report["models"][name]["batched"] = entry["batched"] = ens.batched(name)
+            report["models"][name]["mode"] = entry["mode"]
+        report["latency_batch"] = args.latency_batch
+
+        manifest["precisions"][precision] = {"models": entries, "drift": report}
+
+        print(f"\n[quantize] {precision} — ensemble score MAE={report['ensemble']['score_mae']:.5f}, "
+              f"regime 일치율={report['ensemble']['regime_agreement']:.3f}")
+        b = args.latency_batch
+        print(
+            f"{'model':<22}{'mode':>14}{'mae':>10}{'dir.agree':>11}{'fp32 ms':>10}{'tflite ms':>11}"
+            f"{f'fp32 x{b}':>12}{f'tflite x{b}':>13}{'batched':>9}"
+        )
+        for name, r in report["models"].items():
+            print(
+                f"{name:<22}{r['mode']:>14}{r['mae']:>10.5f}{r['direction_agreement']:>11.3f}"
+                f"{r['float32_ms']:>10.2f}{r['tflite_ms']:>11.2f}"
+                f"{r['float32_batch_ms']:>12.2f}{r['tflite_batch_ms']:>13.2f}{str(r['batched']):>9}"
+            )
+
+    QUANTIZED_MANIFEST_PATH.write_text(
+        json.dumps(manifest, indent=2, ensure_ascii=False), encoding="utf-8"
+    )
+    print(f"\n[quantize] 저장: {QUANTIZED_MANIFEST_PATH}")
+    return manifest
+
+
+if __name__ == "__main__":
+    main()
@@ -6,15 +6,32 @@ from __future__ import annotations
 
 import asyncio
 import math
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone, timedelta
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple
 
-from .config import INTERNAL_SYMBOL, BULL_THRESHOLD, BEAR_THRESHOLD
+import numpy as np
+
+from .config import (
+    INTERNAL_SYMBOL,
+    SIGNAL_SYMBOLS,
+    BULL_THRESHOLD,
+    BEAR_THRESHOLD,
+    MARKET_CLOSED_MAX_SLEEP_SEC,
+)
 from .kis_api_client import KISApiClient
+from .kis_ws_client import kis_ws_feed, Bar
 from .data_processor import LiveDataProcessor
-from .model_handler import run_inference
+from .model_handler import run_inference_batch
+from .inference_executor import inference_executor, StaleTickDropped
 from .confidence_manager import ConfidenceManager
 from .signal_store import get_recent_signals
+from .metrics import span, get_logger, SIGNALS_TOTAL, DROPPED_TICKS
+from .model_scoreboard import model_scoreboard, ENSEMBLE
+from .market_calendar import market_calendar
+
+log = get_logger("signal_generator")
+market_log = get_logger("market")
 
 KST = timezone(timedelta(hours=9))
 
@@ -24,28 +41,24 @@ def now_kst_iso() -> str:
 
 
 def is_market_open() -> bool:
-    now = datetime.now(tz=KST)
-
-    if now.weekday() >= 5:
-        print(f"[market] 주말이라 시장이 닫힘 ({now.weekday()})")
-        return False
-
-    if not (9 <= now.hour <= 15):
-        print(f"[market] 장시간 아님. 현재 시각 {now.hour}:{now.minute}")
-        return False
+    # 주말 / KRX 휴장일 / 특수 운영시간 반영 (market_calendar)
+    return market_calendar.is_open()
 
-    if now.hour == 15 and now.minute > 30:
-        print("[market] 15:30 이후 장 마감")
-        return False
 
-    return True
-
-
-_live_proc = LiveDataProcessor()
+# 심볼별 실시간 전처리기 (모델은 model_handler 에서 모든 심볼이 공유)
+_live_procs: Dict[str, LiveDataProcessor] = {}
+# 전처리기 상태 갱신은 이 스레드 하나에서만 순서대로 실행 (event loop 밖)
+_feature_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="features")
 _conf_manager = ConfidenceManager()
 kis_client = KISApiClient()
 
 
+def _get_live_proc(symbol: str) -> LiveDataProcessor:
+    if symbol not in _live_procs:
+        _live_procs[symbol] = LiveDataProcessor()
+    return _live_procs[symbol]
+
+
 def _classify_regime(score: float) -> str:
     if score >= BULL_THRESHOLD:
         return "bull"
@@ -54,11 +67,11 @@ def _classify_regime(score: float) -> str:
     return "neutral"
 
 
-def _get_last_real_signal(limit: int = 200) -> Optional[Dict[str, Any]]:
+def _get_last_real_signal(symbol: str, limit: int = 200) -> Optional[Dict[str, Any]]:
     try:
-        arr = get_recent_signals(limit)
+        arr = get_recent_signals(limit, symbol=symbol)
     except Exception as e:
-        print(f"[signal_generator] 최근 신호 조회 실패: {e}")
+        log.warning("최근 신호 조회 실패", error=e)
         return None
 
     if not arr:
@@ -71,16 +84,19 @@ def _get_last_real_signal(limit: int = 200) -> Optional[Dict[str, Any]]:
     return arr[-1]
 
 
-def _build_market_closed_snapshot() -> Dict[str, Any]:
-    print("[signal_generator] 시장 닫힘 → snapshot 생성")
+def _build_market_closed_snapshot(
+    symbol: str = INTERNAL_SYMBOL, next_open: Optional[datetime] = None
+) -> Dict[str, Any]:
+    market_log.info("시장 닫힘 → snapshot 생성", symbol=symbol)
 
-    last = _get_last_real_signal()
+    last = _get_last_real_signal(symbol)
     now = now_kst_iso()
+    next_open_iso = next_open.isoformat() if next_open is not None else None
 
     if not last:
         return {
             "timestamp": now,
-            "symbol": INTERNAL_SYMBOL,
+            "symbol": symbol,
             "price": None,
             "regime": "market_closed",
             "score": None,
@@ -89,6 +105,7 @@ def _build_market_closed_snapshot() -> Dict[str, Any]:
             "raw_preds": {},
             "market_closed": True,
             "snapshot": {
+                "next_open": next_open_iso,
                 "next_open_regime": "neutral",
                 "next_open_score": 0.0,
                 "next_open_confidence": 0.0,
@@ -127,7 +144,7 @@ def _build_market_closed_snapshot() -> Dict[str, Any]:
 
     return {
         "timestamp": now,
-        "symbol": INTERNAL_SYMBOL,
+        "symbol": symbol,
         "price": None,
         "regime": "market_closed",
         "score": None,
@@ -136,6 +153,7 @@ def _build_market_closed_snapshot() -> Dict[str, Any]:
         "raw_preds": last.get("raw_preds", {}),
         "market_closed": True,
         "snapshot": {
+            "next_open": next_open_iso,
             "next_open_regime": last_regime,
             "next_open_score": last_score,
             "next_open_confidence": last_conf,
@@ -144,37 +162,169 @@ def _build_market_closed_snapshot() -> Dict[str, Any]:
     }
 
 
-async def generate_signal_once() -> Dict[str, Any]:
-    print("[signal_generator] === generate_signal_once ===")
+# 장 마감 snapshot 캐시: 닫힌 구간(= 다음 개장 시각)마다 심볼별로 1번만 생성
+_closed_snapshots: Dict[str, Tuple[datetime, Dict[str, Any]]] = {}
+
+
+def _closed_snapshot(symbol: str, now: Optional[datetime] = None) -> Dict[str, Any]:
+    next_open = market_calendar.next_open(now)
+    cached = _closed_snapshots.get(symbol)
+    if cached is None or cached[0] != next_open:
+        cached = _closed_snapshots[symbol] = (
+            next_open,
+            _build_market_closed_snapshot(symbol, next_open),
+        )
+    return cached[1]
+
+
+def _update_windows(
+    symbols: List[str],
+    prices: Dict[str, Any],
+    bars: Optional[Dict[str, List[Bar]]] = None,
+) -> Tuple[Dict[str, Dict[str, Any]], List[str], Optional[np.ndarray], List[Tuple[str, int]]]:
+    """
+    (feature 스레드에서 실행) 심볼별 전처리기 갱신.
+    bars 에 있는 심볼은 WebSocket 체결 bar 로 갱신 (새 bar 가 없으면 현재 window 재사용),
+    나머지는 prices 의 현재가 1개로 갱신.
+    반환: (에러 신호 dict, window 준비된 심볼, (n_ready, SEQ_LEN, 16) 배치,
+           심볼별 (심볼, 누적 bar 수) — 증분 추론 상태 키)
+    """
+    errors: Dict[str, Dict[str, Any]] = {}
+    ready: List[str] = []
+    windows: List[np.ndarray] = []
+    stream_keys: List[Tuple[str, int]] = []
+
+    for sym in symbols:
+        price = prices.get(sym)
+
+        if bars is not None and sym in bars:
+            proc = _get_live_proc(sym)
+            try:
+                if bars[sym]:
+                    model_input = proc.update_bars(b.ohlcv() for b in bars[sym])
+                else:
+                    model_input = proc.current()
+            except Exception as e:
+                errors[sym] = _error_signal(price, f"input_error: {e}", sym)
+                continue
+
+            ready.append(sym)
+            windows.append(model_input[0])
+            stream_keys.append((sym, proc.engine.count))
+            continue
+
+        if isinstance(price, Exception):
+            errors[sym] = _error_signal(None, f"price_fetch_error: {price}", sym)
+            continue
+
+        if price is None:
+            errors[sym] = _error_signal(None, "price_is_None", sym)
+            continue
+
+        proc = _get_live_proc(sym)
+        try:
+            model_input = proc.update(price)
+        except Exception as e:
+            errors[sym] = _error_signal(price, f"input_error: {e}", sym)
+            continue
 
-    if not is_market_open():
-        return _build_market_closed_snapshot()
+        ready.append(sym)
+        windows.append(model_input[0])
+        stream_keys.append((sym, proc.engine.count))
 
-    try:
-        price = await kis_client.get_realtime_price()
-    except Exception as e:
-        return _error_signal(None, f"price_fetch_error: {e}")
+    # np.stack 이 window view 를 복사 → 다음 tick 갱신과 분리됨
+    batch = np.stack(windows) if windows else None
+    return errors, ready, batch, stream_keys
 
-    if price is None:
-        return _error_signal(None, "price_is_None")
 
-    try:
-        model_input = _live_proc.update(price)
-    except Exception as e:
-        return _error_signal(price, f"input_error: {e}")
+async def generate_signals(symbols: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """
+    모든 심볼의 신호를 1 tick 분량 생성.
+
+    - 시세 동시 조회 (KIS WebSocket 수집 중이면 완성된 체결 bar) → 심볼별 LiveDataProcessor 갱신 (feature 스레드)
+    - window 가 준비된 심볼만 모아 (n_ready, SEQ_LEN, 16) 배치로 1회 추론 (inference_executor)
+    - 반환 순서는 symbols 순서와 동일
+    - 추론 대기열에서 밀려난 tick 은 StaleTickDropped 발생
+    """
+    symbols = list(symbols or SIGNAL_SYMBOLS)
+    log.info("generate_signals", symbols=len(symbols))
 
+    if not is_market_open():
+        return [_closed_snapshot(sym) for sym in symbols]
+
+    # 이 tick 의 stage 별 소요 시간 (각 신호의 timings 필드로 전달)
+    timings: Dict[str, float] = {}
+
+    bars = None
+    with span("price", timings):
+        if kis_ws_feed.running:
+            # 체결 수집 중인 심볼은 새로 완성된 OHLCV bar 사용, 아직 체결이 없는 심볼만 REST
+            new_bars = kis_ws_feed.drain()
+            streamed = [sym for sym in symbols if kis_ws_feed.has_data(sym)]
+            bars = {sym: new_bars.get(sym, []) for sym in streamed}
+            prices = {sym: kis_ws_feed.last_price(sym) for sym in streamed}
+            polled = [sym for sym in symbols if sym not in bars]
+            if polled:
+                prices.update(await kis_client.get_realtime_prices(polled))
+        else:
+            prices = await kis_client.get_realtime_prices(symbols)
+
+    loop = asyncio.get_running_loop()
+    with span("features", timings):
+        results, ready, batch, stream_keys = await loop.run_in_executor(
+            _feature_pool, _update_windows, symbols, prices, bars
+        )
+
+    if ready:
+        # 실시간 적중률 기반 모델 가중치 / 제외 목록
+        weights, skip = model_scoreboard.plan()
+        try:
+            with span("inference", timings):
+                infers = await inference_executor.submit(
+                    run_inference_batch, batch, weights, skip, stream_keys
+                )
+        except StaleTickDropped:
+            DROPPED_TICKS.inc()
+            raise
+        except Exception as e:
+            infers = [None] * len(ready)
+            err = f"model_inference_error: {e}"
+        for sym, infer in zip(ready, infers):
+            if infer is None:
+                results[sym] = _error_signal(prices[sym], err, sym)
+            else:
+                sig = results[sym] = _build_signal(sym, prices[sym], infer, timings)
+                if sig.get("score") is not None:
+                    scored = {m["name"]: m["signal"] for m in sig["models"]}
+                    scored[ENSEMBLE] = sig["score"]
+                    model_scoreboard.record(sym, prices[sym], scored)
+
+    sigs = [results[sym] for sym in symbols]
+    for sig in sigs:
+        SIGNALS_TOTAL.inc(regime=sig.get("regime", "unknown"))
+    return sigs
+
+
+async def generate_signal_once(symbol: str = INTERNAL_SYMBOL) -> Dict[str, Any]:
     try:
-        infer = run_inference(model_input)
-    except Exception as e:
-        return _error_signal(price, f"model_inference_error: {e}")
+        return (await generate_signals([symbol]))[0]
+    except StaleTickDropped as e:
+        return _error_signal(None, f"stale_tick_dropped: {e}", symbol)
+
 
+def _build_signal(
+    symbol: str,
+    price: float,
+    infer: Dict[str, Any],
+    timings: Optional[Dict[str, float]] = None,
+) -> Dict[str, Any]:
     models = infer.get("models", [])
     ensemble_score = infer.get("ensemble_score")
     raw_preds = infer.get("raw_preds", {})
     meta_prob = infer.get("meta_probability", None)
 
     if ensemble_score is None:
-        return _error_signal(price, "no_model_output")
+        return _error_signal(price, "no_model_output", symbol)
 
     # meta_probability 없으면 ensemble_score 기반으로 fallback
     if meta_prob is None:
@@ -183,16 +333,18 @@ async def generate_signal_once() -> Dict[str, Any]:
     # 실전 신뢰도 계산용 model_scores
     model_scores = [float(m.get("signal", 0.0)) for m in models]
 
-    cm_res = _conf_manager.compute(
-        model_scores=model_scores,
-        meta_probability=float(meta_prob),
-    )
+    sig_timings = dict(timings or {})
+    with span("confidence", sig_timings):
+        cm_res = _conf_manager.compute(
+            model_scores=model_scores,
+            meta_probability=float(meta_prob),
+        )
 
     regime = _classify_regime(float(ensemble_score))
 
     return {
         "timestamp": now_kst_iso(),
-        "symbol": INTERNAL_SYMBOL,
+        "symbol": symbol,
         "price": float(price),
         "regime": regime,
         "score": float(ensemble_score),
@@ -202,15 +354,19 @@ async def generate_signal_once() -> Dict[str, Any]:
         "meta_probability": float(cm_res.meta_probability),
         "models": models,
         "raw_preds": raw_preds,
+        "pruned": infer.get("pruned", []),
         "market_closed": False,
+        "timings": sig_timings,
     }
 
 
-def _error_signal(price: Optional[float], msg: str) -> Dict[str, Any]:
-    print(f"[signal_generator] 에러: {msg}")
+def _error_signal(
+    price: Optional[float], msg: str, symbol: str = INTERNAL_SYMBOL
+) -> Dict[str, Any]:
+    log.warning("에러", symbol=symbol, msg=msg)
     return {
         "timestamp": now_kst_iso(),
-        "symbol": INTERNAL_SYMBOL,
+        "symbol": symbol,
         "price": float(price) if price is not None else None,
         "regime": "error",
         "score": None,
@@ -223,11 +379,66 @@ def _error_signal(price: Optional[float], msg: str) -> Dict[str, Any]:
 
 
 async def signal_loop(callback, interval_sec: float = 1.0):
+    """
+    interval_sec 마다 tick 을 시작만 하고 (orchestration), 추론 완료를 기다리지 않는다.
+    추론이 밀리면 inference_executor 가 오래된 tick 을 버리고,
+    이미 더 최신 tick 이 발행됐으면 늦게 끝난 tick 은 발행하지 않는다.
+    장이 닫혀 있으면 캐시된 snapshot 이 바뀐 경우에만 발행하고 다음 개장까지 잠든다
+    (최대 MARKET_CLOSED_MAX_SLEEP_SEC 마다 깨어나 달력/시계 재확인).
+    """
     print(f"[signal_generator] signal_loop 시작 (interval={interval_sec})")
-    while True:
+
+    pending: set = set()
+    max_pending = inference_executor.queue_size + inference_executor.max_workers + 1
+    seq = 0
+    last_published = 0
+    published_snapshots: Dict[str, Dict[str, Any]] = {}
+
+    async def run_tick(tick_seq: int):
+        nonlocal last_published
         try:
-            sig = await generate_signal_once()
-            await callback(sig)
+            sigs = await generate_signals()
+        except StaleTickDropped:
+            return
         except Exception as e:
-            print(f"[signal_generator] 루프 중 오류: {e}")
+            log.error("루프 중 오류", error=e)
+            return
+
+        if tick_seq < last_published:
+            return
+        last_published = tick_seq
+
+        for sig in sigs:
+            try:
+                await callback(sig)
+            except Exception as e:
+                log.error("callback 오류", error=e)
+
+    while True:
+        if not is_market_open():
+            # 장중 마지막 tick 이 늦게 끝나도 snapshot 뒤에 발행되지 않도록
+            seq += 1
+            last_published = seq
+            for sym in SIGNAL_SYMBOLS:
+                snap = _closed_snapshot(sym)
+                if published_snapshots.get(sym) is snap:
+                    continue
+                published_snapshots[sym] = snap
+                try:
+                    await callback(snap)
+                except Exception as e:
+                    log.error("callback 오류", error=e)
+
+            wait = market_calendar.seconds_until_open()
+            market_log.info("장 마감 → 다음 개장까지 대기", next_open=market_calendar.next_open().isoformat())
+            await asyncio.sleep(min(max(wait, 0.1), MARKET_CLOSED_MAX_SLEEP_SEC))
+            continue
+
+        if len(pending) < max_pending:
+            seq += 1
+            task = asyncio.create_task(run_tick(seq))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+        else:
+            log.warning("이전 tick 처리 지연 → 이번 tick 건너뜀", pending=len(pending))
         await asyncio.sleep(interval_sec)
@@ -1,28 +1,470 @@
 # signal_store.py
 """
-SIGMA A 프로젝트 - 최근 신호 저장소
+SIGMA A 프로젝트 - 신호 저장소
 순환 import 방지 & 단순 저장/조회 역할만 담당
+
+- hot tier : 최근 500개 신호 (SignalRing: NumPy 열 배열 ring buffer) → 최근 N개 조회
+             timestamp/price/score/confidence/agreement/regime/symbol + (N, n_models) signal 행렬
+             + 원본 dict / 직렬화된 JSON(첫 조회 때 1회) 을 같은 slot 에 보관
+             배열을 2배 길이로 잡고 같은 행을 두 곳에 써서 최근 N개가 항상 연속 slice (복사 없음)
+- cold tier: SQLite (WAL, mmap 읽기) append-only 테이블
+             ts 인덱스로 since/until/regime/symbol 범위 조회 (O(log n) seek)
+- 장 마감 snapshot 은 DB 에 저장하지 않음
+- DB 쓰기는 전용 writer 스레드가 모아서 commit → event loop 를 막지 않음
 """
 
-from typing import List, Dict
-from collections import deque
+import json
+import math
+import queue
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Any, List, Dict, Optional
+
+import numpy as np
+
+from .config import KST, SIGNAL_DB_ENABLED, SIGNAL_DB_PATH
+
+try:
+    import orjson
+
+    def _dumps(obj: Any) -> bytes:
+        return orjson.dumps(
+            obj, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS, default=str
+        )
+
+except ImportError:  # orjson 미설치 환경
+    orjson = None
+
+    def _dumps(obj: Any) -> bytes:
+        return json.dumps(
+            obj, ensure_ascii=False, separators=(",", ":"), default=str
+        ).encode("utf-8")
 
 # 최근 신호 버퍼 (최대 500개 저장)
-_SIGNAL_BUFFER = deque(maxlen=500)
+HOT_TIER_SIZE = 500
+
+_FLUSH_INTERVAL_SEC = 0.5
+_FLUSH_MAX_ROWS = 500
+
+
+def _to_epoch(ts) -> float:
+    """ISO 문자열 / datetime / epoch → epoch 초 (naive 시각은 KST 로 간주)"""
+    if isinstance(ts, (int, float)):
+        return float(ts)
+    if isinstance(ts, str):
+        ts = datetime.fromisoformat(ts)
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=KST)
+    return ts.timestamp()
+
+
+
+def _num(v) -> float:
+    try:
+        return float(v) if v is not None else math.nan
+    except (TypeError, ValueError):
+        return math.nan
+
+
+# ======================================================================
+# in-memory hot tier (열 단위 ring buffer)
+# ======================================================================
+
+class SignalRing:
+    """
+    고정 크기 열(column) 저장소. slot i 의 행은 배열의 i 와 i+capacity 두 곳에 기록되므로
+    최근 n 개 행은 항상 [end-n, end) 연속 구간 → NumPy view 로 바로 잘라 쓴다.
+    """
+
+    COLUMNS = ("timestamp", "price", "score", "confidence", "agreement")
+
+    def __init__(self, capacity: int = HOT_TIER_SIZE, n_models: int = 8):
+        self.capacity = int(capacity)
+        size = 2 * self.capacity
+        self._cols = {name: np.full(size, np.nan) for name in self.COLUMNS}
+        self._regime = np.zeros(size, dtype=np.int16)
+        self._symbol = np.zeros(size, dtype=np.int16)
+        self._signals = np.full((size, n_models), np.nan, dtype=np.float32)
+        self._rows = np.empty(size, dtype=object)      # 원본 dict (JSON 응답 / snapshot 용)
+        self._encoded = np.empty(size, dtype=object)   # 행별 JSON bytes (첫 조회 때 채움)
+
+        self.regimes: List[str] = []
+        self.symbols: List[str] = []
+        self.model_names: List[str] = []
+        self._codes: Dict[str, Dict[str, int]] = {"regime": {}, "symbol": {}, "model": {}}
+
+        self.total = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return min(self.total, self.capacity)
+
+    def _code(self, kind: str, names: List[str], value) -> int:
+        key = str(value)
+        code = self._codes[kind].get(key)
+        if code is None:
+            code = self._codes[kind][key] = len(names)
+            names.append(key)
+        return code
+
+    def _model_col(self, name: str) -> int:
+        col = self._code("model", self.model_names, name)
+        if col >= self._signals.shape[1]:
+            grown = np.full((self._signals.shape[0], 2 * self._signals.shape[1]), np.nan, dtype=np.float32)
+            grown[:, : self._signals.shape[1]] = self._signals
+            self._signals = grown
+        return col
+
+    def append(self, sig: Dict) -> None:
+        try:
+            ts = _to_epoch(sig["timestamp"])
+        except Exception:
+            ts = math.nan
+        values = {
+            "timestamp": ts,
+            "price": _num(sig.get("price")),
+            "score": _num(sig.get("score")),
+            "confidence": _num(sig.get("confidence")),
+            "agreement": _num(sig.get("agreement")),
+        }
+
+        with self._lock:
+            regime = self._code("regime", self.regimes, sig.get("regime"))
+            symbol = self._code("symbol", self.symbols, sig.get("symbol"))
+            cells = [(self._model_col(m.get("name")), _num(m.get("signal"))) for m in sig.get("models") or ()]
+            row = np.full(self._signals.shape[1], np.nan, dtype=np.float32)
+            for col, v in cells:
+                row[col] = v
+
+            slot = self.total % self.capacity
+            for i in (slot, slot + self.capacity):
+                for name, v in values.items():
+                    self._cols[name][i] = v
+                self._regime[i] = regime
+                self._symbol[i] = symbol
+                self._signals[i] = row
+                self._rows[i] = sig
+                self._encoded[i] = None
+            self.total += 1
+
+    def extend(self, sigs: List[Dict]) -> None:
+        for sig in sigs:
+            self.append(sig)
+
+    # ------------------------------------------------------------
+    # read (호출 측에서 lock 안에서 써야 하는 view)
+    # ------------------------------------------------------------
+
+    def _window(self, limit: int, symbol: Optional[str]):
+        """최근 limit 개 (symbol 지정 시 해당 심볼만) 의 배열 index: slice 또는 index 배열"""
+        n = len(self)
+        end = (self.total - 1) % self.capacity + self.capacity + 1 if n else 0
+        if symbol is None:
+            k = n if limit <= 0 else min(limit, n)
+            return slice(end - k, end)
+
+        code = self._codes["symbol"].get(str(symbol))
+        if code is None:
+            return slice(0, 0)
+        idx = np.flatnonzero(self._symbol[end - n:end] == code) + (end - n)
+        return idx if limit <= 0 else idx[-limit:]
+
+    def count(self, symbol: Optional[str] = None) -> int:
+        """보관 중인 행 수 (symbol 지정 시 해당 심볼만)"""
+        with self._lock:
+            w = self._window(0, symbol)
+            return w.stop - w.start if isinstance(w, slice) else len(w)
+
+    def rows(self, limit: int = 0, symbol: Optional[str] = None) -> List[Dict]:
+        with self._lock:
+            return self._rows[self._window(limit, symbol)].tolist()
+
+    def to_json(self, limit: int = 0, symbol: Optional[str] = None) -> bytes:
+        """최근 행들을 JSON 배열 bytes 로 (행별 직렬화 결과를 재사용)"""
+        with self._lock:
+            w = self._window(limit, symbol)
+            idx = np.arange(w.start, w.stop) if isinstance(w, slice) else w
+            parts = []
+            for i in idx:
+                enc = self._encoded[i]
+                if enc is None:
+                    enc = _dumps(self._rows[i])
+                    mirror = i - self.capacity if i >= self.capacity else i + self.capacity
+                    self._encoded[i] = self._encoded[mirror] = enc
+                parts.append(enc)
+        return b"[" + b",".join(parts) + b"]"
+
+    def to_columnar(self, limit: int = 0, symbol: Optional[str] = None) -> bytes:
+        """
+        열 단위 JSON:
+          {"symbol": [...], "timestamp": [epoch 초], "price", "score", "confidence", "agreement",
+           "regime": [...], "models": [이름], "signals": [[모델별 signal, 없으면 null], ...]}
+        """
+        with self._lock:
+            w = self._window(limit, symbol)
+            n_models = len(self.model_names)
+            out: Dict[str, Any] = {
+                "symbol": np.asarray(self.symbols or [""], dtype=object)[self._symbol[w]].tolist(),
+                **{name: self._cols[name][w] for name in self.COLUMNS},
+                "regime": np.asarray(self.regimes or [""], dtype=object)[self._regime[w]].tolist(),
+                "models": list(self.model_names),
+                # 열 일부만 자른 2차원 view 는 연속 배열이 아니라 orjson 이 직접 못 씀 → 작은 복사
+                "signals": np.ascontiguousarray(self._signals[w, :n_models]),
+            }
+            if orjson is None:
+                # json 모듈은 NaN 을 표준 JSON 으로 못 쓰므로 null 로 변환
+                for name in (*self.COLUMNS, "signals"):
+                    a = out[name]
+                    out[name] = np.where(np.isnan(a), None, a.astype(object)).tolist()
+            return _dumps(out)
+
 
+_SIGNAL_BUFFER = SignalRing(HOT_TIER_SIZE)
+
+
+# ======================================================================
+# SQLite cold tier
+# ======================================================================
+
+class SignalDB:
+    def __init__(self, path):
+        self.path = str(path)
+        self._local = threading.local()
+        self._queue: "queue.Queue[Optional[tuple]]" = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+
+        conn = self._connect()
+        conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS signals (
+                id      INTEGER PRIMARY KEY,
+                ts      REAL NOT NULL,
+                symbol  TEXT,
+                regime  TEXT,
+                payload TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_signals_ts ON signals(ts);
+            CREATE INDEX IF NOT EXISTS idx_signals_symbol_ts ON signals(symbol, ts);
+            """
+        )
+        conn.commit()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA mmap_size=268435456")  # 256MB 메모리 매핑 읽기
+            self._local.conn = conn
+        return conn
+
+    # ------------------------------------------------------------
+    # write (writer 스레드)
+    # ------------------------------------------------------------
+
+    def append(self, sig: Dict) -> None:
+        if self._writer is None:
+            self._writer = threading.Thread(
+                target=self._write_loop, name="signal-db-writer", daemon=True
+            )
+            self._writer.start()
+
+        try:
+            ts = _to_epoch(sig["timestamp"])
+        except Exception:
+            ts = datetime.now(tz=KST).timestamp()
+
+        self._queue.put((
+            ts,
+            sig.get("symbol"),
+            sig.get("regime"),
+            json.dumps(sig, ensure_ascii=False, default=str),
+        ))
+
+    def _write_loop(self) -> None:
+        conn = self._connect()
+        while True:
+            row = self._queue.get()
+            if row is None:
+                return
+            rows = [row]
+            try:
+                while len(rows) < _FLUSH_MAX_ROWS:
+                    nxt = self._queue.get(timeout=_FLUSH_INTERVAL_SEC)
+                    if nxt is None:
+                        self._insert(conn, rows)
+                        return
+                    rows.append(nxt)
+            except queue.Empty:
+                pass
+            self._insert(conn, rows)
+
+    @staticmethod
+    def _insert(conn: sqlite3.Connection, rows: List[tuple]) -> None:
+        try:
+            conn.executemany(
+                "INSERT INTO signals (ts, symbol, regime, payload) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            conn.commit()
+        except Exception as e:
+            print(f"[signal_store] ⚠️ DB 저장 실패 ({len(rows)}건): {e}")
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._queue.put(None)
+            self._writer.join(timeout=5.0)
+            self._writer = None
+
+    # ------------------------------------------------------------
+    # read
+    # ------------------------------------------------------------
+
+    def query(
+        self,
+        since=None,
+        until=None,
+        regime: Optional[str] = None,
+        symbol: Optional[str] = None,
+        limit: int = 0,
+    ) -> List[Dict]:
+        """
+        조건에 맞는 신호를 시간순으로 반환.
+        limit>0 이면 조건에 맞는 것 중 가장 최근 limit 개.
+        """
+        where, params = [], []
+        if since is not None:
+            where.append("ts >= ?")
+            params.append(_to_epoch(since))
+        if until is not None:
+            where.append("ts <= ?")
+            params.append(_to_epoch(until))
+        if regime is not None:
+            where.append("regime = ?")
+            params.append(regime)
+        if symbol is not None:
+            where.append("symbol = ?")
+            params.append(symbol)
+
+        sql = "SELECT payload FROM signals"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY ts DESC, id DESC"
+        if limit > 0:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+
+        rows = self._connect().execute(sql, params).fetchall()
+        return [json.loads(r[0]) for r in reversed(rows)]
+
+
+_db: Optional[SignalDB] = None
+if SIGNAL_DB_ENABLED:
+    try:
+        SIGNAL_DB_PATH.parent.mkdir(parents=True, exist_ok=True)
+        _db = SignalDB(SIGNAL_DB_PATH)
+    except Exception as e:
+        print(f"[signal_store] ⚠️ DB 초기화 실패 → 메모리 저장만 사용: {e}")
+        _db = None
+
+
+# ======================================================================
+# public API
+# ======================================================================
 
 def append_signal(sig: Dict):
     """
     새로운 신호를 저장한다.
     """
     _SIGNAL_BUFFER.append(sig)
+    # 장 마감 snapshot 은 1초마다 같은 내용이 반복되므로 이력에 남기지 않음
+    if _db is not None and not sig.get("market_closed"):
+        _db.append(sig)
 
 
-def get_recent_signals(limit: int = 120) -> List[Dict]:
+def get_recent_signals(limit: int = 120, symbol: Optional[str] = None) -> List[Dict]:
     """
     최근 N개 신호 반환.
     limit<=0 이면 전체 반환.
+    symbol 지정 시 해당 심볼 신호만 반환.
+    """
+    return _SIGNAL_BUFFER.rows(limit, symbol)
+
+
+def hot_tier_covers(limit: int, symbol: Optional[str] = None) -> bool:
+    """
+    최근 limit 개 (symbol 지정 시 해당 심볼만) 를 hot tier 만으로 응답할 수 있는지.
+    hot tier 는 모든 심볼이 나눠 쓰는 최근 HOT_TIER_SIZE 개라 심볼이 여러 개면
+    한 심볼의 행은 일부만 남는다 → 모자라고 DB 가 있으면 DB 에서 조회해야 한다.
+    """
+    if _db is None or symbol is None:
+        return True
+    # ring 이 한 번도 넘치지 않았으면 (재시작 후 DB 복원분 포함) 모든 행이 hot tier 에 있음
+    return _SIGNAL_BUFFER.total < _SIGNAL_BUFFER.capacity or _SIGNAL_BUFFER.count(symbol) >= limit
+
+
+def get_recent_signals_encoded(
+    limit: int = 120, symbol: Optional[str] = None, fmt: str = "json"
+) -> bytes:
+    """
+    get_recent_signals 와 같은 범위를 바로 응답 본문(bytes)으로.
+    fmt="json"     : 신호 dict 배열 (행별 직렬화 결과 캐시 재사용)
+    fmt="columnar" : 열 단위 배열 (SignalRing.to_columnar 참고)
     """
-    if limit <= 0:
-        return list(_SIGNAL_BUFFER)
-    return list(_SIGNAL_BUFFER)[-limit:]
+    if fmt == "columnar":
+        return _SIGNAL_BUFFER.to_columnar(limit, symbol)
+    return _SIGNAL_BUFFER.to_json(limit, symbol)
+
+
+def query_signals(
+    since=None,
+    until=None,
+    regime: Optional[str] = None,
+    symbol: Optional[str] = None,
+    limit: int = 0,
+) -> List[Dict]:
+    """
+    기간/regime/심볼 조건 조회. DB 가 꺼져 있으면 hot tier 에서 필터링.
+    """
+    if _db is not None:
+        return _db.query(since, until, regime, symbol, limit)
+
+    lo = _to_epoch(since) if since is not None else None
+    hi = _to_epoch(until) if until is not None else None
+    picked = []
+    for sig in reversed(_SIGNAL_BUFFER.rows()):
+        try:
+            ts = _to_epoch(sig["timestamp"])
+        except Exception:
+            continue
+        if hi is not None and ts > hi:
+            continue
+        if lo is not None and ts < lo:
+            continue
+        if regime is not None and sig.get("regime") != regime:
+            continue
+        if symbol is not None and sig.get("symbol") != symbol:
+            continue
+        picked.append(sig)
+        if 0 < limit <= len(picked):
+            break
+    picked.reverse()
+    return picked
+
+
+def warm_hot_tier() -> None:
+    """서버 재시작 시 DB 의 최근 신호로 hot tier 를 채운다."""
+    if _db is None or len(_SIGNAL_BUFFER):
+        return
+    try:
+        _SIGNAL_BUFFER.extend(_db.query(limit=_SIGNAL_BUFFER.capacity))
+        print(f"[signal_store] DB 에서 최근 신호 {len(_SIGNAL_BUFFER)}개 복원")
+    except Exception as e:
+        print(f"[signal_store] ⚠️ hot tier 복원 실패: {e}")
+
+
+def close_store() -> None:
+    if _db is not None:
+        _db.close()
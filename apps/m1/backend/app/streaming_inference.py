@@ -0,0 +1,427 @@
+# streaming_inference.py
+"""
+SIGMA A 프로젝트 - 순환/인과 합성곱 모델 증분(streaming) 추론
+
+tick 마다 60-step window 전체를 다시 계산하는 대신, 심볼별 상태를 들고 새 step 만 계산한다.
+Keras 모델의 가중치를 꺼내 NumPy 로 1 step 씩 실행 (작은 행렬곱이라 그래프 호출보다 빠름).
+
+- lstm_attention_reg / gru_attention_reg
+    LSTM/GRU hidden state 를 tick 간 유지, 최근 SEQ_LEN 개 hidden 을 ring 에 보관
+    → Attention pooling (위치별 bias 포함) 만 ring 전체로 다시 계산
+- tcn_reg
+    dilated causal conv 마다 입력 이력 ring ((k-1)·d+1) 유지 → 새 위치 출력만 계산,
+    GlobalAveragePooling 은 마지막 SEQ_LEN 개 출력 ring 의 평균
+- attn_lstm_cnn_reg
+    "same" padding Conv1D 2개가 미래 2 step 을 보므로 LSTM 은 2 step 늦게 확정(commit)하고
+    window 끝 2 step 은 매 tick 확정 상태에서 추측 계산 (window 끝 zero padding 과 동일)
+
+정확도 (근사):
+- 상태를 처음 만들 때(prime)는 window 전체를 0 상태에서 1 step 씩 돌리므로 Keras 출력과 같다 (float 오차 수준)
+- 이후 증분 갱신은 window 시작 이전 이력까지 상태에 남고(LSTM/GRU 는 학습 때처럼 window 시작에서
+  0 으로 초기화되지 않음, TCN/Conv 는 window 앞쪽 zero padding 대신 실제 이력을 봄),
+  LiveDataProcessor 의 window 앞부분 워밍업 보정도 반영되지 않으므로 full window 결과와 달라진다
+- 오차는 prime 후 ~10 step 안에 포화되고 그 뒤로는 거의 늘지 않음. 학습 가중치 + step6 X_test 연속 window
+  300 tick (STREAMING_RESYNC_EVERY=60) 기준 scaled 출력 최대 절대오차 (괄호: 같은 구간 full 출력 표준편차)
+    gru_attention_reg 0.006 (0.029) / lstm_attention_reg 0.030 (0.036) / attn_lstm_cnn_reg 0.030 (0.060)
+    tcn_reg 0.108 (0.017) — 수용영역(61)이 window 전체라 window 앞 zero padding 과 실제 이력 차이가
+    모든 위치에 퍼짐 → 오차가 출력 변동폭의 6배라 기본 STREAMING_MODELS 에서 제외
+  (tests/test_streaming_inference.py 가 기본 모델의 오차 상한을 검사)
+- STREAMING_RESYNC_EVERY step 마다 window 전체로 다시 prime (오차가 포화되므로 상한보다는 장기 누적 방지용)
+  (한 번에 STREAMING_MAX_STEPS 보다 많은 step 이 밀리거나 첫 호출이면 바로 prime)
+- skip(pruning) 으로 건너뛴 모델은 그 사이 step 을 놓치므로 상태를 버리고, 다시 쓰일 때 그 모델만 prime
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .config import STREAMING_RESYNC_EVERY, STREAMING_MAX_STEPS
+
+
+# ======================================================================
+# 1. NumPy 부품
+# ======================================================================
+
+def _sigmoid(x: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-x))
+
+
+def _relu(x: np.ndarray) -> np.ndarray:
+    return np.maximum(x, 0.0)
+
+
+def _layer_norm(x: np.ndarray, ln: Optional[Tuple[np.ndarray, np.ndarray, float]]) -> np.ndarray:
+    if ln is None:
+        return x
+    gamma, beta, eps = ln
+    mean = x.mean()
+    var = x.var()
+    return (x - mean) / np.sqrt(var + eps) * gamma + beta
+
+
+class _Ring:
+    """
+    고정 길이 (n, c) ring. 두 번씩 기록해서 view() 가 복사 없는 연속 slice (마지막 행 = 최신)
+    초기값 0 = causal zero padding
+    """
+
+    def __init__(self, n: int, c: int):
+        self.n = n
+        self._buf = np.zeros((2 * n, c), dtype=np.float64)
+        self._pos = 0
+
+    def push(self, row: np.ndarray) -> None:
+        self._buf[self._pos] = row
+        self._buf[self._pos + self.n] = row
+        self._pos = (self._pos + 1) % self.n
+
+    def view(self) -> np.ndarray:
+        return self._buf[self._pos:self._pos + self.n]
+
+
+def _causal_conv_at(hist: np.ndarray, kernel: np.ndarray, bias: np.ndarray, dilation: int) -> np.ndarray:
+    """hist 마지막 행 위치의 causal dilated conv 출력 (hist 길이 = (k-1)·d + 1)"""
+    k = kernel.shape[0]
+    out = bias.copy()
+    for j in range(k):
+        out += hist[-1 - (k - 1 - j) * dilation] @ kernel[j]
+    return out
+
+
+class _RecurrentCell:
+    """Keras LSTM / GRU(reset_after=True) 1 step"""
+
+    def __init__(self, layer):
+        kind = type(layer).__name__
+        if kind not in ("LSTM", "GRU"):
+            raise TypeError(f"지원하지 않는 순환 레이어: {kind}")
+        self.kind = kind
+        weights = [np.asarray(w, dtype=np.float64) for w in layer.get_weights()]
+        self.kernel, self.recurrent, self.bias = weights
+        self.units = self.recurrent.shape[0]
+        if kind == "GRU" and self.bias.ndim != 2:
+            raise TypeError("GRU reset_after=False 는 지원하지 않음")
+
+    def zero_state(self) -> List[np.ndarray]:
+        n = 2 if self.kind == "LSTM" else 1
+        return [np.zeros(self.units) for _ in range(n)]
+
+    def step(self, x: np.ndarray, state: List[np.ndarray]) -> Tuple[np.ndarray, List[np.ndarray]]:
+        u = self.units
+        if self.kind == "LSTM":
+            h, c = state
+            z = x @ self.kernel + h @ self.recurrent + self.bias
+            i = _sigmoid(z[:u])
+            f = _sigmoid(z[u:2 * u])
+            g = np.tanh(z[2 * u:3 * u])
+            o = _sigmoid(z[3 * u:])
+            c = f * c + i * g
+            h = o * np.tanh(c)
+            return h, [h, c]
+
+        (h,) = state
+        mx = x @ self.kernel + self.bias[0]
+        mh = h @ self.recurrent + self.bias[1]
+        z = _sigmoid(mx[:u] + mh[:u])
+        r = _sigmoid(mx[u:2 * u] + mh[u:2 * u])
+        hh = np.tanh(mx[2 * u:] + r * mh[2 * u:])
+        h = z * h + (1.0 - z) * hh
+        return h, [h]
+
+
+class _AttentionHead:
+    """커스텀 Attention (위치별 bias + softmax pooling) → Dense(1)"""
+
+    def __init__(self, attention, dense):
+        w, b = [np.asarray(v, dtype=np.float64) for v in attention.get_weights()]
+        self.w = w[:, 0]
+        self.b = b[:, 0]
+        kd, bd = [np.asarray(v, dtype=np.float64) for v in dense.get_weights()]
+        self.dense_w = kd[:, 0]
+        self.dense_b = float(bd[0])
+
+    def __call__(self, hidden: np.ndarray) -> float:
+        e = np.tanh(hidden @ self.w + self.b)
+        a = np.exp(e - e.max())
+        a /= a.sum()
+        return float((a @ hidden) @ self.dense_w + self.dense_b)
+
+
+def _layers_of(model, kind: str) -> List[Any]:
+    return [layer for layer in model.layers if type(layer).__name__ == kind]
+
+
+# ======================================================================
+# 2. 모델별 streamer
+#    new_state() / step(state, row) / output(state)
+# ======================================================================
+
+class RecurrentAttentionStreamer:
+    """Input → LSTM|GRU(return_sequences) → Attention → Dense"""
+
+    def __init__(self, model, seq_len: int):
+        rnn = [l for l in model.layers if type(l).__name__ in ("LSTM", "GRU")]
+        if len(rnn) != 1:
+            raise TypeError("순환 레이어가 1개인 구조만 지원")
+        self.cell = _RecurrentCell(rnn[0])
+        self.head = _AttentionHead(_layers_of(model, "Attention")[0], _layers_of(model, "Dense")[-1])
+        self.seq_len = seq_len
+
+    def new_state(self) -> Dict[str, Any]:
+        return {"rnn": self.cell.zero_state(), "hidden": _Ring(self.seq_len, self.cell.units)}
+
+    def step(self, state: Dict[str, Any], row: np.ndarray) -> None:
+        h, state["rnn"] = self.cell.step(row, state["rnn"])
+        state["hidden"].push(h)
+
+    def output(self, state: Dict[str, Any]) -> float:
+        return self.head(state["hidden"].view())
+
+
+class TCNStreamer:
+    """
+    TCN block × L → GlobalAveragePooling1D → Dense
+    block: h = relu(LN?(causal_conv1(x))); h = LN?(causal_conv2(h)); out = relu(res(x) + h)
+    (LayerNormalization / 1x1 residual conv 는 있을 때만)
+    """
+
+    def __init__(self, model, seq_len: int):
+        self.blocks = []
+        cur: Dict[str, list] = {"conv": [], "ln": [], "res": []}
+        for layer in model.layers:
+            kind = type(layer).__name__
+            if kind == "Conv1D":
+                w = [np.asarray(v, dtype=np.float64) for v in layer.get_weights()]
+                if layer.padding == "causal":
+                    cur["conv"].append((w[0], w[1], int(layer.dilation_rate[0])))
+                elif w[0].shape[0] == 1:
+                    cur["res"].append((w[0][0], w[1]))
+                else:
+                    raise TypeError(f"지원하지 않는 Conv1D padding: {layer.padding}")
+            elif kind == "LayerNormalization":
+                gamma, beta = [np.asarray(v, dtype=np.float64) for v in layer.get_weights()]
+                cur["ln"].append((gamma, beta, float(layer.epsilon)))
+            elif kind == "Add":
+                if len(cur["conv"]) != 2 or len(cur["ln"]) not in (0, 2) or len(cur["res"]) > 1:
+                    raise TypeError("TCN block 구조를 해석할 수 없음")
+                self.blocks.append({
+                    "conv1": cur["conv"][0],
+                    "conv2": cur["conv"][1],
+                    "ln1": cur["ln"][0] if cur["ln"] else None,
+                    "ln2": cur["ln"][1] if cur["ln"] else None,
+                    "res": cur["res"][0] if cur["res"] else None,
+                })
+                cur = {"conv": [], "ln": [], "res": []}
+        if not self.blocks:
+            raise TypeError("TCN block 없음")
+
+        kd, bd = [np.asarray(v, dtype=np.float64) for v in _layers_of(model, "Dense")[-1].get_weights()]
+        self.dense_w = kd[:, 0]
+        self.dense_b = float(bd[0])
+        self.seq_len = seq_len
+
+    def new_state(self) -> Dict[str, Any]:
+        rings = []
+        for blk in self.blocks:
+            k1, _, d = blk["conv1"]
+            k2, _, _ = blk["conv2"]
+            rings.append((
+                _Ring((k1.shape[0] - 1) * d + 1, k1.shape[1]),
+                _Ring((k2.shape[0] - 1) * d + 1, k2.shape[1]),
+            ))
+        filters = self.blocks[-1]["conv2"][0].shape[2]
+        return {"rings": rings, "out": _Ring(self.seq_len, filters)}
+
+    def step(self, state: Dict[str, Any], row: np.ndarray) -> None:
+        x = row
+        for blk, (x_ring, h_ring) in zip(self.blocks, state["rings"]):
+            x_ring.push(x)
+            k1, b1, d = blk["conv1"]
+            h = _relu(_layer_norm(_causal_conv_at(x_ring.view(), k1, b1, d), blk["ln1"]))
+            h_ring.push(h)
+            k2, b2, _ = blk["conv2"]
+            h = _layer_norm(_causal_conv_at(h_ring.view(), k2, b2, d), blk["ln2"])
+            res = x @ blk["res"][0] + blk["res"][1] if blk["res"] is not None else x
+            x = _relu(res + h)
+        state["out"].push(x)
+
+    def output(self, state: Dict[str, Any]) -> float:
+        return float(state["out"].view().mean(axis=0) @ self.dense_w + self.dense_b)
+
+
+class ConvRecurrentAttentionStreamer:
+    """
+    Conv1D(same,k=3)+relu → Conv1D(same,k=3)+relu → LSTM → Attention → Dense
+
+    입력 x_t 가 들어오면
+      c1[t-1] 확정 (x[t-2..t]) → c2[t-2] 확정 (c1[t-3..t-1]) → LSTM 을 t-2 까지 commit
+    window 끝 2 step (t-1, t) 은 오른쪽 zero padding 으로 추측 계산 후 commit 상태에서 2 step 진행.
+    """
+
+    LAG = 2
+
+    def __init__(self, model, seq_len: int):
+        convs = _layers_of(model, "Conv1D")
+        if len(convs) != 2 or any(c.padding != "same" or c.kernel_size[0] != 3 for c in convs):
+            raise TypeError("Conv1D(same, k=3) 2개 구조만 지원")
+        self.k1, self.b1 = [np.asarray(v, dtype=np.float64) for v in convs[0].get_weights()]
+        self.k2, self.b2 = [np.asarray(v, dtype=np.float64) for v in convs[1].get_weights()]
+        self.cell = _RecurrentCell(_layers_of(model, "LSTM")[0])
+        self.head = _AttentionHead(_layers_of(model, "Attention")[0], _layers_of(model, "Dense")[-1])
+        self.seq_len = seq_len
+
+    def new_state(self) -> Dict[str, Any]:
+        return {
+            "t": 0,
+            "x": _Ring(3, self.k1.shape[1]),      # x[t-2..t]
+            "c1": _Ring(3, self.k1.shape[2]),     # 확정 c1[t-3..t-1]
+            "rnn": self.cell.zero_state(),         # c2[..t-2] 까지 commit
+            "hidden": _Ring(self.seq_len - self.LAG, self.cell.units),
+            "tail": np.zeros((self.LAG, self.cell.units)),
+        }
+
+    def _conv(self, rows: np.ndarray, kernel: np.ndarray, bias: np.ndarray) -> np.ndarray:
+        return _relu(rows[0] @ kernel[0] + rows[1] @ kernel[1] + rows[2] @ kernel[2] + bias)
+
+    def step(self, state: Dict[str, Any], row: np.ndarray) -> None:
+        t = state["t"]
+        state["x"].push(row)
+        x = state["x"].view()
+
+        if t >= 1:
+            state["c1"].push(self._conv(x, self.k1, self.b1))
+        c1 = state["c1"].view()
+        if t >= 2:
+            h, state["rnn"] = self.cell.step(self._conv(c1, self.k2, self.b2), state["rnn"])
+            state["hidden"].push(h)
+
+        # window 끝 추측 계산 (x[t+1] = 0)
+        zero = np.zeros_like(row)
+        c1_t = self._conv(np.stack([x[1], x[2], zero]), self.k1, self.b1)
+        c2_prev = self._conv(np.stack([c1[1], c1[2], c1_t]), self.k2, self.b2)
+        c2_t = self._conv(np.stack([c1[2], c1_t, np.zeros_like(c1_t)]), self.k2, self.b2)
+        h1, s = self.cell.step(c2_prev, state["rnn"])
+        h2, _ = self.cell.step(c2_t, s)
+        state["tail"] = np.stack([h1, h2])
+        state["t"] = t + 1
+
+    def output(self, state: Dict[str, Any]) -> float:
+        return self.head(np.concatenate([state["hidden"].view(), state["tail"]]))
+
+
+STREAMERS = {
+    "lstm_attention_reg": RecurrentAttentionStreamer,
+    "gru_attention_reg": RecurrentAttentionStreamer,
+    "tcn_reg": TCNStreamer,
+    "attn_lstm_cnn_reg": ConvRecurrentAttentionStreamer,
+}
+
+
+# ======================================================================
+# 3. 심볼별 상태 관리
+# ======================================================================
+
+class StreamingInference:
+    """
+    predict(batch, keys) : keys[b] = (심볼, 누적 step 수) → {모델: (batch,) scaled 예측}
+    누적 step 수 차이만큼 window 끝 행을 새 step 으로 반영한다.
+    """
+
+    def __init__(
+        self,
+        models: Dict[str, Any],
+        seq_len: int,
+        resync_every: int = STREAMING_RESYNC_EVERY,
+        max_steps: int = STREAMING_MAX_STEPS,
+    ):
+        self.streamers: Dict[str, Any] = {}
+        for name, model in models.items():
+            cls = STREAMERS.get(name)
+            if cls is None:
+                continue
+            try:
+                self.streamers[name] = cls(model, seq_len)
+            except Exception as e:
+                print(f"[streaming] ⚠️ {name} 증분 추론 제외: {e}")
+        self.resync_every = int(resync_every)
+        self.max_steps = int(max_steps)
+        self._lock = threading.Lock()
+        # key → {"count", "since", "states": {name: state}}
+        self._symbols: Dict[Hashable, Dict[str, Any]] = {}
+        self.primes = 0
+        self.steps = 0
+
+    @property
+    def names(self) -> List[str]:
+        return list(self.streamers)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._symbols.clear()
+
+    def _prime(self, window: np.ndarray, names: Sequence[str]) -> Dict[str, Any]:
+        states = {}
+        for name in names:
+            st = self.streamers[name].new_state()
+            for row in window:
+                self.streamers[name].step(st, row)
+            states[name] = st
+        self.primes += 1
+        return states
+
+    def predict(
+        self,
+        model_input: np.ndarray,
+        keys: Sequence[Tuple[Hashable, int]],
+        skip: Iterable[str] = (),
+    ) -> Dict[str, np.ndarray]:
+        names = [n for n in self.streamers if n not in set(skip)]
+        if not names:
+            return {}
+
+        x = np.asarray(model_input, dtype=np.float64)
+        out = {name: np.empty(len(x), dtype=np.float32) for name in names}
+
+        with self._lock:
+            for b, (key, count) in enumerate(keys):
+                entry = self._symbols.get(key)
+                new = count - entry["count"] if entry is not None else None
+
+                if (
+                    entry is None
+                    or new < 0
+                    or new > self.max_steps
+                    or (self.resync_every > 0 and entry["since"] + new >= self.resync_every)
+                ):
+                    entry = self._symbols[key] = {
+                        "count": count, "since": 0, "states": self._prime(x[b], names),
+                    }
+                else:
+                    if new > 0:
+                        # 건너뛴 모델은 이번 step 이 반영되지 않으므로 상태를 버린다 (다시 쓰일 때 prime)
+                        for name in [n for n in entry["states"] if n not in names]:
+                            del entry["states"][name]
+                        for name, st in entry["states"].items():
+                            for row in x[b, -new:]:
+                                self.streamers[name].step(st, row)
+                        entry["count"] = count
+                        entry["since"] += new
+                        self.steps += new
+                    missing = [n for n in names if n not in entry["states"]]
+                    if missing:
+                        entry["states"].update(self._prime(x[b], missing))
+
+                for name in names:
+                    out[name][b] = self.streamers[name].output(entry["states"][name])
+        return out
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "models": self.names,
+            "symbols": len(self._symbols),
+            "primes": self.primes,
+            "steps": self.steps,
+        }
@@ -0,0 +1,146 @@
+# ws_broadcast.py
+"""
+SIGMA A 프로젝트 - WebSocket broadcast hub
+
+- 신호 1개당 JSON 직렬화는 1번만 (orjson 이 있으면 사용, 없으면 json)
+- 클라이언트마다 bounded queue + 전용 sender task
+  → 느린 클라이언트가 다른 클라이언트 전송을 지연시키지 않음
+- queue 가 가득 차면 가장 오래된 frame 을 버림 (최신 신호만 의미 있으므로 coalesce)
+- /ws?mode=delta 클라이언트에는 심볼별 직전 신호 대비 바뀐 필드만 전송
+    delta frame : {"_delta": true, "symbol": ..., <바뀐 필드>, "_removed": [...]}
+    full frame  : 기존과 동일한 신호 dict
+  frame 이 버려지면 다음 전송은 full frame 으로 다시 동기화
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Set
+
+from fastapi import WebSocket
+
+from .config import WS_CLIENT_QUEUE_SIZE, WS_SEND_TIMEOUT_SEC
+
+try:
+    import orjson
+
+    def _dumps(obj: Any) -> str:
+        return orjson.dumps(
+            obj, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS, default=str
+        ).decode()
+
+except ImportError:  # orjson 미설치 환경
+    def _dumps(obj: Any) -> str:
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+@dataclass
+class _Frame:
+    symbol: Optional[str]
+    full: str
+    delta: Optional[str]
+
+
+def _diff(prev: Dict[str, Any], cur: Dict[str, Any]) -> Dict[str, Any]:
+    """최상위 필드 기준 변경분 (models 같은 리스트는 바뀌면 통째로)"""
+    out: Dict[str, Any] = {"_delta": True, "symbol": cur.get("symbol")}
+    for k, v in cur.items():
+        if k not in prev or prev[k] != v:
+            out[k] = v
+    removed = [k for k in prev if k not in cur]
+    if removed:
+        out["_removed"] = removed
+    return out
+
+
+class _Client:
+    def __init__(self, ws: WebSocket, mode: str):
+        self.ws = ws
+        self.mode = mode
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=WS_CLIENT_QUEUE_SIZE)
+        # delta 모드에서 base 가 일치하는 심볼 (비어 있으면 다음 frame 은 full)
+        self.synced: Set[Optional[str]] = set()
+        self.dropped = 0
+        self.task: Optional[asyncio.Task] = None
+
+    def offer(self, frame: _Frame) -> None:
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+            self.synced.clear()
+        self.queue.put_nowait(frame)
+
+    def pick(self, frame: _Frame) -> str:
+        if self.mode != "delta":
+            return frame.full
+        if frame.delta is not None and frame.symbol in self.synced:
+            return frame.delta
+        self.synced.add(frame.symbol)
+        return frame.full
+
+
+class ConnectionManager:
+    def __init__(self):
+        self._clients: Dict[WebSocket, _Client] = {}
+        self._last: Dict[Optional[str], Dict[str, Any]] = {}
+
+    @property
+    def active(self) -> List[WebSocket]:
+        return list(self._clients)
+
+    async def connect(self, ws: WebSocket, mode: str = "full"):
+        await ws.accept()
+        client = _Client(ws, "delta" if mode == "delta" else "full")
+        client.task = asyncio.create_task(self._sender(client))
+        self._clients[ws] = client
+
+    def disconnect(self, ws: WebSocket):
+        client = self._clients.pop(ws, None)
+        if client is not None and client.task is not None:
+            client.task.cancel()
+
+    async def _sender(self, client: _Client):
+        try:
+            while True:
+                frame = await client.queue.get()
+                await asyncio.wait_for(
+                    client.ws.send_text(client.pick(frame)), timeout=WS_SEND_TIMEOUT_SEC
+                )
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # 전송 실패 / timeout → 연결 정리
+            self._clients.pop(client.ws, None)
+            try:
+                await client.ws.close()
+            except Exception:
+                pass
+
+    async def broadcast(self, message: Dict[str, Any]):
+        """
+        직렬화 1회 후 각 클라이언트 queue 에 넣고 바로 반환 (전송은 sender task)
+        """
+        symbol = message.get("symbol")
+        prev = self._last.get(symbol)
+        self._last[symbol] = message
+
+        if not self._clients:
+            return
+
+        full = _dumps(message)
+        delta = None
+        if prev is not None and any(c.mode == "delta" for c in self._clients.values()):
+            delta = _dumps(_diff(prev, message))
+
+        frame = _Frame(symbol, full, delta)
+        for client in self._clients.values():
+            client.offer(frame)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "clients": len(self._clients),
+            "delta_clients": sum(c.mode == "delta" for c in self._clients.values()),
+            "dropped": sum(c.dropped for c in self._clients.values()),
+        }
@@ -0,0 +1,5 @@
+# backend 디렉터리에서 `python -m pytest tests` 로 실행 (app 패키지를 import 경로에 추가)
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
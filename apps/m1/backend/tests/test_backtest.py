@@ -0,0 +1,55 @@
+"""
+backtest 벡터화 helper: realized_returns / evaluate, 그리고 regime / 앙상블 score 가
+샘플 단위 규칙 (signal_generator._classify_regime, model_runner 가중 평균) 과 같은지
+"""
+
+import numpy as np
+import pytest
+
+from app import backtest
+from app.config import BEAR_THRESHOLD, BULL_THRESHOLD
+from app.model_runner import _scaled_to_signal, _signal_to_confidence
+from app.signal_generator import _classify_regime
+
+
+def test_realized_returns_first_is_zero_and_skips_zero_price():
+    r = backtest.realized_returns(np.array([100.0, 110.0, 0.0, 50.0, 55.0]))
+    assert r == pytest.approx([0.0, 0.1, -1.0, 0.0, 0.1])   # 직전 가격 0 → 0
+
+
+def test_evaluate_pnl_hit_rate_turnover():
+    positions = np.array([[1.0, 0.0], [1.0, -1.0], [-1.0, -1.0], [-1.0, 0.0]])
+    returns = np.array([0.0, 0.02, 0.01, -0.03])
+    pnl, hit, turnover = backtest.evaluate(positions, returns, cost=0.001)
+
+    assert pnl[:, 0] == pytest.approx([-0.001, 0.02, -0.01 - 0.002, 0.03])
+    assert pnl[:, 1] == pytest.approx([0.0, -0.02 - 0.001, -0.01, 0.0 - 0.001])
+    assert hit == pytest.approx([2 / 3, 0.0])               # 수익률 0 인 시점은 제외
+    assert turnover == pytest.approx([3 / 4, 2 / 4])
+
+
+def test_classify_regime_matches_signal_generator():
+    eps = 1e-9
+    score = np.array([
+        -1.0, BEAR_THRESHOLD - eps, BEAR_THRESHOLD, BEAR_THRESHOLD + eps, 0.0,
+        BULL_THRESHOLD - eps, BULL_THRESHOLD, BULL_THRESHOLD + eps, 1.0,
+    ])
+    got = [backtest.REGIME_NAMES[int(r)] for r in backtest.classify_regime(score)]
+    assert got == [_classify_regime(float(s)) for s in score]
+
+
+def test_ensemble_score_matches_per_sample_weighted_mean():
+    preds = np.random.default_rng(0).uniform(-0.2, 1.2, size=(50, 8))   # clip 구간 포함
+    signals = backtest.scaled_to_signal(preds)
+    conf = backtest.signal_to_confidence(signals)
+    score = backtest.ensemble_score(signals, conf)
+
+    for i, row in enumerate(preds):
+        weighted_sum = weight_total = 0.0
+        for j, y_scaled in enumerate(row):
+            signal = _scaled_to_signal(float(y_scaled))
+            c = _signal_to_confidence(signal)
+            assert (signals[i, j], conf[i, j]) == pytest.approx((signal, c), abs=1e-12)
+            weighted_sum += signal * c
+            weight_total += c
+        assert score[i] == pytest.approx(weighted_sum / weight_total, abs=1e-12)
@@ -0,0 +1,104 @@
+"""
+KISRestClient.get_prices ↔ kis_client_stub (로컬 KIS REST 스텁 서버)
+토큰 캐시 / EGW00201 초당 건수 초과 재시도 / 만료 토큰(EGW00123, 401) 재발급
+"""
+
+import asyncio
+
+import pytest
+from aiohttp.test_utils import TestServer
+
+from app import kis_api_client
+from app.kis_api_client import KISRestClient
+from app.kis_client_stub import create_app
+
+
+@pytest.fixture
+def kis_env(monkeypatch, tmp_path):
+    """스텁 서버 URL 을 KIS_BASE_URL 로 쓰는 클라이언트 팩토리 (토큰 캐시는 tmp_path)"""
+    monkeypatch.setattr(kis_api_client, "KIS_TOKEN_CACHE_PATH", tmp_path / "kis_token.json")
+    monkeypatch.setattr(kis_api_client, "KIS_APP_KEY", "test-key")
+    monkeypatch.setattr(kis_api_client, "KIS_APP_SECRET", "test-secret")
+
+    def run(scenario, rate_limit: float = 15.0, **stub_kwargs):
+        monkeypatch.setattr(kis_api_client, "KIS_RATE_LIMIT_PER_SEC", rate_limit)
+
+        async def main():
+            app = create_app(**stub_kwargs)
+            server = TestServer(app)
+            await server.start_server()
+            monkeypatch.setattr(kis_api_client, "KIS_BASE_URL", str(server.make_url("")).rstrip("/"))
+            clients = []
+
+            def new_client() -> KISRestClient:
+                clients.append(KISRestClient())
+                return clients[-1]
+
+            try:
+                return await scenario(new_client, app["state"])
+            finally:
+                for c in clients:
+                    await c.close()
+                await server.close()
+
+        return asyncio.run(main())
+
+    return run
+
+
+def test_get_prices_reuses_cached_token(kis_env):
+    async def scenario(new_client, state):
+        client = new_client()
+        first = await client.get_prices(["005930", "000660", "101600"])
+        second = await client.get_prices(["005930"])
+        # 새 프로세스 = 새 클라이언트: 파일 캐시의 토큰을 그대로 사용
+        third = await new_client().get_prices(["000660"])
+        return first, second, third, dict(state)
+
+    first, second, third, state = kis_env(scenario)
+    assert all(isinstance(p, float) and p > 0 for p in (*first, *second, *third))
+    assert state["token_requests"] == 1
+    assert state["quote_requests"] == 5
+    assert state["rejected"] == 0
+
+
+def test_rate_limited_call_is_retried(kis_env):
+    async def scenario(new_client, state):
+        client = new_client()
+        await client.get_prices(["005930", "000660"])   # 스텁 한도(초당 2건) 소진
+        await asyncio.sleep(0.85)
+        # 아직 1초 window 안 → EGW00201 → 1/rate(=0.25s) 쉬고 재시도 때는 window 를 벗어남
+        retried = await client.get_prices(["101600"])
+        return retried, dict(state)
+
+    retried, state = kis_env(scenario, rate_limit=4, rate_per_sec=2)
+    assert isinstance(retried[0], float)
+    assert state["rejected"] == 1
+    assert state["quote_requests"] == 3
+
+
+def test_rate_limited_twice_returns_none(kis_env):
+    async def scenario(new_client, state):
+        client = new_client()
+        return await client.get_prices(["005930", "000660"]), dict(state)
+
+    # 클라이언트 한도(초당 20)가 스텁(초당 1)보다 커서 재시도도 거절 → None (예외 아님)
+    prices, state = kis_env(scenario, rate_limit=20, rate_per_sec=1)
+    assert prices.count(None) == 1
+    assert state["rejected"] == 2
+
+
+@pytest.mark.parametrize("expired_status", [500, 401])
+def test_expired_token_is_refreshed(kis_env, expired_status):
+    async def scenario(new_client, state):
+        client = new_client()
+        await client.get_prices(["005930"])
+        state["tokens"].clear()                 # 서버 측에서 토큰 만료
+        refreshed = await client.get_prices(["005930"])
+        return refreshed, client.access_token, dict(state)
+
+    refreshed, token, state = kis_env(scenario, expired_status=expired_status)
+    assert isinstance(refreshed[0], float)
+    assert state["token_requests"] == 2
+    assert state["rejected"] == 1
+    assert token in state["tokens"]
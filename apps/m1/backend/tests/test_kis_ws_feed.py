@@ -0,0 +1,268 @@
+"""
+KIS 실시간 체결 수집: parse_tick_frame / BarAggregator (bar 집계, 빈 구간 채움, 늦은 tick)
+KISWebSocketFeed ↔ kis_client_stub 가짜 H0STCNT0 WebSocket (수신, 서버 끊김 후 재접속)
+"""
+
+import asyncio
+import time
+from datetime import date, datetime, time as dtime
+from types import SimpleNamespace
+
+import aiohttp
+import pytest
+from aiohttp.test_utils import TestServer
+
+from app import kis_ws_client
+from app.config import KST, kis_code_for
+from app.kis_client_stub import create_app
+from app.kis_ws_client import BarAggregator, KISWebSocketFeed, Tick, parse_tick_frame
+from app.market_calendar import KRX_HOLIDAYS, MarketCalendar
+
+T0 = 1_700_000_000.0   # 구간 경계 (interval 1초)
+
+
+def _frame(records, count=None) -> str:
+    fields = []
+    for code, hhmmss, price, volume in records:
+        rec = ["0"] * 46
+        rec[0], rec[1], rec[2], rec[12] = code, hhmmss, str(price), str(volume)
+        fields.extend(rec)
+    return f"0|H0STCNT0|{len(records) if count is None else count}|" + "^".join(fields)
+
+
+# ----------------------------------------------------------------------
+# frame 파싱
+# ----------------------------------------------------------------------
+
+def test_parse_multi_record_frame():
+    now = datetime(2026, 3, 3, 10, 0, 0, tzinfo=KST)
+    ticks = parse_tick_frame(
+        _frame([("005930", "093001", 70100, 10), ("005930", "093002", 70200, 5)]), now
+    )
+    assert [(t.code, t.price, t.volume) for t in ticks] == [("005930", 70100.0, 10.0), ("005930", 70200.0, 5.0)]
+    assert ticks[1].ts - ticks[0].ts == 1.0
+    assert ticks[0].ts == datetime(2026, 3, 3, 9, 30, 1, tzinfo=KST).timestamp()
+
+
+@pytest.mark.parametrize("raw", [
+    _frame([("005930", "093001", 70100, 10)], count="x1"),   # 깨진 건수
+    _frame([("005930", "093001", 70100, 10)], count=""),
+    "1|H0STCNT0|001|encrypted",                                 # 암호화 frame
+    "0|H0STASP0|001|a^b^c",                                     # 지원하지 않는 tr_id
+    "0|H0STCNT0",
+])
+def test_parse_skips_bad_frames(raw):
+    assert parse_tick_frame(raw) == []
+
+
+def test_parse_skips_bad_record_keeps_rest():
+    ticks = parse_tick_frame(_frame([("005930", "093001", "abc", 1), ("005930", "093002", 70200, 5)]))
+    assert [t.price for t in ticks] == [70200.0]
+
+
+# ----------------------------------------------------------------------
+# BarAggregator
+# ----------------------------------------------------------------------
+
+class _AlwaysOpen:
+    """하루 종일 열린 달력 (장 운영시간과 무관한 집계 테스트용)"""
+
+    def session(self, day):
+        return datetime.combine(day, dtime.min, tzinfo=KST), datetime.combine(day, dtime.max, tzinfo=KST)
+
+    def seconds_until_open(self, dt=None):
+        return 0.0
+
+
+def _agg(interval=1.0, grace=0.2, calendar=None):
+    queue = asyncio.Queue(maxsize=1000)
+    return BarAggregator(queue, interval, grace, calendar or _AlwaysOpen()), queue
+
+
+def _bars(queue):
+    out = []
+    while not queue.empty():
+        b = queue.get_nowait()
+        out.append((b.start - T0, *b.ohlcv(), b.ticks))
+    return out
+
+
+def test_ticks_in_one_interval_make_one_bar():
+    agg, q = _agg()
+    for dt, price, vol in [(0.1, 100, 1), (0.4, 103, 2), (0.6, 99, 3), (0.9, 101, 4)]:
+        agg.add("A", Tick("A", T0 + dt, price, vol))
+    assert _bars(q) == []                       # 구간이 끝나기 전에는 내보내지 않음
+    agg.flush(now=T0 + 1.3)                     # 경계 + grace 이후
+    assert _bars(q) == [(0.0, 100, 103, 99, 101, 10.0, 4)]
+
+
+def test_grace_period_delays_flush():
+    agg, q = _agg(grace=0.2)
+    agg.add("A", Tick("A", T0 + 0.5, 100, 1))
+    agg.flush(now=T0 + 1.1)                     # 경계는 지났지만 grace 안
+    assert _bars(q) == []
+    agg.flush(now=T0 + 1.25)
+    assert len(_bars(q)) == 1
+
+
+def test_gap_is_filled_with_flat_bars():
+    agg, q = _agg()
+    agg.add("A", Tick("A", T0 + 0.5, 100, 1))
+    agg.add("A", Tick("A", T0 + 3.5, 105, 2))   # 1, 2 초 구간에는 tick 없음
+    assert _bars(q) == [
+        (0.0, 100, 100, 100, 100, 1.0, 1),
+        (1.0, 100, 100, 100, 100, 0.0, 0),
+        (2.0, 100, 100, 100, 100, 0.0, 0),
+    ]
+    # tick 이 끊긴 심볼도 flush 때 직전 종가로 시간 격자 유지
+    agg.flush(now=T0 + 6.5)
+    assert _bars(q) == [
+        (3.0, 105, 105, 105, 105, 2.0, 1),
+        (4.0, 105, 105, 105, 105, 0.0, 0),
+        (5.0, 105, 105, 105, 105, 0.0, 0),
+    ]
+
+
+def test_long_gap_fill_is_capped():
+    agg, q = _agg()
+    agg.add("A", Tick("A", T0 + 0.5, 100, 1))
+    agg.add("A", Tick("A", T0 + 1000.5, 101, 1))
+    bars = _bars(q)
+    assert len(bars) == 1 + kis_ws_client._MAX_GAP_FILL
+    assert bars[-1][0] == 999.0
+
+
+def test_late_tick_joins_current_interval():
+    agg, q = _agg()
+    agg.add("A", Tick("A", T0 + 0.5, 100, 1))
+    agg.flush(now=T0 + 1.3)                     # 0 초 bar 내보냄
+    agg.add("A", Tick("A", T0 + 0.9, 98, 2))    # 이미 내보낸 구간의 늦은 tick
+    agg.add("A", Tick("A", T0 + 1.4, 102, 1))
+    agg.flush(now=T0 + 2.3)
+    assert _bars(q) == [
+        (0.0, 100, 100, 100, 100, 1.0, 1),
+        (1.0, 98, 102, 98, 102, 3.0, 2),
+    ]
+
+
+def test_symbols_are_independent_and_full_queue_drops_oldest():
+    queue = asyncio.Queue(maxsize=2)
+    agg = BarAggregator(queue, 1.0, 0.0, _AlwaysOpen())
+    agg.add("A", Tick("A", T0 + 0.1, 10, 1))
+    agg.add("B", Tick("B", T0 + 0.2, 20, 1))
+    agg.flush(now=T0 + 2.0)                     # A, B 각각 0, 1 초 bar → 4개 중 2개만 남음
+    assert agg.dropped == 2
+    assert [(b.symbol, b.start - T0) for b in (queue.get_nowait(), queue.get_nowait())] == [
+        ("B", 0.0), ("B", 1.0),
+    ]
+
+
+def _kst(day: date, hh: int, mm: int, ss: float = 0.0) -> float:
+    return datetime.combine(day, dtime(hh, mm), tzinfo=KST).timestamp() + ss
+
+
+def test_no_bars_while_closed_and_fresh_grid_at_open():
+    fri, mon = date(2026, 10, 16), date(2026, 10, 19)   # 금요일 마감 → 월요일 개장
+    agg, q = _agg(calendar=MarketCalendar(KRX_HOLIDAYS))
+
+    agg.add("A", Tick("A", _kst(fri, 15, 29, 58.5), 100, 1))
+    agg.flush(now=_kst(fri, 15, 29, 59.3))
+    assert q.get_nowait().start == _kst(fri, 15, 29, 58)
+    # 마감 직후 flush: 마감 시각이 속한 구간 (15:30:00) 까지만 flat bar
+    agg.flush(now=_kst(fri, 15, 30, 5.3))
+    assert [b.start - _kst(fri, 15, 29, 59) for b in (q.get_nowait(), q.get_nowait())] == [0.0, 1.0]
+    assert q.empty() and not agg.in_session
+
+    # 주말 동안 계속 flush / 장외 tick → bar 없음
+    t = _kst(fri, 15, 31)
+    while t < _kst(mon, 9, 0):
+        agg.flush(now=t)
+        t += 97.0
+    agg.add("A", Tick("A", _kst(mon, 8, 59, 30), 105, 1))
+    assert q.empty() and agg.dropped == 0
+
+    # 개장 후 첫 tick 부터 새 격자: 직전 종가로 밤새 구간을 채우지 않음
+    agg.add("A", Tick("A", _kst(mon, 9, 0, 0.4), 107, 2))
+    agg.flush(now=_kst(mon, 9, 0, 1.3))
+    assert agg.in_session
+    bar = q.get_nowait()
+    assert (bar.start, bar.ohlcv()) == (_kst(mon, 9, 0), (107, 107, 107, 107, 2.0))
+    assert q.empty()
+    agg.flush(now=_kst(mon, 9, 0, 3.3))                 # 이후 장중은 flat bar 로 격자 유지
+    assert [b.close for b in (q.get_nowait(), q.get_nowait())] == [107, 107]
+
+
+# ----------------------------------------------------------------------
+# KISWebSocketFeed ↔ 가짜 WS 서버
+# ----------------------------------------------------------------------
+
+def test_receive_skips_malformed_frame_without_reconnect(monkeypatch):
+    monkeypatch.setattr(kis_ws_client, "market_calendar", _AlwaysOpen())
+    feed = KISWebSocketFeed(["A"])
+    code = kis_code_for("A")
+    now = datetime.now(tz=KST).strftime("%H%M%S")
+    msgs = [
+        _frame([(code, now, 100, 1)], count="garbage"),
+        _frame([(code, now, 101, 2)]),
+    ]
+
+    class FakeWS:
+        async def send_str(self, _):
+            pass
+
+        def __aiter__(self):
+            async def gen():
+                for m in msgs:
+                    yield SimpleNamespace(type=aiohttp.WSMsgType.TEXT, data=m)
+            return gen()
+
+    asyncio.run(feed._receive(FakeWS()))
+    assert feed.ticks == 1
+    assert feed.last_price("A") == 101.0
+
+
+async def _wait_for(cond, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not cond():
+        if time.monotonic() > deadline:
+            raise AssertionError("timeout")
+        await asyncio.sleep(0.02)
+
+
+def test_feed_receives_ticks_and_reconnects(monkeypatch):
+    monkeypatch.setattr(kis_ws_client, "KIS_APP_KEY", "test-key")
+    monkeypatch.setattr(kis_ws_client, "KIS_APP_SECRET", "test-secret")
+    monkeypatch.setattr(kis_ws_client, "market_calendar", _AlwaysOpen())
+
+    async def main():
+        app = create_app(ticks_per_sec=50.0)
+        state = app["state"]
+        server = TestServer(app)
+        await server.start_server()
+        base = str(server.make_url("")).rstrip("/")
+        monkeypatch.setattr(kis_ws_client, "KIS_BASE_URL", base)
+        monkeypatch.setattr(kis_ws_client, "KIS_WS_URL", base.replace("http", "ws", 1))
+
+        feed = KISWebSocketFeed(["KOSPI200", "005930"])
+        feed.start()
+        try:
+            await _wait_for(lambda: feed.has_data("KOSPI200") and feed.has_data("005930"))
+            assert feed.connected and feed.reconnects == 0
+
+            # 서버 측에서 연결 종료 → backoff 후 재접속, 구독 다시 전송
+            for ws in list(state["sockets"]):
+                await ws.close()
+            await _wait_for(lambda: feed.reconnects == 1)
+            before = feed.ticks
+            await _wait_for(lambda: feed.connected and feed.ticks > before + 10)
+
+            # flush 루프가 완성 bar 를 queue 로 내보냄
+            await _wait_for(lambda: not feed.queue.empty())
+            bars = feed.drain()
+            assert set(bars) <= {"KOSPI200", "005930"}
+            assert all(b.high >= b.low > 0 for bs in bars.values() for b in bs)
+        finally:
+            await feed.stop()
+            await server.close()
+
+    asyncio.run(main())
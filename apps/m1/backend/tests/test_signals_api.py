@@ -0,0 +1,39 @@
+"""
+/signals: limit<=0 ("전체") 와 큰 limit 도 SIGNALS_MAX_LIMIT 까지만 조회
+"""
+
+import asyncio
+
+import pytest
+
+from app import main
+from app.config import SIGNALS_MAX_LIMIT
+
+
+@pytest.fixture
+def queried(monkeypatch):
+    calls = []
+
+    def fake_query(since, until, regime, symbol, limit):
+        calls.append({"since": since, "symbol": symbol, "limit": limit})
+        return []
+
+    monkeypatch.setattr(main, "query_signals", fake_query)
+    return calls
+
+
+def _get(**params):
+    args = dict(limit=120, symbol=None, since=None, until=None, regime=None, format="json")
+    args.update(params)
+    return asyncio.run(main.signals(**args))
+
+
+@pytest.mark.parametrize("limit", [0, -1, SIGNALS_MAX_LIMIT * 10])
+def test_unbounded_request_is_capped(queried, limit):
+    _get(limit=limit, symbol="KOSPI200", since="2026-10-16T00:00:00")
+    assert queried == [{"since": "2026-10-16T00:00:00", "symbol": "KOSPI200", "limit": SIGNALS_MAX_LIMIT}]
+
+
+def test_limit_under_cap_is_kept(queried):
+    _get(limit=300, since="2026-10-16T00:00:00")
+    assert queried[0]["limit"] == 300
@@ -0,0 +1,72 @@
+"""
+StreamingFeatureEngine (LiveDataProcessor.update_bar) window == make_features(df).tail(SEQ_LEN)
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.config import SEQ_LEN
+from app.data_processor import FEATURE_COLUMNS, LiveDataProcessor, make_features
+
+
+def _random_walk(n: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 300.0 + np.cumsum(rng.normal(0, 1.0, n))
+    open_ = close + rng.normal(0, 0.3, n)
+    high = np.maximum(open_, close) + rng.uniform(0, 0.5, n)
+    low = np.minimum(open_, close) - rng.uniform(0, 0.5, n)
+    volume = rng.integers(100, 10_000, n).astype(float)
+    return pd.DataFrame({"open": open_, "high": high, "low": low, "close": close, "volume": volume})
+
+
+_STD_COLS = [FEATURE_COLUMNS.index(c) for c in ("std_5", "std_10")]
+
+
+def _assert_stream_matches(
+    df: pd.DataFrame, atol: float = 1e-9, std_atol: float = 1e-9, check_from: int = SEQ_LEN
+) -> None:
+    proc = LiveDataProcessor()
+    bars = df[["open", "high", "low", "close", "volume"]].to_numpy()
+    for t, bar in enumerate(bars):
+        if t + 1 < SEQ_LEN:
+            proc.engine.push(*bar)
+            continue
+        got = proc.update_bar(*bar)[0]
+        if t + 1 < check_from:
+            continue
+        # 실시간 경로와 같이 최근 SEQ_LEN 개 bar 에 make_features 적용
+        want = make_features(df.iloc[t + 1 - SEQ_LEN:t + 1])[FEATURE_COLUMNS].to_numpy()
+        tol = np.full(len(FEATURE_COLUMNS), atol)
+        tol[_STD_COLS] = std_atol
+        bad = np.abs(got - want) > tol
+        assert not bad.any(), (
+            f"bar {t}: {[FEATURE_COLUMNS[j] for j in np.unique(np.nonzero(bad)[1])]} 불일치, "
+            f"max diff {np.abs(got - want).max():.3g}"
+        )
+
+
+def test_random_walk_matches_make_features():
+    _assert_stream_matches(_random_walk(400))
+
+
+def test_matches_after_resync():
+    # _RESYNC_EVERY(1024) 전후 구간
+    df = _random_walk(1100, seed=1)
+    _assert_stream_matches(df, check_from=1000)
+
+
+def test_plateau_and_rounded_prices():
+    # 같은 close 가 이어지는 구간 + 호가 단위(0.05) 반올림 가격
+    df = _random_walk(300, seed=2)
+    df.loc[100:140, ["open", "high", "low", "close"]] = 305.0
+    df[["open", "high", "low", "close"]] = (df[["open", "high", "low", "close"]] / 0.05).round() * 0.05
+    # pandas rolling std 는 평탄 구간에서 0 대신 ~1e-6 수준의 잡음(누적합 상쇄 오차)을 내므로
+    # std 열만 허용 오차를 둔다 (엔진은 평탄 구간에서 정확히 0)
+    _assert_stream_matches(df, std_atol=1e-5)
+
+
+def test_window_requires_seq_len_bars():
+    proc = LiveDataProcessor()
+    with pytest.raises(RuntimeError):
+        proc.update_bar(1.0, 1.0, 1.0, 1.0, 0.0)
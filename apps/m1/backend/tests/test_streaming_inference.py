@@ -0,0 +1,106 @@
+"""
+StreamingInference: skip(pruning) 으로 건너뛴 모델이 다시 쓰일 때 오래된 상태로 이어 계산하지 않는지
+"""
+
+import numpy as np
+import pytest
+import tensorflow as tf
+
+from app.model_registry import MODEL_BUILDERS
+from app.streaming_inference import STREAMERS, StreamingInference
+
+SEQ = 20
+N_FEAT = 4
+
+
+@pytest.fixture(scope="module")
+def models():
+    tf.keras.utils.set_random_seed(0)
+    return {name: MODEL_BUILDERS[name]((SEQ, N_FEAT)) for name in STREAMERS}
+
+
+def _keras(model, window: np.ndarray) -> float:
+    return float(np.asarray(model(window[None].astype(np.float32), training=False)).reshape(-1)[0])
+
+
+def _run(engine, series, ticks, skip_at):
+    """tick 마다 window 끝을 한 칸씩 밀며 predict, skip_at[t] 모델은 그 tick 에서 건너뜀"""
+    out = []
+    for t in ticks:
+        window = series[t - SEQ:t]
+        out.append(engine.predict(window[None], [("SYM", t)], skip=skip_at.get(t, ())))
+    return out
+
+
+@pytest.mark.parametrize("skipped", sorted(STREAMERS))
+def test_skipped_model_reprimes_on_return(models, skipped):
+    series = np.random.default_rng(1).normal(size=(SEQ + 10, N_FEAT))
+    ticks = range(SEQ, SEQ + 6)
+    skip_at = {t: (skipped,) for t in (SEQ + 1, SEQ + 2, SEQ + 3)}
+
+    engine = StreamingInference(models, SEQ, resync_every=1000, max_steps=10)
+    got = _run(engine, series, ticks, skip_at)
+    full = _run(StreamingInference(models, SEQ, resync_every=1000, max_steps=10), series, ticks, {})
+
+    for t_idx in (1, 2, 3):
+        assert skipped not in got[t_idx]
+
+    # 다시 쓰인 tick: 현재 window 로 prime → full Keras forward 와 같아야 함
+    back = SEQ + 4
+    want = _keras(models[skipped], series[back - SEQ:back])
+    assert got[4][skipped][0] == pytest.approx(want, abs=1e-4)
+
+    # 건너뛰지 않은 모델은 skip 과 무관하게 계속 증분 계산
+    for name in STREAMERS:
+        if name == skipped:
+            continue
+        for t_idx in range(len(got)):
+            assert got[t_idx][name][0] == pytest.approx(full[t_idx][name][0], abs=1e-9)
+
+
+def test_skip_without_new_step_keeps_state(models):
+    series = np.random.default_rng(2).normal(size=(SEQ + 5, N_FEAT))
+    engine = StreamingInference(models, SEQ, resync_every=1000, max_steps=10)
+    window = series[:SEQ]
+
+    first = engine.predict(window[None], [("SYM", SEQ)])
+    primes = engine.primes
+    # 같은 step 을 다시 호출 (새 bar 없음) → skip 해도 상태를 버리지 않는다
+    engine.predict(window[None], [("SYM", SEQ)], skip=("tcn_reg",))
+    again = engine.predict(window[None], [("SYM", SEQ)])
+
+    assert engine.primes == primes
+    for name in STREAMERS:
+        assert again[name][0] == pytest.approx(first[name][0], abs=1e-12)
+
+
+# 기본 STREAMING_MODELS 의 증분 결과가 full window Keras 출력에서 벗어나는 정도 (scaled 출력 기준)
+_MAX_DRIFT = 0.035
+
+
+def test_default_models_drift_is_bounded_between_resyncs():
+    from app.config import STEP6_PATH, STREAMING_MODELS, STREAMING_RESYNC_EVERY
+    from app.model_registry import registry
+
+    X = np.load(STEP6_PATH)["X_test"].astype(np.float32)
+    seq_len = X.shape[1]
+    n_ticks = 2 * STREAMING_RESYNC_EVERY + 10
+    assert np.array_equal(X[1, :-1], X[0, 1:])          # 연속 window (1 step 씩 이동)
+    windows = X[:n_ticks]
+
+    names = [n for n in STREAMING_MODELS if n in STREAMERS]
+    trained = registry.load(names, input_shape=X.shape[1:])
+    engine = StreamingInference(trained, seq_len)        # 기본 resync_every / max_steps
+
+    got = {n: np.empty(n_ticks) for n in names}
+    for t in range(n_ticks):
+        out = engine.predict(windows[t][None], [("SYM", t)])
+        for n in names:
+            got[n][t] = out[n][0]
+
+    assert engine.primes == -(-n_ticks // STREAMING_RESYNC_EVERY)
+    for n in names:
+        full = np.asarray(trained[n].predict(windows, batch_size=256, verbose=0)).reshape(n_ticks, -1)[:, 0]
+        err = np.abs(got[n] - full)
+        assert err[::STREAMING_RESYNC_EVERY].max() < 1e-4, n   # prime 직후는 full 과 같음
+        assert err.max() < _MAX_DRIFT, (n, err.max())
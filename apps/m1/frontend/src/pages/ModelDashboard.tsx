@@ -19,6 +19,14 @@ type SigmaSignal = {
 };
 
 const REST_SIGNALS = "http://localhost:8000/signals";
+// 대시보드는 한 심볼의 시계열만 그림 (백엔드 INTERNAL_SYMBOL)
+const SYMBOL = "KOSPI200";
+
+// 오늘 00:00 (KST) — 백엔드는 timezone 없는 시각을 KST 로 해석
+function todayStartKST() {
+  const kst = new Date(Date.now() + 9 * 60 * 60 * 1000);
+  return `${kst.toISOString().slice(0, 10)}T00:00:00`;
+}
 
 const COLORS = [
   "#3B82F6",
@@ -37,9 +45,15 @@ export default function ModelDashboard() {
   useEffect(() => {
     async function load() {
       try {
-        const res = await fetch(`${REST_SIGNALS}?limit=200`);
+        // 오늘 하루 전체 이력, 오늘 신호가 없으면 (장 시작 전 등) 최근 200개
+        let res = await fetch(`${REST_SIGNALS}?symbol=${SYMBOL}&since=${todayStartKST()}&limit=0`);
         if (!res.ok) throw new Error("fetch failed");
-        const arr: SigmaSignal[] = await res.json();
+        let arr: SigmaSignal[] = await res.json();
+        if (arr.length === 0) {
+          res = await fetch(`${REST_SIGNALS}?symbol=${SYMBOL}&limit=200`);
+          if (!res.ok) throw new Error("fetch failed");
+          arr = await res.json();
+        }
         setHistory(arr);
       } catch (e) {
         console.warn(e);
@@ -12,6 +12,14 @@ type SigmaSignal = {
 };
 
 const REST_SIGNALS = "http://localhost:8000/signals";
+// "오늘 전체" 는 하루치 1초 신호라 한 심볼로 제한 (백엔드 INTERNAL_SYMBOL)
+const SYMBOL = "KOSPI200";
+
+// 오늘 00:00 (KST) — 백엔드는 timezone 없는 시각을 KST 로 해석
+function todayStartKST() {
+  const kst = new Date(Date.now() + 9 * 60 * 60 * 1000);
+  return `${kst.toISOString().slice(0, 10)}T00:00:00`;
+}
 
 function toCSV(arr: SigmaSignal[]) {
   const rows = [
@@ -38,7 +46,12 @@ export default function SignalHistory() {
   useEffect(() => {
     async function load() {
       try {
-        const res = await fetch(`${REST_SIGNALS}?limit=${limit}`);
+        // limit=0 → 오늘 전체 이력 (SQLite 이력 조회, SYMBOL 만)
+        const query =
+          limit === 0
+            ? `symbol=${SYMBOL}&since=${todayStartKST()}&limit=0`
+            : `limit=${limit}`;
+        const res = await fetch(`${REST_SIGNALS}?${query}`);
         if (!res.ok) throw new Error("fetch failed");
         const arr: SigmaSignal[] = await res.json();
         setList(arr.reverse()); // 최신이 위로
@@ -72,6 +85,7 @@ export default function SignalHistory() {
           <option value={50}>50</option>
           <option value={100}>100</option>
           <option value={200}>200</option>
+          <option value={0}>오늘 전체 ({SYMBOL})</option>
         </select>
 
         <label className="text-sm text-slate-300 ml-4">최소 신뢰도</label>
@@ -1,11 +1,9 @@
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
-from sklearn.linear_model import ElasticNetCV
-from sklearn.preprocessing import StandardScaler
-from sklearn.pipeline import Pipeline
-from features import build_features_from_window
-from Embed_Copula_Model.ES import es
+from features import build_feature_matrix
+from multi_target import MultiTargetESPredictor
+from Embed_Copula_Model.ES import rolling_es
 #import scipy.stats as stats
 #from itertools import combinations
 
@@ -13,32 +11,18 @@ def in_sample_es_prediction(df_returns: pd.DataFrame,
                             win_feat: int = 500,
                             horizon: int = 20,
                             alpha_es: float = 0.05) -> pd.DataFrame:
-    X = []
-    for t in range(win_feat, len(df_returns)):
-        X.append(df_returns.iloc[t - win_feat:t].values.flatten())  # <-- win_feat 사용
-
     """
     내표본(in-sample) 기반으로 ElasticNet ES 예측
     """
     N = df_returns.shape[1]
 
-    # 1) Feature 생성
-    feats_list = []
-    for t in range(len(df_returns)):
-        window = df_returns.iloc[:t+1]
-        feats = build_features_from_window(window, alpha_tail=0.05)
-        feats_list.append(list(feats.values()))
-    X = np.array(feats_list)
+    # 1) Feature 생성 (시점 t: df_returns.iloc[:t+1] 확장 window, 한 번의 pass 로 계산)
+    X = build_feature_matrix(df_returns, alpha_tail=0.05).to_numpy(copy=True)
 
-    # 2) Target ES 계산
-    y_list = []
-    for t in range(len(df_returns) - horizon):
-        future = df_returns.iloc[t:t+horizon]
-        y_t_assets = [es(future.iloc[:, j].values, alpha=alpha_es) for j in range(N)]
-        y_list.append(y_t_assets)
+    # 2) Target ES 계산 (행 t = 구간 [t, t+horizon) 의 자산별 실현 ES, 전체 시점 한 번에)
+    y = rolling_es(df_returns.to_numpy(dtype=float), horizon, alpha=alpha_es)[:len(df_returns) - horizon]
 
-    X = X[:len(y_list)]
-    y = np.array(y_list)
+    X = X[:len(y)]
 
     # ==============================
     # NaN 처리 → 평균값으로 대체
@@ -53,26 +37,18 @@ def in_sample_es_prediction(df_returns: pd.DataFrame,
     inds_y = np.where(np.isnan(y))
     y[inds_y] = np.take(col_means_y, inds_y[1])
 
-    # 3) ElasticNet 학습 & 예측
-    y_pred = np.zeros_like(y)
-    pipe_list = [Pipeline([
-                    ("scaler", StandardScaler()),
-                    ("enet", ElasticNetCV(
-                        alphas=np.logspace(-3,1,30),
-                        l1_ratio=[0.3,0.7],
-                        cv=5,
-                        max_iter=5000
-                    ))
-                 ]) for _ in range(N)]
-
-    for j in range(N):
-        pipe_list[j].fit(X, y[:, j])
-        y_pred[:, j] = pipe_list[j].predict(X)
+    # 3) ElasticNet 학습 & 예측 (자산 공통 scaler / CV 분할, 자산별 alpha·l1_ratio)
+    model = MultiTargetESPredictor(
+        alphas=np.logspace(-3,1,30),
+        l1_ratio=[0.3,0.7],
+        cv=5,
+        max_iter=5000
+    ).fit(X, y)
 
     # 4) DataFrame 변환
-    y_pred_df = pd.DataFrame(
-        y_pred,
-        index=df_returns.index[:len(y_pred)],
+    y_pred_df = model.predict_frame(
+        X,
+        index=df_returns.index[:len(y)],
         columns=df_returns.columns[:N]
     )
     return y_pred_df
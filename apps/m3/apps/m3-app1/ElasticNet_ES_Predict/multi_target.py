@@ -0,0 +1,125 @@
+# =========================================================
+# 6) 자산 공통 X → 자산별 ES 를 한 번에 학습하는 ElasticNet
+# =========================================================
+from typing import Optional, Sequence
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.linear_model import ElasticNet, enet_path
+from sklearn.model_selection import KFold
+from sklearn.preprocessing import StandardScaler
+
+
+class MultiTargetESPredictor:
+    """
+    자산별 StandardScaler + ElasticNetCV 파이프라인 N 개와 같은 결과를, 공통 X 에 대한 준비 작업을
+    한 번만 해서 계산.
+      - StandardScaler 1개, KFold 분할 1세트, fold 별 중심화 X / Gram 행렬 1번 계산 (자산 / l1_ratio 공유)
+      - 자산 × l1_ratio × fold 마다 sklearn enet_path (ElasticNetCV 내부와 같은 인자) 로 alpha 경로 계산
+      - 자산별로 CV MSE 최소인 (alpha, l1_ratio) 선택 → sklearn ElasticNet 으로 전체 데이터 재학습
+    solver 가 sklearn 그대로라 선택되는 alpha / l1_ratio 와 예측은 자산별 ElasticNetCV 와 같다
+    (Gram / Xy 계산 순서 차이로 부동소수점 수준 오차만 있음). n_jobs 로 자산별 스레드 병렬.
+
+    fit(X, Y (샘플 × 자산)) / predict(X) → (샘플 × 자산) / predict_frame → y_pred_df 형식 DataFrame
+    """
+
+    def __init__(self,
+                 alphas: Sequence[float] = np.logspace(-3, 1, 30),
+                 l1_ratio: Sequence[float] = (0.3, 0.7),
+                 cv: int = 5,
+                 max_iter: int = 5000,
+                 tol: float = 1e-4,
+                 scale: bool = True,
+                 n_jobs: Optional[int] = 1):
+        self.alphas = alphas
+        self.l1_ratio = l1_ratio
+        self.cv = cv
+        self.max_iter = max_iter
+        self.tol = tol
+        self.scale = scale  # False 면 이미 표준화된 X 를 받는다 (WarmStartESLearner)
+        self.n_jobs = n_jobs
+
+    def _transform(self, X) -> np.ndarray:
+        X = np.asarray(X, dtype=float)
+        return self.scaler_.transform(X) if self.scaler_ is not None else X
+
+    def _fit_asset(self, Xs, y, folds, alphas, l1):
+        """자산 하나: ElasticNetCV 와 같은 CV MSE 경로 (l1_ratio × fold × alpha) → 선택 → 전체 데이터 재학습"""
+        mse = np.empty((len(l1), len(folds), len(alphas)))
+        for f, (tr, te, Xc, x_mean, gram) in enumerate(folds):
+            y_tr = y[tr]
+            y_mean = y_tr.mean()
+            yc = y_tr - y_mean
+            Xy = None
+            if gram is not False:
+                Xy = np.empty(Xc.shape[1])
+                np.dot(Xc.T, yc, out=Xy)
+            for r, ratio in enumerate(l1):
+                _, coefs, _ = enet_path(
+                    Xc, yc, l1_ratio=ratio, alphas=alphas, precompute=gram, Xy=Xy,
+                    max_iter=self.max_iter, tol=self.tol, copy_X=False, check_input=False,
+                )
+                intercepts = y_mean - x_mean @ coefs
+                residues = Xs[te] @ coefs - y[te][:, None] + intercepts
+                mse[r, f] = (residues ** 2).mean(axis=0)
+
+        # ElasticNetCV 와 같은 선택: l1_ratio 순서대로 보고, 더 작은 CV MSE 일 때만 교체
+        mean_mse = mse.mean(axis=1)
+        best = (0, int(np.argmin(mean_mse[0])))
+        for r in range(1, len(l1)):
+            a = int(np.argmin(mean_mse[r]))
+            if mean_mse[r, a] < mean_mse[best]:
+                best = (r, a)
+        r, a = best
+
+        model = ElasticNet(alpha=alphas[a], l1_ratio=l1[r], max_iter=self.max_iter, tol=self.tol).fit(Xs, y)
+        return mean_mse, alphas[a], l1[r], mean_mse[r, a], model.coef_, model.intercept_
+
+    def fit(self, X, Y) -> "MultiTargetESPredictor":
+        X = np.asarray(X, dtype=float)
+        Y = np.asarray(Y, dtype=float)
+        if Y.ndim == 1:
+            Y = Y[:, None]
+        n, p = X.shape
+        K = Y.shape[1]
+
+        self.scaler_ = StandardScaler().fit(X) if self.scale else None
+        Xs = self._transform(X)
+
+        # ElasticNetCV 와 같은 alpha 순서 (큰 값 → 작은 값)
+        alphas = np.sort(np.asarray(self.alphas, dtype=float))[::-1]
+        l1 = np.atleast_1d(np.asarray(self.l1_ratio, dtype=float))
+
+        # fold 별 중심화 X / Gram (precompute="auto": 학습 샘플 수 > 피처 수일 때만 Gram 사용)
+        folds = []
+        for tr, te in KFold(n_splits=self.cv).split(Xs):
+            x_mean = Xs[tr].mean(axis=0)
+            Xc = np.asfortranarray(Xs[tr] - x_mean)
+            gram = False
+            if len(tr) > p:
+                gram = np.empty((p, p))
+                np.dot(Xc.T, Xc, out=gram)
+            folds.append((tr, te, Xc, x_mean, gram))
+
+        if self.n_jobs == 1:
+            results = [self._fit_asset(Xs, Y[:, k], folds, alphas, l1) for k in range(K)]
+        else:
+            results = Parallel(n_jobs=self.n_jobs, prefer="threads")(
+                delayed(self._fit_asset)(Xs, Y[:, k], folds, alphas, l1) for k in range(K)
+            )
+
+        self.mse_path_ = np.stack([res[0] for res in results], axis=1)  # (l1_ratio, 자산, alpha)
+        self.alpha_ = np.array([res[1] for res in results])
+        self.l1_ratio_ = np.array([res[2] for res in results])
+        self.cv_mse_ = np.array([res[3] for res in results])
+        self.coef_ = np.array([res[4] for res in results])
+        self.intercept_ = np.array([res[5] for res in results])
+        return self
+
+    def predict(self, X) -> np.ndarray:
+        """(샘플 × 자산) 예측 ES"""
+        return self._transform(X) @ self.coef_.T + self.intercept_
+
+    def predict_frame(self, X, index=None, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """y_pred_df 와 같은 (시점 × 자산) DataFrame"""
+        return pd.DataFrame(self.predict(X), index=index, columns=columns)
@@ -1,4 +1,6 @@
 from numpy import ndarray, asarray,quantile
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 # =========================
 # 0) 유틸: ES(CVaR) 계산
 # =========================
@@ -8,3 +10,86 @@ def es(losses: ndarray, alpha: float = 0.95) -> float:
     var = quantile(losses, alpha)
     tail = losses[losses >= var]
     return float(tail.mean()) if tail.size else float(var)
+
+
+def _tail_mean(values: ndarray, var: ndarray) -> ndarray:
+    """마지막 축 기준 values >= var 평균 (해당 값이 없으면 var) — es() 와 같은 규칙"""
+    mask = values >= var[..., None]
+    cnt = mask.sum(axis=-1)
+    total = np.where(mask, values, 0.0).sum(axis=-1)
+    return np.where(cnt > 0, total / np.maximum(cnt, 1), var)
+
+
+# =========================
+# 0-1) 구간별 ES 일괄 계산 (ES 예측기 target)
+# =========================
+def rolling_es(returns, horizon: int, alpha: float = 0.95) -> ndarray:
+    """
+    (T × N) 수익률 → (T-horizon+1) × N 배열, 행 t = [es(returns[t:t+horizon, j], alpha) for j]
+    sliding_window_view 로 모든 (시점, 자산) 구간을 한 번에 보고
+    quantile(axis=-1) (np.partition 기반) + tail 평균으로 계산
+    """
+    R = asarray(returns, dtype=float)
+    if R.ndim == 1:
+        R = R[:, None]
+    if len(R) < horizon:
+        return np.empty((0, R.shape[1]))
+    windows = sliding_window_view(R, horizon, axis=0)  # (T-h+1, N, h), 복사 없음
+    var = quantile(windows, alpha, axis=-1)
+    return _tail_mean(windows, var)
+
+
+class StreamingES:
+    """
+    하루치 수익률 (N,) 이 들어올 때마다 최근 horizon 일 구간의 자산별 ES 를 갱신.
+    자산별 정렬된 window (N × horizon) 를 오래된 값 삭제 / 새 값 삽입으로 유지 (매번 정렬하지 않음)
+    update(row) → window 가 차면 자산별 ES, 아니면 None
+    (window 가 찬 뒤 k 번째 결과 = rolling_es 의 행 k, 즉 horizon-1 일 전 시점의 forward target)
+    """
+
+    def __init__(self, n_assets: int, horizon: int, alpha: float = 0.95):
+        self.horizon = horizon
+        self.alpha = alpha
+        self._ring = np.empty((horizon, n_assets))
+        self._sorted = np.empty((n_assets, 0))
+        self._head = 0
+        self._count = 0
+
+    @staticmethod
+    def _rank(sorted_rows: ndarray, x: ndarray) -> ndarray:
+        # 행별 searchsorted(left). NaN 은 정렬 시 맨 뒤로 간다
+        n_valid = (~np.isnan(sorted_rows)).sum(axis=1)
+        return np.where(np.isnan(x), n_valid, (sorted_rows < x[:, None]).sum(axis=1))
+
+    def _remove(self, old: ndarray):
+        S = self._sorted
+        idx = self._rank(S, old)
+        j = np.arange(S.shape[1] - 1)
+        self._sorted = np.take_along_axis(S, j + (j >= idx[:, None]), axis=1)
+
+    def _insert(self, new: ndarray):
+        S = self._sorted
+        m = S.shape[1]
+        if m == 0:
+            self._sorted = new[:, None].copy()
+            return
+        pos = self._rank(S, new)
+        j = np.arange(m + 1)
+        src = np.clip(j - (j > pos[:, None]), 0, m - 1)
+        out = np.take_along_axis(S, src, axis=1)
+        at = j == pos[:, None]
+        out[at] = np.broadcast_to(new[:, None], out.shape)[at]
+        self._sorted = out
+
+    def update(self, row):
+        row = asarray(row, dtype=float)
+        if self._count == self.horizon:
+            self._remove(self._ring[self._head])
+        self._insert(row)
+        self._ring[self._head] = row
+        self._head = (self._head + 1) % self.horizon
+        self._count = min(self._count + 1, self.horizon)
+        if self._count < self.horizon:
+            return None
+        var = quantile(self._sorted, self.alpha, axis=1)
+        return _tail_mean(self._sorted, var)
@@ -0,0 +1,126 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from scipy import stats
+
+# ============================================
+# Kendall tau-b 행렬: 열 순위 1번 + 모든 쌍을 한 번에 merge-sort 역순 쌍 계산
+#   scipy.stats.kendalltau 를 쌍마다 부르는 대신 (N(N-1)/2 번 호출)
+#   쌍 (i, j) 마다 (x_i, x_j) 사전식 정렬 후 x_j 의 역순 쌍(= 불일치 쌍) 수를 bottom-up merge 로 센다.
+#   tau-b 공식/동점 보정/[-1, 1] clip 은 scipy 와 같음 (상수 열이 끼면 NaN)
+# ============================================
+_CHUNK_ELEMS = 1 << 21  # 한 번에 처리할 (쌍 × 관측치) 원소 수 상한 (메모리 제한)
+_CACHE_SIZE = 32
+_BASE = 8             # merge 전에 직접 비교로 처리하는 블록 크기
+
+_cache: "OrderedDict[tuple, np.ndarray]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _tied_pairs(sorted_vals: np.ndarray) -> np.ndarray:
+    """마지막 축이 정렬된 배열 → 행별 동점 쌍 수 Σ c(c-1)/2"""
+    n = sorted_vals.shape[-1]
+    idx = np.arange(n)
+    new_run = np.ones(sorted_vals.shape, dtype=bool)
+    new_run[..., 1:] = sorted_vals[..., 1:] != sorted_vals[..., :-1]
+    run_start = np.maximum.accumulate(np.where(new_run, idx, 0), axis=-1)
+    return (idx - run_start).sum(axis=-1)
+
+
+def _count_inversions(Y: np.ndarray, pad: int) -> np.ndarray:
+    """
+    Y (P, n) 정수 → 행별 i < j, Y_i > Y_j 인 쌍 수 (bottom-up merge sort, 모든 행 동시 처리)
+    pad 는 Y 의 모든 값보다 커야 한다
+    """
+    P, n = Y.shape
+    size = max(_BASE, 1 << max(0, (n - 1).bit_length()))
+    A = np.full((P, size), pad, dtype=np.int32)
+    A[:, :n] = Y
+    inv = np.zeros(P, dtype=np.int64)
+
+    # 작은 블록은 직접 비교 후 정렬
+    blk = A.reshape(P, -1, _BASE)
+    for d in range(1, _BASE):
+        inv += (blk[..., :-d] > blk[..., d:]).sum(axis=(1, 2))
+    blk.sort(axis=-1)
+
+    w = _BASE
+    while w < size:
+        # 정렬된 두 블록 [left | right] 병합: 값 << 1 | (right 여부) 로 정렬하면 같은 값은 left 가 먼저
+        pos = np.arange(2 * w, dtype=np.int32)
+        B = (A.reshape(P, -1, 2 * w) << 1) | (pos >= w)
+        B.sort(axis=-1)
+        # right 의 q 번째 원소가 병합 후 pos 에 오면 그보다 큰 left 원소 수 = w + q - pos
+        right_pos = ((B & 1) * pos).sum(axis=(1, 2), dtype=np.int64)
+        inv += B.shape[1] * (w * w + w * (w - 1) // 2) - right_pos
+        A = (B >> 1).reshape(P, size)
+        w *= 2
+    return inv
+
+
+def _tau_matrix(X: np.ndarray) -> np.ndarray:
+    n, N = X.shape
+    tau = np.eye(N)
+    if N < 2:
+        return tau
+    if n < 2:
+        tau[~np.eye(N, dtype=bool)] = np.nan
+        return tau
+
+    # 열마다 dense rank (0 ~ n-1) 한 번만. 결측치가 있는 열은 scipy 처럼 NaN
+    bad = np.isnan(X).any(axis=0)
+    R = (stats.rankdata(np.where(bad, 0.0, X), method="dense", axis=0) - 1).astype(np.int64).T  # (N, n)
+    tot = n * (n - 1) // 2
+    xtie = _tied_pairs(np.sort(R, axis=-1))  # (N,)
+
+    iu, ju = np.triu_indices(N, k=1)
+    step = max(1, _CHUNK_ELEMS // n)
+    for s in range(0, len(iu), step):
+        i, j = iu[s:s + step], ju[s:s + step]
+        # (x_i, x_j) 사전식 정렬 = 결합 키 정렬
+        key = np.sort(R[i] * n + R[j], axis=-1)
+        ntie = _tied_pairs(key)
+        dis = _count_inversions(key % n, pad=n)
+        con_minus_dis = tot - xtie[i] - xtie[j] + ntie - 2 * dis
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t = con_minus_dis / np.sqrt(tot - xtie[i]) / np.sqrt(tot - xtie[j])
+        t = np.where((xtie[i] == tot) | (xtie[j] == tot), np.nan, np.clip(t, -1.0, 1.0))
+        tau[i, j] = tau[j, i] = t
+    tau[bad, :] = np.nan
+    tau[:, bad] = np.nan
+    np.fill_diagonal(tau, 1.0)
+    return tau
+
+
+def kendall_tau_matrix(X, use_cache: bool = True) -> np.ndarray:
+    """
+    (n × N) 관측치 → (N × N) Kendall tau-b 행렬 (대각 1, 상수 열 / 결측치 열이 낀 쌍은 NaN)
+    순위 기반이라 원 수익률 / empirical_pit 결과 어느 쪽을 넣어도 같다.
+    같은 window 는 최근 _CACHE_SIZE 개까지 캐시 (읽기 전용 배열 반환)
+    """
+    X = np.ascontiguousarray(X, dtype=float)
+    if not use_cache:
+        return _tau_matrix(X)
+
+    key = (X.shape, hashlib.blake2b(X.tobytes(), digest_size=16).digest())
+    with _cache_lock:
+        hit = _cache.get(key)
+        if hit is not None:
+            _cache.move_to_end(key)
+            return hit
+
+    tau = _tau_matrix(X)
+    tau.setflags(write=False)
+    with _cache_lock:
+        _cache[key] = tau
+        while len(_cache) > _CACHE_SIZE:
+            _cache.popitem(last=False)
+    return tau
+
+
+def pairwise_taus(X, use_cache: bool = True) -> np.ndarray:
+    """combinations(range(N), 2) 순서의 쌍별 tau 벡터"""
+    tau = kendall_tau_matrix(X, use_cache=use_cache)
+    return tau[np.triu_indices(tau.shape[0], k=1)]
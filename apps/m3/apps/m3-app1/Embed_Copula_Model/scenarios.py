@@ -5,11 +5,11 @@ import scipy.stats as stats
 import matplotlib.pyplot as plt
 import pandas as pd
 from itertools import combinations # 조합 함수를 사용하기 위해 추가
-from scipy.stats import kendalltau
 from copulas.bivariate import Clayton
 from typing import Optional
 from Embed_Copula_Model.PPF import empirical_pit
 from Embed_Copula_Model.PPF import  EmpiricalPPF
+from Embed_Copula_Model.kendall import pairwise_taus
 
 # ==========================================
 # 3) 시나리오 생성: 클레이톤 코퓰라 + Kendall tau 평균으로 theata 추정 + 주변분포(Marginal Distribution) 역변환 시뮬레이션
@@ -29,14 +29,9 @@ def simulate_scenarios_clayton(returns_window: pd.DataFrame, n_sims: int = 10000
     U = np.column_stack([empirical_pit(X[:, j]) for j in range(X.shape[1])])
     ppfs = [EmpiricalPPF(X[:, j]) for j in range(X.shape[1])]
 
-#Kendall tau 평균으로 theta 추정
-    taus = []
-    for i in range(U.shape[1]):
-        for j in range(i+1, U.shape[1]):
-            tau_ij = stats.kendalltau(U[:, i], U[:, j])[0]
-            if not np.isnan(tau_ij):
-                taus.append(tau_ij)
-    tau_mean = np.mean(taus)
+#Kendall tau 평균으로 theta 추정 (모든 쌍 한 번에, 같은 window 는 features 와 캐시 공유)
+    taus = pairwise_taus(X)
+    tau_mean = np.mean(taus[~np.isnan(taus)])
     theta = max(2 * tau_mean / (1 - tau_mean), 1e-3)  # 안정성 보정
 
 # === Copula 샘플 ===
@@ -1,13 +1,109 @@
-from typing import Tuple, Dict, List
+from typing import Tuple, Dict, List, Optional
+from collections import deque
 import numpy as np
 import pandas as pd
-from sklearn.linear_model import ElasticNetCV
+from joblib import Parallel, delayed
+from sklearn.linear_model import ElasticNet
 from sklearn.preprocessing import StandardScaler
-from sklearn.pipeline import Pipeline
-from features import build_features_from_window
+from features import build_feature_matrix
+from multi_target import MultiTargetESPredictor
 import matplotlib.pyplot as plt
 #from data.syn import generate_synthetic_returns
-from Embed_Copula_Model.ES import es
+from Embed_Copula_Model.ES import rolling_es
+
+# =========================================================
+# 5-0) 확장 학습용 warm-start ElasticNet (자산별)
+# =========================================================
+class WarmStartESLearner:
+    """
+    확장(Expanding) 학습에서 매 시점 처음부터 ElasticNetCV 를 돌리는 대신:
+      - 표준화: StandardScaler.partial_fit 으로 새로 들어온 샘플만 반영 (자산 공통 X 이므로 1개)
+      - 계수: ElasticNet(warm_start=True) 로 직전 시점 계수에서 이어서 학습
+      - alpha / l1_ratio: reselect_every step 마다, 또는 1-step 예측오차가 선택 당시
+        CV MSE 의 drift_ratio 배를 넘으면(drift) 그 자산들만 MultiTargetESPredictor 로 다시 선택
+      - 자산별 학습은 joblib 스레드 병렬 (n_jobs=1 이면 순차)
+    """
+
+    def __init__(self, n_assets: int,
+                 alphas=np.logspace(-3, 1, 30),
+                 l1_ratio=(0.3, 0.7),
+                 cv: int = 5,
+                 max_iter: int = 5000,
+                 reselect_every: int = 20,
+                 drift_ratio: float = 3.0,
+                 n_jobs: Optional[int] = 1):
+        self.n_assets = n_assets
+        self.alphas = alphas
+        self.l1_ratio = list(l1_ratio)
+        self.cv = cv
+        self.max_iter = max_iter
+        self.reselect_every = reselect_every
+        self.drift_ratio = drift_ratio
+        self.scaler = StandardScaler()
+        self._n_seen = 0
+        self.models: List[Optional[ElasticNet]] = [None] * n_assets
+        self._cv_mse = np.full(n_assets, np.nan)       # 선택 당시 CV MSE
+        self._since_select = np.zeros(n_assets, dtype=int)
+        self._errors = [deque(maxlen=max(reselect_every, 5)) for _ in range(n_assets)]
+        self.n_reselects = 0
+        self._parallel = Parallel(n_jobs=n_jobs, prefer="threads") if n_jobs != 1 else None
+
+    def _run(self, fn, items):
+        if self._parallel is None:
+            return [fn(j) for j in items]
+        return self._parallel(delayed(fn)(j) for j in items)
+
+    def _drifted(self, j: int) -> bool:
+        errs = self._errors[j]
+        return len(errs) >= 5 and np.mean(errs) > self.drift_ratio * self._cv_mse[j]
+
+    def _reselect(self, assets: List[int], Xs: np.ndarray, Y: np.ndarray):
+        # 재선택 대상 자산을 한 번에 CV (Xs 는 이미 표준화)
+        cv = MultiTargetESPredictor(
+            alphas=self.alphas, l1_ratio=self.l1_ratio, cv=self.cv, max_iter=self.max_iter, scale=False
+        ).fit(Xs, Y[:, assets])
+        for k, j in enumerate(assets):
+            model = ElasticNet(alpha=cv.alpha_[k], l1_ratio=cv.l1_ratio_[k], max_iter=self.max_iter, warm_start=True)
+            # CV 의 전체 데이터 계수에서 시작
+            model.coef_ = cv.coef_[k].copy()
+            model.intercept_ = cv.intercept_[k]
+            model.fit(Xs, Y[:, j])
+            self.models[j] = model
+            self._cv_mse[j] = cv.cv_mse_[k]
+            self._since_select[j] = 0
+            self._errors[j].clear()
+
+    def step(self, X: np.ndarray, Y: np.ndarray, x_pred: np.ndarray) -> List[float]:
+        """누적 학습셋 (X, Y) 로 갱신 후 x_pred 의 자산별 예측 ES"""
+        # 새 샘플만 scaler 에 반영
+        self.scaler.partial_fit(X[self._n_seen:])
+        self._n_seen = len(X)
+        Xs = self.scaler.transform(X)
+
+        # 가장 최근 샘플은 아직 학습 전 → 1-step 예측오차로 drift 감시
+        for j, model in enumerate(self.models):
+            if model is not None:
+                self._errors[j].append(float((Y[-1, j] - model.predict(Xs[-1:])[0]) ** 2))
+
+        reselect = [
+            j for j in range(self.n_assets)
+            if self.models[j] is None
+            or self._since_select[j] >= self.reselect_every
+            or self._drifted(j)
+        ]
+        self.n_reselects += len(reselect)
+        if reselect:
+            self._reselect(reselect, Xs, Y)
+
+        def fit_asset(j):
+            self.models[j].fit(Xs, Y[:, j])
+            self._since_select[j] += 1
+
+        self._run(fit_asset, [j for j in range(self.n_assets) if j not in reselect])
+
+        xs_pred = self.scaler.transform(np.asarray(x_pred, dtype=float).reshape(1, -1))
+        return [float(m.predict(xs_pred)[0]) for m in self.models]
+
 
 # =========================================================
 # 5) Elastic Net: ES 예측기 - 확장(Expanding) 학습으로 외표본 ES 예측값 생성 (자산별)
@@ -18,13 +114,23 @@ def fit_es_predictor_expanding_assets(
         horizon: int = 20,  #앞으로 약 1개월의 ES값을 예측한다.
         es_alpha_target: float = 0.05,
         alpha_tail_feat: float = 0.05,
+        warm_start: bool = False,
+        reselect_every: int = 20,
+        drift_ratio: float = 3.0,
+        n_jobs: Optional[int] = 1,
 ) -> Tuple[pd.DataFrame, List[Dict[str, float]]]:
     """
     매 시점 t에 대해:
       - 과거 win_feat 기간 window로 X(feat) 구성
       - 각 자산별로 '다음 horizon' 구간 실현 ES 계산 → 학습 샘플 추가
       확장학습은 계속해서 데이터를 추가하는 방식이다.
-      - ElasticNetCV(표준화)로 '확장 학습' 후 각 자산별 y_pred 생성
+      - MultiTargetESPredictor(표준화 + 자산별 ElasticNet CV, sklearn solver 라 자산별 ElasticNetCV 와 같은 결과)로
+        '확장 학습' 후 각 자산별 y_pred 생성
+      - warm_start=True 면 WarmStartESLearner 로 증분 학습 (하이퍼파라미터는
+        reselect_every step 마다 / drift 시에만 재선택, n_jobs 로 자산별 병렬)
+        ⚠️ 기본 경로와 같은 결과가 아님: reselect_every=1 이어도 warm-start 좌표하강 / partial_fit
+        표준화 때문에 최대 ~3e-3 차이, 기본값에서는 상관 0.91~0.99 (자산별 최대 편차 73%)
+        → 기준(nightly) 결과는 warm_start=False 로 생성하고, 빠른 탐색용으로만 사용
     반환: 시계열 ES
       - y_pred_df: (시점 × 자산) 예측 ES DataFrame
       - feat_list: 각 시점별 피처 dict (공통)
@@ -38,22 +144,23 @@ def fit_es_predictor_expanding_assets(
     t0 = win_feat
     T = len(df)
 
-    pipe_list = [None] * N  # 자산별 pipeline 저장
+    learner = WarmStartESLearner(
+        N, reselect_every=reselect_every, drift_ratio=drift_ratio, n_jobs=n_jobs
+    ) if warm_start else None
 
-    for t in range(t0, T - horizon):   # range(100, 175-20) = range(100, 155)
-        window = df.iloc[t - win_feat:t]
-        future = df.iloc[t:t + horizon]
+    # 공통 피처: 행 t-1 = window df.iloc[t - win_feat:t] 의 피처 (전체 기간 한 번에 계산)
+    feat_mat = build_feature_matrix(df, win=win_feat, alpha_tail=alpha_tail_feat)
+    # 자산별 target ES: 행 t = 구간 df.iloc[t:t + horizon] 의 실현 ES (전체 기간 한 번에 계산)
+    es_mat = rolling_es(df.to_numpy(dtype=float), horizon, alpha=es_alpha_target)
 
-        # 공통 피처 생성
-        feats = build_features_from_window(window, alpha_tail=alpha_tail_feat)
+    for t in range(t0, T - horizon):   # range(100, 175-20) = range(100, 155)
+        # 공통 피처
+        feats = feat_mat.iloc[t - 1].to_dict()
         feat_vec = list(feats.values())
         feat_vec_cleaned = np.nan_to_num(feat_vec, nan=0.0)
 
-        # 자산별 target ES 계산
-        y_t_assets = []
-        for j in range(N):
-            asset_future = future.iloc[:, j].values
-            y_t_assets.append(es(asset_future, alpha=es_alpha_target))
+        # 자산별 target ES
+        y_t_assets = es_mat[t].tolist()
 
         # 누적 학습셋에 추가
         X_hist.append(feat_vec_cleaned)
@@ -62,24 +169,15 @@ def fit_es_predictor_expanding_assets(
 
         # 예측
         y_hat_assets = []
-        if len(y_hist) >= 60:  # 최소 샘플 수 확보
+        if len(y_hist) >= 60 and learner is not None:
+            y_hat_assets = learner.step(np.array(X_hist), np.array(y_hist), feat_vec_cleaned)
+        elif len(y_hist) >= 60:  # 최소 샘플 수 확보
             X_np = np.array(X_hist)
             Y_np = np.array(y_hist)  # (샘플 × 자산)
 
-            for j in range(N):
-                if pipe_list[j] is None:
-                    pipe_list[j] = Pipeline([
-                        ("scaler", StandardScaler()),
-                        ("enet", ElasticNetCV(
-                            alphas=np.logspace(-3, 1, 30),
-                            l1_ratio=[0.3, 0.7],
-                            cv=5,
-                            max_iter=5000
-                        ))
-                    ])
-                pipe_list[j].fit(X_np, Y_np[:, j])
-                y_hat = float(pipe_list[j].predict([feat_vec_cleaned])[0])
-                y_hat_assets.append(y_hat)
+            # 자산 공통 scaler / CV 분할로 모든 자산 ES 를 한 번에 학습
+            model = MultiTargetESPredictor().fit(X_np, Y_np)
+            y_hat_assets = model.predict([feat_vec_cleaned])[0].tolist()
         else:
             # 워밍업 구간 → 과거 평균
             y_hat_assets = np.mean(y_hist, axis=0).tolist()
@@ -109,6 +207,8 @@ if __name__ == "__main__":
         horizon=20,
         es_alpha_target=0.05,
         alpha_tail_feat=0.05,
+        # 기준 경로: 매 시점 MultiTargetESPredictor 전체 재학습 (sklearn enet_path → 자산별 ElasticNetCV 와 같은 결과)
+        # warm_start=True, n_jobs=-1 은 빠르지만 결과가 달라짐
     )
     print("\n=== ElasticNet ES 예측 (상위 5행) ===")
     print(y_pred_df.head())
@@ -4,37 +4,39 @@
 from itertools import combinations # Needed for combinations
 import pandas as pd
 import numpy as np
-import scipy.stats as stats
-from typing import Dict
+from typing import Dict, Optional
 from Embed_Copula_Model.PPF import empirical_pit
+from Embed_Copula_Model.kendall import pairwise_taus
+
+# build_features_from_window / build_feature_matrix 의 피처 순서
+FEATURE_NAMES = (
+    "eq_vol_20", "eq_vol_60", "eq_skew_60", "eq_kurt_60",
+    "tau_mean", "tau_max", "tau_min", "lam_emp_mean", "lam_clayton",
+)
+
+
+def clayton_theta_from_tau(tau):
+    # Clayton copula에서 Kendall's tau ↔ θ 변환
+    return 2 * tau / (1 - tau)
+
+
+def clayton_lambda_L(theta):
+    # Clayton copula의 lower tail dependence λ_L 계산
+    return 2 ** (-1 / theta)
+
 
 def build_features_from_window(window: pd.DataFrame, alpha_tail: float = 0.05) -> Dict[str, float]:
     N = window.shape[1]
     eq_ret = window.mean(axis=1)
 
-    def clayton_theta_from_tau(tau):
-        # Clayton copula에서 Kendall's tau ↔ θ 변환
-        return 2 * tau / (1 - tau)
-
-    def clayton_lambda_L(theta):
-        # Clayton copula의 lower tail dependence λ_L 계산
-        return 2 ** (-1 / theta)
-
     # PIT 변환
     U = np.column_stack([empirical_pit(window.iloc[:, j].values) for j in range(N)])
 
-    # Kendall's tau 통계
-    taus = []
-    for i, j in combinations(range(N), 2):
-        x, y = U[:, i], U[:, j]
-
-        if len(x) < 10 or len(y) < 10 or np.std(x) == 0 or np.std(y) == 0:
-            tau_ij = 0.0
-        else:
-            tau_ij = stats.kendalltau(x, y)[0]
-            if np.isnan(tau_ij):
-                tau_ij = 0.0
-        taus.append(tau_ij)
+    # Kendall's tau 통계 (모든 쌍 한 번에, 관측치 10개 미만 / 상수 열이면 0)
+    if len(U) < 10:
+        taus = [0.0] * (N * (N - 1) // 2)
+    else:
+        taus = np.nan_to_num(pairwise_taus(window.to_numpy(dtype=float)), nan=0.0).tolist()
 
     tau_mean = float(np.mean(taus)) if taus else 0.0
     tau_max  = float(np.max(taus)) if taus else 0.0
@@ -82,3 +84,146 @@ def build_features_from_window(window: pd.DataFrame, alpha_tail: float = 0.05) -
     return feats
 
 
+# =========================================================
+# 4-1) 전체 기간 피처 행렬: window 를 한 칸씩 밀며 증분 계산
+# =========================================================
+class RollingFeatureBuilder:
+    """
+    build_features_from_window 와 같은 9개 피처를 관측치 1개 추가(/삭제)마다 갱신.
+      - Kendall tau: 쌍별 sign(Δx)·sign(Δy) 합 S (N×N) 를 관측치가 들어오고 나갈 때 O(n·N²) 로 갱신
+        (대각 S_ii = 동점이 아닌 쌍의 수 → tau-b 분모). 순위 PIT 는 단조변환이라 원 수익률로 세도 같다
+      - 경험적 λ_L: 열별 정렬 배열에서 하위 꼬리 후보만 평균순위 → PIT 계산
+      - eq 통계: 최근 60개 eq_ret 만 보관
+    win=None 이면 확장(expanding) window, 정수면 최근 win 개 관측치.
+    수익률에 결측치가 없다고 가정 (real_returns 는 dropna 후 사용)
+    """
+
+    def __init__(self, n_assets: int, win: Optional[int] = None, alpha_tail: float = 0.05):
+        self.N = n_assets
+        self.win = win
+        self.alpha_tail = alpha_tail
+        self._buf = np.empty((win if win is not None else 256, n_assets))
+        self._n = 0      # window 안 관측치 수
+        self._head = 0   # (win 지정 시) 다음에 덮어쓸 위치
+        self._S = np.zeros((n_assets, n_assets))
+        self._sorted = [np.empty(0) for _ in range(n_assets)]
+        self._eq = np.empty(0)
+        self._eq_len = 60 if win is None else min(60, win)
+        self._iu = np.triu_indices(n_assets, k=1)
+
+    def _concordance(self, row: np.ndarray) -> np.ndarray:
+        d = np.sign(row - self._buf[:self._n])  # 자기 자신과의 쌍은 0
+        return d.T @ d
+
+    def push(self, row) -> Dict[str, float]:
+        """관측치 1개(자산별 수익률) 추가 → 현재 window 의 피처 dict"""
+        row = np.asarray(row, dtype=float)
+        if self.win is not None and self._n == self.win:
+            # 가장 오래된 관측치 제거
+            old = self._buf[self._head].copy()
+            self._S -= self._concordance(old)
+            for j in range(self.N):
+                s = self._sorted[j]
+                self._sorted[j] = np.delete(s, np.searchsorted(s, old[j]))
+            self._buf[self._head] = row
+            self._head = (self._head + 1) % self.win
+        else:
+            if self._n == len(self._buf):
+                self._buf = np.concatenate([self._buf, np.empty_like(self._buf)])
+            self._buf[self._n] = row
+            self._n += 1
+        self._S += self._concordance(row)
+        for j in range(self.N):
+            s = self._sorted[j]
+            self._sorted[j] = np.insert(s, np.searchsorted(s, row[j]), row[j])
+        self._eq = np.append(self._eq, row.mean())[-self._eq_len:]
+        return self.features()
+
+    def _tail_mask(self) -> np.ndarray:
+        """(n, N) bool: empirical_pit(열) < alpha_tail 인 관측치"""
+        n, a = self._n, self.alpha_tail
+        # 평균순위가 a·n + 0.5 보다 작아야 하므로 정렬 앞쪽 m 개만 보면 된다
+        m = min(n, int(a * n) + 2)
+        vmax = np.full(self.N, -np.inf)
+        for j in range(self.N):
+            s = self._sorted[j]
+            head = s[:m]
+            rank = 0.5 * (np.searchsorted(s, head, "right") + np.searchsorted(s, head, "left") + 1)
+            tail = (rank - 0.5) / n < a
+            if tail.any():
+                vmax[j] = head[tail].max()
+        return self._buf[:n] <= vmax
+
+    def features(self) -> Dict[str, float]:
+        n = self._n
+
+        # Kendall's tau-b (n < 10 이거나 한 열이 전부 동점이면 0)
+        if self.N < 2:
+            taus = np.empty(0)
+        elif n < 10:
+            taus = np.zeros(len(self._iu[0]))
+        else:
+            d = np.diag(self._S)
+            di, dj = d[self._iu[0]], d[self._iu[1]]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                taus = self._S[self._iu] / np.sqrt(di) / np.sqrt(dj)
+            taus = np.where((di > 0) & (dj > 0), np.clip(taus, -1.0, 1.0), 0.0)
+
+        tau_mean = float(np.mean(taus)) if taus.size else 0.0
+        tau_max = float(np.max(taus)) if taus.size else 0.0
+        tau_min = float(np.min(taus)) if taus.size else 0.0
+
+        theta = clayton_theta_from_tau(max(min(tau_mean, 0.99), -0.99)) if tau_mean > 0 else 1e-6
+        lam_clayton = clayton_lambda_L(theta) if theta > 0 else 0.0
+
+        # 경험적 λ_L: P(U_j < a | U_i < a), i < j 쌍 평균
+        if self.N < 2:
+            lam_emp_mean = 0.0
+        else:
+            L = self._tail_mask()
+            L = L[L.any(axis=1)].astype(float)
+            C = L.T @ L  # C_ij = 두 열 모두 꼬리인 관측치 수
+            p_i = np.diag(C)[self._iu[0]] / n
+            joint = C[self._iu] / n
+            with np.errstate(divide="ignore", invalid="ignore"):
+                lam = np.where(p_i > 0, joint / p_i, 0.0)
+            lam_emp_mean = float(np.mean(lam))
+
+        eq = self._eq
+        eq_vol_20 = float(np.std(eq[-20:], ddof=1)) if len(eq) >= 20 else np.nan
+        eq_vol_60 = eq_skew_60 = eq_kurt_60 = np.nan
+        if len(eq) >= 60:
+            # pandas rolling std/skew/kurt 와 같은 표본 보정 공식
+            k = len(eq)
+            x = eq - eq.mean()
+            x2 = x * x
+            m2, m3, m4 = x2.mean(), (x2 * x).mean(), (x2 * x2).mean()
+            eq_vol_60 = float(np.sqrt(m2 * k / (k - 1)))
+            if m2 > 0:
+                eq_skew_60 = float(np.sqrt(k * (k - 1)) / (k - 2) * m3 / m2 ** 1.5)
+                eq_kurt_60 = float((k - 1) / ((k - 2) * (k - 3)) * ((k + 1) * m4 / m2 ** 2 - 3 * (k - 1)))
+
+        return {
+            "eq_vol_20":  eq_vol_20,
+            "eq_vol_60":  eq_vol_60,
+            "eq_skew_60": eq_skew_60,
+            "eq_kurt_60": eq_kurt_60,
+            "tau_mean":   tau_mean,
+            "tau_max":    tau_max,
+            "tau_min":    tau_min,
+            "lam_emp_mean": lam_emp_mean,
+            "lam_clayton": lam_clayton,
+        }
+
+
+def build_feature_matrix(df_returns: pd.DataFrame,
+                         win: Optional[int] = None,
+                         alpha_tail: float = 0.05) -> pd.DataFrame:
+    """
+    모든 시점 t 의 build_features_from_window 결과를 한 번에 계산 (T × 9, index = window 마지막 시점)
+      - win=None : window = df_returns.iloc[:t+1]           (확장)
+      - win=w    : window = df_returns.iloc[max(0, t+1-w):t+1] (최근 w 개)
+    """
+    builder = RollingFeatureBuilder(df_returns.shape[1], win=win, alpha_tail=alpha_tail)
+    rows = [list(builder.push(r).values()) for r in df_returns.to_numpy(dtype=float)]
+    return pd.DataFrame(rows, index=df_returns.index, columns=list(FEATURE_NAMES))